@@ -1,37 +1,41 @@
 import logging
 
-# Import version from pyproject.toml
-from importlib.metadata import version as get_version
-
 import click
 
-from cobo_cli.commands import (
-    app,
-    auth,
-    config,
-    delete_api,
-    doc,
-    env,
-    get_api,
-    graphql,
-    keys,
-    login,
-    logout,
-    logs,
-    open,
-    post_api,
-    put_api,
-    skill,
-    webhook,
-)
 from cobo_cli.data.auth_methods import AuthMethodType
-from cobo_cli.data.context import CommandContext
 from cobo_cli.data.environments import EnvironmentType
-from cobo_cli.utils.api import load_api_spec
-from cobo_cli.utils.config import ConfigManager
+from cobo_cli.utils.lazy_group import LazyGroup
 
 logger = logging.getLogger(__name__)
 
+# Subcommands are imported on demand to keep start-up fast; only the command
+# being run (or whose help is shown) pays for its dependencies.
+LAZY_SUBCOMMANDS = {
+    "config": "cobo_cli.commands.config:config",
+    "login": "cobo_cli.commands.login:login",
+    "logout": "cobo_cli.commands.logout:logout",
+    "keys": "cobo_cli.commands.keys:keys",
+    "app": "cobo_cli.commands.app:app",
+    "open": "cobo_cli.commands.open:open",
+    "doc": "cobo_cli.commands.doc:doc",
+    "env": "cobo_cli.commands.env:env",
+    "logs": "cobo_cli.commands.logs:logs",
+    "auth": "cobo_cli.commands.auth:auth",
+    "skill": "cobo_cli.commands.skill:skill",
+    "webhook": "cobo_cli.commands.webhook:webhook",
+    # API commands
+    "get": "cobo_cli.commands.get:get_api",
+    "post": "cobo_cli.commands.post:post_api",
+    "put": "cobo_cli.commands.put:put_api",
+    "delete": "cobo_cli.commands.delete:delete_api",
+    "graphql": "cobo_cli.commands.graphql:graphql",
+    "batch": "cobo_cli.commands.batch:batch",
+    "serve": "cobo_cli.commands.serve:serve",
+}
+
+# Commands that do not need the config file or the API spec.
+CONTEXT_FREE_SUBCOMMANDS = {"version", "serve"}
+
 
 def setup_logging(enable_debug: bool) -> None:
     logging.basicConfig(
@@ -40,7 +44,11 @@ def setup_logging(enable_debug: bool) -> None:
     )
 
 
-@click.group(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands=LAZY_SUBCOMMANDS,
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
 @click.option(
     "-e",
     "--env",
@@ -55,12 +63,17 @@ def setup_logging(enable_debug: bool) -> None:
     type=click.Choice(AuthMethodType.values()),
     help="Override the authentication method for this command.",
 )
+@click.option(
+    "--profile",
+    envvar="COBO_PROFILE",
+    help="Use the credentials and settings of a named profile from the config "
+    "file ([profiles.<name>]). Can also be set with COBO_PROFILE.",
+)
 @click.option(
     "--enable-debug", is_flag=True, help="Enable debug mode for verbose logging."
 )
 @click.option(
     "--config-file",
-    default=ConfigManager.get_config_file_path(),
     help="Specify the path to the config file. Example: --config-file /path/to/config.toml",
 )
 @click.option(
@@ -74,6 +87,7 @@ def cli(
     ctx: click.Context,
     env_type: str,
     auth_type: str,
+    profile: str,
     enable_debug: bool,
     config_file: str,
     custom_spec_path: str,
@@ -81,23 +95,44 @@ def cli(
     """Cobo CLI - A command-line interface for managing Cobo applications and configurations."""
     setup_logging(enable_debug)
 
-    config_manager = ConfigManager(config_file, env_type)
+    if ctx.invoked_subcommand in CONTEXT_FREE_SUBCOMMANDS:
+        return
+
+    from cobo_cli.data.context import CommandContext
+    from cobo_cli.utils.config import ConfigManager
 
+    config_manager = ConfigManager(config_file, env_type, profile)
+
+    # ``config`` commands create profiles, everything else needs an existing one.
+    if (
+        profile
+        and ctx.invoked_subcommand != "config"
+        and not config_manager.has_profile(profile)
+    ):
+        raise click.BadParameter(f"Unknown profile: {profile}", param_hint="--profile")
+
+    # Read straight from the parsed file: validating all the settings is
+    # left to the commands that use them.
     # If current_env is not specified, try to load it from the config
     if not env_type:
-        env_type = config_manager.get_config("environment")
-
-    # If current_env is still not set, default to 'dev'
-    env_type = env_type or EnvironmentType.DEVELOPMENT.value
+        env_type = config_manager.load_env_type()
+        if env_type not in EnvironmentType.values():
+            raise click.ClickException(f"Invalid environment in config: {env_type}")
 
     # If auth_type is not specified, try to load it from the config
     if not auth_type:
-        auth_type = config_manager.get_config("auth_method")
-
-    auth_type = auth_type or AuthMethodType.APIKEY.value
+        auth_type = config_manager.get_raw_config(
+            "auth_method", AuthMethodType.APIKEY.value
+        )
+        if auth_type not in AuthMethodType.values():
+            raise click.ClickException(f"Invalid auth_method in config: {auth_type}")
 
     # Load API spec
-    api_spec = load_api_spec(custom_spec_path) if custom_spec_path else None
+    api_spec = None
+    if custom_spec_path:
+        from cobo_cli.utils.openapi import load_api_spec
+
+        api_spec = load_api_spec(custom_spec_path)
 
     # Create CommandContext and store it in ctx.obj
     ctx.obj = CommandContext(
@@ -109,7 +144,7 @@ def cli(
 
     logger.debug(
         f"MainCommand called with parameters: "
-        f"environment={env_type}, auth={auth_type}, "
+        f"environment={env_type}, auth={auth_type}, profile={profile}, "
         f"config_file={config_file}, "
         f"custom_spec_path={custom_spec_path}"
     )
@@ -119,29 +154,11 @@ def cli(
 @cli.command("version", help="Display the current version of the Cobo CLI tool.")
 def version():
     """Display the current version of the Cobo CLI tool."""
-    click.echo(f"Cobo CLI version: {get_version('cobo-cli')}")
+    # Import version from pyproject.toml
+    from importlib.metadata import version as get_version
 
+    click.echo(f"Cobo CLI version: {get_version('cobo-cli')}")
 
-# Add subcommands
-cli.add_command(config)
-cli.add_command(login)
-cli.add_command(logout)
-cli.add_command(keys)
-cli.add_command(app)
-cli.add_command(open)
-cli.add_command(doc)
-cli.add_command(env)
-cli.add_command(logs)
-cli.add_command(auth)
-cli.add_command(skill)
-cli.add_command(webhook)
-
-# Add API commands
-cli.add_command(get_api, name="get")
-cli.add_command(post_api, name="post")
-cli.add_command(put_api, name="put")
-cli.add_command(delete_api, name="delete")
-cli.add_command(graphql, name="graphql")  # Add this line
 
 if __name__ == "__main__":
     cli()
@@ -1,20 +1,28 @@
-from .app import app
-from .auth import auth
-from .config import config
-from .delete import delete_api
-from .doc import doc
-from .env import env
-from .get import get_api
-from .graphql import graphql
-from .keys import keys
-from .login import login
-from .logout import logout
-from .logs import logs
-from .open import open
-from .post import post_api
-from .put import put_api
-from .skill import skill
-from .webhook import webhook
+import importlib
+
+# Command modules are imported lazily (PEP 562) so that importing one command
+# does not drag in the dependencies of all the others.
+_COMMAND_MODULES = {
+    "app": "app",
+    "auth": "auth",
+    "batch": "batch",
+    "config": "config",
+    "delete_api": "delete",
+    "doc": "doc",
+    "env": "env",
+    "get_api": "get",
+    "graphql": "graphql",
+    "keys": "keys",
+    "login": "login",
+    "logout": "logout",
+    "logs": "logs",
+    "open": "open",
+    "post_api": "post",
+    "put_api": "put",
+    "serve": "serve",
+    "skill": "skill",
+    "webhook": "webhook",
+}
 
 __all__ = [
     "config",
@@ -32,6 +40,15 @@ __all__ = [
     "auth",
     "logs",
     "graphql",
+    "batch",
     "skill",
     "webhook",
+    "serve",
 ]
+
+
+def __getattr__(name):
+    if name in _COMMAND_MODULES:
+        module = importlib.import_module(f"{__name__}.{_COMMAND_MODULES[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
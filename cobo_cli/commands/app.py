@@ -3,6 +3,7 @@ import os
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from pathlib import Path
 from typing import Any, Callable, Optional, Union
@@ -19,6 +20,7 @@ from cobo_cli.utils.api import make_request
 from cobo_cli.utils.app import create_sub_project, validate_manifest_and_get_app_id
 from cobo_cli.utils.code_gen import ProcessContext, TemplateCodeGen
 from cobo_cli.utils.config import default_manifest_file
+from cobo_cli.utils.template_sync import LOCK_FILE, TemplateSync, find_locked_projects
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +93,12 @@ def app(ctx: click.Context):
     default=False,
     help="Force overwrite the project directory if it already exists",
 )
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="Use cached templates only, without contacting GitHub",
+)
 @click.pass_context
 def init_app(
     ctx,
@@ -102,6 +110,7 @@ def init_app(
     backend,
     directory,
     force,
+    offline,
 ):
     def prompt(
         text: str,
@@ -217,13 +226,29 @@ def init_app(
     wallet_type = convert_wallet_type(wallet_type)
 
     # Initialize project structure based on type
+    sub_projects = [("backend", backend)]
     if app_type == "mobile":
-        create_sub_project(project_dir, "mobile", app_type, mobile, wallet_type, auth)
-
+        sub_projects.insert(0, ("mobile", mobile))
     elif app_type in ["web", "portal"]:
-        create_sub_project(project_dir, "frontend", app_type, web, wallet_type, auth)
-
-    create_sub_project(project_dir, "backend", app_type, backend, wallet_type, auth)
+        sub_projects.insert(0, ("frontend", web))
+
+    # The sub-projects are independent, so fetch and generate them in parallel.
+    with ThreadPoolExecutor(max_workers=len(sub_projects)) as executor:
+        futures = [
+            executor.submit(
+                create_sub_project,
+                project_dir,
+                sub_dir,
+                app_type,
+                framework,
+                wallet_type,
+                auth,
+                offline,
+            )
+            for sub_dir, framework in sub_projects
+        ]
+        for future in futures:
+            future.result()
 
     # Create a manifest file if the app type is "portal"
     if app_type == "portal":
@@ -342,6 +367,63 @@ def init_app(
     )
 
 
+@app.command(
+    "sync-template",
+    help="Update a project created by `app init` to the latest templates.",
+)
+@click.option(
+    "-d",
+    "--directory",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    default=".",
+    help="Project (or sub-project) directory",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="Use cached templates only, without contacting GitHub",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Show what would change without writing any files",
+)
+@click.pass_context
+def sync_template(ctx: click.Context, directory: str, offline: bool, dry_run: bool):
+    """Re-render changed template files and merge them with local edits."""
+    projects = find_locked_projects(directory)
+    if not projects:
+        raise click.ClickException(
+            f"No {LOCK_FILE} found in {os.path.abspath(directory)} or its "
+            "sub-directories. Only projects created by `cobo app init` can be synced."
+        )
+
+    conflicts = []
+    for project in projects:
+        result = TemplateSync(project, offline=offline, dry_run=dry_run).run()
+        name = os.path.relpath(project, directory)
+        click.echo(f"{name}: {result.summary()}")
+        for label, files in (
+            ("added", result.added),
+            ("updated", result.updated),
+            ("merged", result.merged),
+            ("removed", result.removed),
+            ("kept", result.kept),
+            ("conflict", result.conflicts),
+        ):
+            for file in files:
+                click.echo(f"  {label}: {file}")
+        conflicts.extend(os.path.join(name, file) for file in result.conflicts)
+
+    if conflicts:
+        raise click.ClickException(
+            f"{len(conflicts)} file(s) have conflicting changes; resolve the "
+            "conflict markers in them."
+        )
+
+
 @app.command(
     "run",
     help="Run a Cobo application.",
@@ -0,0 +1,235 @@
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import click
+
+from cobo_cli.data.context import CommandContext
+from cobo_cli.utils.api import load_api_spec, make_request, validate_parameters
+from cobo_cli.utils.openapi import match_route
+
+BATCH_METHODS = {"GET", "POST", "PUT", "DELETE"}
+
+
+class BatchRecordError(Exception):
+    """A batch record that cannot be executed."""
+
+
+def read_records(file) -> Iterator[Tuple[int, dict]]:
+    """Yield ``(index, record)`` for each non-empty NDJSON line."""
+    index = 0
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            record = BatchRecordError(f"Invalid JSON: {e}")
+        yield index, record
+        index += 1
+
+
+def prepare_record(spec, record) -> dict:
+    """Validate a record against the spec and return ``make_request`` kwargs."""
+    if isinstance(record, BatchRecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise BatchRecordError("Each record must be a JSON object.")
+
+    method = str(record.get("method", "GET")).upper()
+    path = record.get("path")
+    if method not in BATCH_METHODS:
+        raise BatchRecordError(f"Unsupported method: {method}")
+    if not path:
+        raise BatchRecordError("Missing 'path'.")
+
+    profile = record.get("profile")
+    if profile is not None and not isinstance(profile, str):
+        raise BatchRecordError("'profile' must be a string.")
+
+    params = record.get("params") or {}
+    body = record.get("body") or {}
+    if method in ("GET", "DELETE"):
+        payload = params
+    else:
+        payload = body or params
+
+    try:
+        _, matched_path, path_params = match_route(spec, path, method)
+        is_valid, error_message = validate_parameters(spec, path, method, payload)
+    except click.ClickException as e:
+        raise BatchRecordError(e.format_message())
+    if not is_valid:
+        raise BatchRecordError(error_message)
+
+    request_kwargs = {"path_params": path_params}
+    if method in ("GET", "DELETE"):
+        request_kwargs["params"] = payload
+    else:
+        request_kwargs["json"] = payload or None
+    return {
+        "method": method,
+        "path": matched_path,
+        "profile": profile,
+        **request_kwargs,
+    }
+
+
+class BatchRunner:
+    """Execute prepared records over a bounded thread pool.
+
+    At most ``concurrency`` requests run at once overall and at most
+    ``per_host`` against any single API host. Only a bounded window of
+    records is in flight, so arbitrarily large inputs run in constant memory.
+    Records may name a ``profile`` whose credentials sign their request.
+    """
+
+    def __init__(self, ctx: click.Context, concurrency: int, per_host: int):
+        self.ctx = ctx
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self._host_limits: Dict[str, threading.Semaphore] = {}
+        self._profile_contexts: Dict[str, click.Context] = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def _profile_context(self, profile: Optional[str]) -> click.Context:
+        if not profile:
+            return self.ctx
+        with self._lock:
+            if profile not in self._profile_contexts:
+                command_context: CommandContext = self.ctx.obj
+                self._profile_contexts[profile] = click.Context(
+                    self.ctx.command,
+                    parent=self.ctx,
+                    obj=command_context.for_profile(profile),
+                )
+            return self._profile_contexts[profile]
+
+    def execute(self, index: int, record, spec) -> dict:
+        result = {"index": index}
+        if isinstance(record, dict) and "id" in record:
+            result["id"] = record["id"]
+        try:
+            request = prepare_record(spec, record)
+            ctx = self._profile_context(request.pop("profile"))
+        except BatchRecordError as e:
+            result["error"] = str(e)
+            return result
+        except click.ClickException as e:
+            result["error"] = e.format_message()
+            return result
+
+        command_context: CommandContext = ctx.obj
+        host = urlparse(command_context.config_manager.get_config("api_host")).netloc
+        method = request.pop("method")
+        path = request.pop("path")
+        result.update(method=method, path=record["path"])
+        with self._host_limit(host):
+            started = time.perf_counter()
+            try:
+                response = make_request(ctx, method, path, echo=False, **request)
+            except Exception as e:
+                result["error"] = str(e)
+                return result
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        result["status"] = response.status_code
+        try:
+            result["body"] = response.json()
+        except ValueError:
+            result["body"] = response.text
+        return result
+
+    def run(self, records, spec, ordered: bool = False) -> Iterator[dict]:
+        """Yield results in completion order, or input order if ``ordered``."""
+        window = self.concurrency * 4
+        buffered: Dict[int, dict] = {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = set()
+            records = iter(records)
+            exhausted = False
+            while pending or not exhausted:
+                # Buffered results count too: while the head record is slow,
+                # nothing can be emitted, so stop reading more input.
+                while not exhausted and len(pending) + len(buffered) < window:
+                    try:
+                        index, record = next(records)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(self.execute, index, record, spec))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if not ordered:
+                        yield result
+                        continue
+                    buffered[result["index"]] = result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+
+
+@click.command(
+    "batch",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+    help="Execute API requests from an NDJSON file (or stdin) concurrently.",
+)
+@click.argument("file", type=click.File("r"), default="-")
+@click.option(
+    "-c",
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Maximum number of requests in flight.",
+)
+@click.option(
+    "--per-host",
+    type=click.IntRange(min=1),
+    help="Maximum number of requests in flight per API host. Defaults to --concurrency.",
+)
+@click.option(
+    "--ordered",
+    is_flag=True,
+    help="Emit results in input order instead of completion order.",
+)
+@click.pass_context
+def batch(ctx: click.Context, file, concurrency: int, per_host: int, ordered: bool):
+    """Execute API requests from an NDJSON file (or stdin) concurrently.
+
+    Each input line is a JSON object such as
+    {"id": "w1", "method": "GET", "path": "/wallets/123", "params": {}}
+    or {"method": "POST", "path": "/wallets", "body": {...}}, optionally
+    with a "profile" whose credentials to use for that record. One JSON
+    result per record, with its status, latency_ms and body (or error),
+    is written to stdout.
+    """
+    command_context: CommandContext = ctx.obj
+    spec = command_context.api_spec or load_api_spec()
+    runner = BatchRunner(ctx, concurrency, per_host or concurrency)
+
+    failed = False
+    for result in runner.run(read_records(file), spec, ordered=ordered):
+        failed = failed or "error" in result or result.get("status", 0) >= 400
+        click.echo(json.dumps(result))
+
+    if failed:
+        ctx.exit(1)
+
+
+if __name__ == "__main__":
+    batch()
@@ -42,7 +42,7 @@ def get_config(ctx: click.Context, key: str):
     """Get a configuration value."""
     command_context: CommandContext = ctx.obj
     config_manager = command_context.config_manager
-    value = config_manager.get_config(key)
+    value = config_manager.get_raw_config(key)
     if value is not None:
         click.echo(f"{key}: {value}")
     else:
@@ -63,6 +63,21 @@ def list_config(ctx: click.Context):
         click.echo("No configurations found")
 
 
+@config.command("profiles")
+@click.pass_context
+def list_profiles(ctx: click.Context):
+    """List the profiles defined in the configuration file."""
+    command_context: CommandContext = ctx.obj
+    config_manager = command_context.config_manager
+    profiles = config_manager.list_profiles()
+    if profiles:
+        for profile in profiles:
+            marker = "*" if profile == config_manager.profile else " "
+            click.echo(f"{marker} {profile}")
+    else:
+        click.echo("No profiles found")
+
+
 @config.command("delete")
 @click.argument("key", type=str)
 @click.pass_context
@@ -1,11 +1,21 @@
 import json
 import threading
+import time
+from typing import Optional
 
 import click
-import websocket
 
 from cobo_cli.data.context import CommandContext
-from cobo_cli.utils.ws import generate_ws_apikey_auth_headers
+from cobo_cli.utils.api import load_api_spec
+from cobo_cli.utils.log_filter import LogFilter, LogRecord, filter_option_callback
+from cobo_cli.utils.log_stats import (
+    GROUP_BY_FIELDS,
+    LogStats,
+    format_stats_table,
+    route_template_normalizer,
+)
+from cobo_cli.utils.openapi import get_route_index
+from cobo_cli.utils.ws import WebSocketSession, generate_ws_apikey_auth_headers
 
 
 @click.group("logs", help="Commands related to log operations.")
@@ -19,6 +29,22 @@ def logs():
 @click.option("--status-code", type=str, help="Filter logs by status code.")
 @click.option("--api-key", type=str, help="Filter logs by API key.")
 @click.option("--ip-address", type=str, help="Filter logs by IP address.")
+@click.option(
+    "--filter",
+    "log_filter",
+    multiple=True,
+    callback=filter_option_callback,
+    help="Filter expression, e.g. 'status >= 500 and path ~ \"/v2/wallets/*\"'. "
+    "Can be repeated; all expressions must match.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Choice(["detail", "compact"]),
+    default="detail",
+    show_default=True,
+    help="Print each log in full, or as a single line.",
+)
 @click.pass_context
 def tail(
     ctx: click.Context,
@@ -27,6 +53,8 @@ def tail(
     status_code: str,
     api_key: str,
     ip_address: str,
+    log_filter: Optional[LogFilter],
+    output: str,
 ):
     """Tail the request logs from Cobo."""
     command_context: CommandContext = ctx.obj
@@ -38,62 +66,181 @@ def tail(
         "ip_address": ip_address,
     }
 
+    print_log = print_log_line if output == "compact" else print_log_detail
+
+    def on_event(api_log):
+        api_log = LogRecord(api_log)
+        if log_filter and not log_filter(api_log):
+            return
+        try:
+            print_log(api_log)
+        except Exception:
+            pass
+
+    session = open_log_stream(command_context, params, log_filter, on_event)
+    click.echo("Listening for api logs")
+    run_log_stream(session)
+
+
+@logs.command(
+    "stats", help="Show live request rate, error rate and latency of API logs."
+)
+@click.option(
+    "--filter",
+    "log_filter",
+    multiple=True,
+    callback=filter_option_callback,
+    help="Only count logs matching this filter expression (see 'logs tail').",
+)
+@click.option(
+    "--group-by",
+    default="method,endpoint",
+    show_default=True,
+    help=f"Comma-separated fields to group by: {', '.join(GROUP_BY_FIELDS)}.",
+)
+@click.option(
+    "--window",
+    type=click.FloatRange(min=1),
+    default=60,
+    show_default=True,
+    help="Sliding window in seconds.",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.1),
+    default=2,
+    show_default=True,
+    help="Seconds between refreshes.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "json"]),
+    default="table",
+    show_default=True,
+    help="Redraw a table, or print one JSON snapshot per line.",
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+    help="Number of groups to show in the table.",
+)
+@click.option(
+    "--raw-paths",
+    is_flag=True,
+    help="Group by concrete endpoints instead of OpenAPI path templates.",
+)
+@click.pass_context
+def stats(
+    ctx: click.Context,
+    log_filter: Optional[LogFilter],
+    group_by: str,
+    window: float,
+    interval: float,
+    output_format: str,
+    top: int,
+    raw_paths: bool,
+):
+    """Show live request rate, error rate and latency of API logs."""
+    command_context: CommandContext = ctx.obj
+    fields = tuple(field.strip() for field in group_by.split(",") if field.strip())
+    unknown = set(fields) - set(GROUP_BY_FIELDS)
+    if unknown or not fields:
+        raise click.BadParameter(
+            f"Unknown field(s): {', '.join(sorted(unknown))}", param_hint="--group-by"
+        )
+
+    normalize_path = None
+    if "endpoint" in fields and not raw_paths:
+        spec = command_context.api_spec or load_api_spec()
+        normalize_path = route_template_normalizer(get_route_index(spec))
+    log_stats = LogStats(fields, window=window, normalize_path=normalize_path)
+
+    def on_event(api_log):
+        api_log = LogRecord(api_log)
+        if not log_filter or log_filter(api_log):
+            log_stats.add(api_log)
+
+    def render():
+        rows = log_stats.snapshot()
+        if output_format == "json":
+            click.echo(json.dumps({"time": time.time(), "groups": rows}))
+            return
+        click.clear()
+        click.echo(
+            f"API logs over the last {window:g}s "
+            f"(latency percentiles in ms, refreshed every {interval:g}s)\n"
+        )
+        click.echo(format_stats_table(rows[:top], fields))
+
+    session = open_log_stream(command_context, {}, log_filter, on_event)
+    run_log_stream(session, on_tick=render, interval=interval)
+
+
+def open_log_stream(command_context, params, log_filter, on_event):
+    """Subscribe to the API log stream, pushing filters to the server."""
+    params = dict(params)
+    if log_filter:
+        # Let the server drop what the filter is bound to reject anyway.
+        for name, value in log_filter.server_params().items():
+            if params.get(name) is None:
+                params[name] = value
+
     # Construct WebSocket URL
     base_url = command_context.config_manager.get_config("websocket_host")
     ws_endpoint = "/v2/api_logs/stream/"
     ws_url = f"{base_url}{ws_endpoint}"
 
-    def on_message(ws, message):
-        data = json.loads(message)
-        api_log = data.get("message", {}).get("message", {})
-        if api_log:
-            try:
-                print_log_detail(api_log)
-            except Exception:
-                pass
-
-    def on_error(ws, error):
-        click.echo(f"WebSocket error: {str(error)}")
-
-    def on_close(ws, close_status_code, close_msg):
-        click.echo("WebSocket connection closed")
-
-    def on_open(ws):
-        click.echo("WebSocket connection established")
-        ws.send(
-            json.dumps(
-                {
-                    "type": "subscribe",
-                    "action": "api_logs_fetch",
-                    "message": params,
-                }
-            )
-        )
-
     api_secret = command_context.config_manager.get_config("api_secret")
-    headers = generate_ws_apikey_auth_headers(api_secret, ws_endpoint)
-    ws = websocket.WebSocketApp(
+    return WebSocketSession(
         ws_url,
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close,
-        header=headers,
+        headers_factory=lambda: generate_ws_apikey_auth_headers(
+            api_secret, ws_endpoint
+        ),
+        subscription={
+            "type": "subscribe",
+            "action": "api_logs_fetch",
+            "message": params,
+        },
+        on_event=on_event,
+        event_id=lambda api_log: api_log.get("api_request_uuid"),
     )
 
-    click.echo("Listening for api logs")
-    wst = threading.Thread(target=ws.run_forever)
+
+def run_log_stream(session, on_tick=None, interval=None):
+    """Run ``session`` until interrupted, calling ``on_tick`` periodically."""
+    wst = threading.Thread(target=session.run)
     wst.daemon = True
     wst.start()
 
     try:
-        wst.join()
+        while wst.is_alive():
+            wst.join(interval)
+            if on_tick and wst.is_alive():
+                on_tick()
     except KeyboardInterrupt:
         click.echo("Stopping api log listener...")
-        ws.close()
+        session.close()
+
+
+def print_log_line(log_detail):
+    fields = [
+        log_detail.get("time", "-"),
+        log_detail.get("api_method", "-"),
+        log_detail.get("status", "-"),
+        log_detail.get("api_endpoint", "-"),
+        log_detail.get("ip_address", "-"),
+        log_detail.get("api_request_uuid", "-"),
+    ]
+    click.echo(" ".join(str(field) for field in fields))
 
 
 def print_log_detail(log_detail):
+    if not isinstance(log_detail, LogRecord):
+        log_detail = LogRecord(log_detail)
+
     click.echo("=" * 50)
     click.echo(click.style("API Log Details", fg="cyan", bold=True))
     click.echo("=" * 50)
@@ -109,13 +256,13 @@ def print_log_detail(log_detail):
     click.echo(click.style("API Key:", fg="yellow") + f" {log_detail['api_key']}")
 
     click.echo("\n" + click.style("Query Parameters:", fg="green", bold=True))
-    click.echo(json.dumps(json.loads(log_detail.get("query_params", "{}")), indent=2))
+    click.echo(json.dumps(log_detail.body("query_params"), indent=2))
 
     click.echo("\n" + click.style("Request Body:", fg="green", bold=True))
-    click.echo(json.dumps(json.loads(log_detail.get("request_body", "{}")), indent=2))
+    click.echo(json.dumps(log_detail.body("request_body"), indent=2))
 
     click.echo("\n" + click.style("Response Body:", fg="green", bold=True))
-    click.echo(json.dumps(json.loads(log_detail["response_body"]), indent=2))
+    click.echo(json.dumps(log_detail.body("response_body"), indent=2))
 
     click.echo("=" * 50)
 
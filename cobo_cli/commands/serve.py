@@ -0,0 +1,78 @@
+import os
+import time
+
+import click
+
+from cobo_cli.utils.config import get_config_path
+from cobo_cli.utils.daemon_client import daemon_supported, get_socket_path, send_control
+
+
+@click.command(
+    "serve",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+    help="Run a background daemon that keeps the CLI warm. While it runs, "
+    "cobo commands are executed by the daemon instead of starting from scratch.",
+)
+@click.option(
+    "--idle-timeout",
+    type=click.IntRange(min=0),
+    default=15 * 60,
+    show_default=True,
+    help="Exit after this many seconds without commands (0 to never exit).",
+)
+@click.option(
+    "--foreground", is_flag=True, help="Run in the foreground instead of detaching."
+)
+@click.option("--stop", is_flag=True, help="Stop the running daemon.")
+@click.option("--status", is_flag=True, help="Show the status of the running daemon.")
+def serve(idle_timeout: int, foreground: bool, stop: bool, status: bool):
+    """Start, stop or inspect the cobo daemon."""
+    if not daemon_supported() or not hasattr(os, "fork"):
+        raise click.ClickException("cobo serve is not supported on this platform.")
+
+    if stop:
+        if send_control("stop") is None:
+            raise click.ClickException("No cobo daemon is running.")
+        click.echo("Daemon stopped.")
+        return
+
+    running = send_control("status")
+    if status:
+        if running is None:
+            raise click.ClickException("No cobo daemon is running.")
+        for key, value in running.items():
+            click.echo(f"{key}: {value}")
+        return
+    if running is not None:
+        raise click.ClickException(
+            f"A cobo daemon is already running (pid {running.get('pid')})."
+        )
+
+    from cobo_cli.utils.daemon import DaemonServer, daemonize
+
+    server = DaemonServer(idle_timeout=idle_timeout)
+    try:
+        server.bind()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    if foreground:
+        click.echo(f"Listening on {server.socket_path}")
+        server.serve_forever()
+        return
+
+    log_file = os.path.join(get_config_path(), "run", "daemon.log")
+    if daemonize(log_file):
+        try:
+            server.serve_forever()
+        finally:
+            os._exit(0)
+
+    # The socket is bound already; wait until the daemon has preloaded.
+    server.close(unlink=False)
+    deadline = time.monotonic() + 30
+    while send_control("status") is None:
+        if time.monotonic() > deadline:
+            raise click.ClickException(f"The daemon did not start, see {log_file}")
+        time.sleep(0.1)
+    click.echo(f"Daemon started, listening on {get_socket_path()}")
@@ -1,13 +1,24 @@
 import json
 import threading
+import time
 
 import click
-import requests
-import websocket
 
 from cobo_cli.data.context import CommandContext
 from cobo_cli.utils.api import load_api_spec, make_request
-from cobo_cli.utils.ws import generate_ws_apikey_auth_headers
+from cobo_cli.utils.forwarder import OVERFLOW_MODES, EventForwarder
+from cobo_cli.utils.journal import (
+    DEFAULT_SEGMENT_SIZE,
+    JOURNAL_COMPRESSIONS,
+    EventJournal,
+    iter_journal,
+    pace,
+)
+from cobo_cli.utils.ws import (
+    WebSocketSession,
+    extract_stream_message,
+    generate_ws_apikey_auth_headers,
+)
 
 
 @click.group("webhook", help="Commands related to webhook operations.")
@@ -88,8 +99,74 @@ def list_events(ctx):
 @webhook.command("listen", help="Listen for webhook events using WebSocket.")
 @click.option("--events", help="Comma-separated list of event types to listen for.")
 @click.option("--forward", help="URL to forward events to.")
+@click.option(
+    "--forward-concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Number of concurrent requests to the forward URL.",
+)
+@click.option(
+    "--forward-queue-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Maximum number of events buffered in memory for forwarding.",
+)
+@click.option(
+    "--forward-retries",
+    type=click.IntRange(min=0),
+    default=3,
+    show_default=True,
+    help="Retries per event when the forward URL fails.",
+)
+@click.option(
+    "--overflow",
+    type=click.Choice(OVERFLOW_MODES),
+    default="spill",
+    show_default=True,
+    help="What to do when the forward queue is full: spill events to a "
+    "temporary file, drop them, or block the listener.",
+)
+@click.option(
+    "--stats-interval",
+    type=click.FloatRange(min=0),
+    default=0,
+    help="Print forwarding statistics to stderr every N seconds.",
+)
+@click.option(
+    "--journal",
+    type=click.Path(file_okay=False),
+    help="Append every received event to a journal in this directory.",
+)
+@click.option(
+    "--journal-segment-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_SEGMENT_SIZE // (1024 * 1024),
+    show_default=True,
+    help="Rotate journal segments after this many MiB.",
+)
+@click.option(
+    "--journal-compression",
+    type=click.Choice(JOURNAL_COMPRESSIONS),
+    default="none",
+    show_default=True,
+    help="Compression for journal segments (zstd needs the zstandard package).",
+)
 @click.pass_context
-def listen(ctx, events, forward):
+def listen(
+    ctx,
+    events,
+    forward,
+    forward_concurrency,
+    forward_queue_size,
+    forward_retries,
+    overflow,
+    stats_interval,
+    journal,
+    journal_segment_size,
+    journal_compression,
+):
     command_context: CommandContext = ctx.obj
     spec = command_context.api_spec or load_api_spec()
 
@@ -106,63 +183,177 @@ def listen(ctx, events, forward):
 
     # Construct WebSocket URL
     base_url = command_context.config_manager.get_config("websocket_host")
-    ws_url = f"{base_url}/v2/webhooks/events/stream/"
+    ws_endpoint = "/v2/webhooks/events/stream/"
+    ws_url = f"{base_url}{ws_endpoint}"
 
-    def on_message(ws, message):
-        event = json.loads(message)
-        event_data = event.get("message", {}).get("message", {})
-        if not event_data:
-            event_data = event
-        click.echo(json.dumps(event_data, indent=2))
-        if forward:
-            try:
-                requests.post(forward, json=event_data)
-            except requests.RequestException as e:
-                click.echo(f"Error forwarding event: {str(e)}")
-
-    def on_error(ws, error):
-        click.echo(f"WebSocket error: {str(error)}")
-
-    def on_close(ws, close_status_code, close_msg):
-        click.echo("WebSocket connection closed")
-
-    def on_open(ws):
-        click.echo("WebSocket connection established")
-        ws.send(
-            json.dumps(
-                {
-                    "type": "subscribe",
-                    "action": "webhook_event_fetch",
-                    "message": {"event_type": event_list},
-                }
-            )
+    forwarder = None
+    if forward:
+        forwarder = EventForwarder(
+            forward,
+            concurrency=forward_concurrency,
+            queue_size=forward_queue_size,
+            max_retries=forward_retries,
+            overflow=overflow,
+        ).start()
+
+    event_journal = None
+    if journal:
+        event_journal = EventJournal(
+            journal,
+            segment_size=journal_segment_size * 1024 * 1024,
+            compression=journal_compression,
         )
+        click.echo(f"Journaling events to: {journal}")
+
+    def on_event(event_data):
+        click.echo(json.dumps(event_data, indent=2))
+        if event_journal:
+            event_journal.append(event_data)
+        if forwarder:
+            forwarder.submit(event_data)
 
     api_secret = command_context.config_manager.get_config("api_secret")
-    headers = generate_ws_apikey_auth_headers(api_secret, "/v2/webhooks/events/stream/")
-    # websocket.enableTrace(True)
-    ws = websocket.WebSocketApp(
+    session = WebSocketSession(
         ws_url,
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close,
-        header=headers,
+        headers_factory=lambda: generate_ws_apikey_auth_headers(
+            api_secret, ws_endpoint
+        ),
+        subscription={
+            "type": "subscribe",
+            "action": "webhook_event_fetch",
+            "message": {"event_type": event_list},
+        },
+        on_event=on_event,
+        extract_event=lambda message: extract_stream_message(message) or message,
+        event_id=lambda event_data: event_data.get("event_id"),
     )
 
     click.echo(f"Listening for events: {', '.join(event_list)}")
     if forward:
         click.echo(f"Forwarding events to: {forward}")
 
-    wst = threading.Thread(target=ws.run_forever)
+    # Thread.is_alive()/join() are unreliable after a KeyboardInterrupt
+    # lands inside join(), so the thread signals when it is done instead.
+    finished = threading.Event()
+
+    def run_session():
+        try:
+            session.run()
+        finally:
+            finished.set()
+
+    wst = threading.Thread(target=run_session)
     wst.daemon = True
-    wst.start()
 
     try:
-        wst.join()
+        wst.start()
+        while not finished.wait(stats_interval or None):
+            if forwarder and stats_interval:
+                click.echo(json.dumps(forwarder.snapshot()), err=True)
     except KeyboardInterrupt:
         click.echo("Stopping webhook listener...")
-        ws.close()
+    finally:
+        # The session thread calls on_event; stop it before closing the
+        # journal and forwarder it writes to.
+        session.close()
+        if wst.ident is not None:
+            finished.wait(10)
+        if event_journal:
+            event_journal.close()
+        if forwarder:
+            forwarder.close(timeout=10)
+            click.echo(f"Forwarding stats: {json.dumps(forwarder.snapshot())}")
+
+
+@webhook.command(
+    "replay", help="Re-forward journaled webhook events, optionally faster."
+)
+@click.option(
+    "--journal",
+    type=click.Path(exists=True, file_okay=False),
+    required=True,
+    help="Journal directory written by 'cobo webhook listen --journal'.",
+)
+@click.option("--forward", required=True, help="URL to forward events to.")
+@click.option("--from-offset", type=click.IntRange(min=0), help="First offset.")
+@click.option("--to-offset", type=click.IntRange(min=0), help="Last offset.")
+@click.option("--since", type=click.DateTime(), help="Only events received after.")
+@click.option("--until", type=click.DateTime(), help="Only events received before.")
+@click.option(
+    "--speed",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    show_default=True,
+    help="Replay the original timing this many times faster; 0 for no delays.",
+)
+@click.option(
+    "--rate",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Replay at a fixed number of events per second instead.",
+)
+@click.option(
+    "--forward-concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Number of concurrent requests to the forward URL.",
+)
+@click.option(
+    "--forward-retries",
+    type=click.IntRange(min=0),
+    default=3,
+    show_default=True,
+    help="Retries per event when the forward URL fails.",
+)
+def replay(
+    journal,
+    forward,
+    from_offset,
+    to_offset,
+    since,
+    until,
+    speed,
+    rate,
+    forward_concurrency,
+    forward_retries,
+):
+    records = iter_journal(
+        journal,
+        start_offset=from_offset,
+        end_offset=to_offset,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+    )
+    # Block rather than spill so that the requested pace is what the
+    # receiver actually sees.
+    forwarder = EventForwarder(
+        forward,
+        concurrency=forward_concurrency,
+        queue_size=forward_concurrency * 2,
+        max_retries=forward_retries,
+        overflow="block",
+    ).start()
+
+    started = time.monotonic()
+    count = 0
+    try:
+        for record in pace(records, speed=speed, rate=rate):
+            forwarder.submit(record["event"])
+            count += 1
+    except KeyboardInterrupt:
+        click.echo("Stopping replay...")
+    finally:
+        forwarder.close()
+    elapsed = time.monotonic() - started
+
+    stats = forwarder.snapshot()
+    click.echo(
+        f"Replayed {count} events in {elapsed:.2f}s "
+        f"({count / elapsed if elapsed else 0:.1f} events/s)"
+    )
+    click.echo(f"Forwarding stats: {json.dumps(stats)}")
+    if stats["failed"]:
+        raise click.ClickException(f"{stats['failed']} events failed to forward")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,8 @@
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import click
 
 from cobo_cli.data.auth_methods import AuthMethodType
 from cobo_cli.data.environments import EnvironmentType
@@ -11,3 +15,77 @@ class CommandContext:
     auth_method: AuthMethodType
     config_manager: ConfigManager
     api_spec: dict = None
+    _http_options: Optional[Any] = field(default=None, init=False, repr=False)
+    _http_session: Optional[Any] = field(default=None, init=False, repr=False)
+    _rate_limiter: Optional[Any] = field(default=None, init=False, repr=False)
+    _profiles: Dict[str, "CommandContext"] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _profiles_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    @property
+    def http_options(self):
+        """Pool, timeout and retry settings (see ``cobo_cli.utils.http``)."""
+        if self._http_options is None:
+            from cobo_cli.utils.http import HttpOptions
+
+            self._http_options = HttpOptions.from_config(self.config_manager)
+        return self._http_options
+
+    @property
+    def http_session(self):
+        """Connection-pooled session shared by every request of this process."""
+        if self._http_session is None:
+            from cobo_cli.utils.http import get_session
+
+            self._http_session = get_session(self.http_options.pool_size)
+        return self._http_session
+
+    @property
+    def rate_limiter(self):
+        """Request pacing shared with other processes (see ``cobo_cli.utils.rate_limit``)."""
+        if self._rate_limiter is None:
+            from cobo_cli.utils.rate_limit import RateLimiter, RateLimitOptions
+
+            self._rate_limiter = RateLimiter(
+                self.env.value, RateLimitOptions.from_config(self.config_manager)
+            )
+        return self._rate_limiter
+
+    def for_profile(self, profile: Optional[str]) -> "CommandContext":
+        """The context of this command with another profile's credentials.
+
+        The environment override (``-e``) still applies; the authentication
+        method is the profile's own ``auth_method`` if it sets one. Contexts
+        are created once per profile and share this context's HTTP session,
+        so requests across many profiles reuse one connection pool.
+        """
+        if not profile or profile == self.config_manager.profile:
+            return self
+        with self._profiles_lock:
+            context = self._profiles.get(profile)
+            if context is None:
+                config_manager = ConfigManager(
+                    self.config_manager.config_file,
+                    self.config_manager.env_type,
+                    profile,
+                )
+                if not config_manager.has_profile(profile):
+                    raise click.ClickException(f"Unknown profile: {profile}")
+                profile_auth = config_manager.get_profile_config().get("auth_method")
+                context = CommandContext(
+                    env=EnvironmentType(config_manager.load_env_type()),
+                    auth_method=(
+                        AuthMethodType(profile_auth)
+                        if profile_auth
+                        else self.auth_method
+                    ),
+                    config_manager=config_manager,
+                    api_spec=self.api_spec,
+                )
+                context._http_options = self.http_options
+                context._http_session = self.http_session
+                self._profiles[profile] = context
+            return context
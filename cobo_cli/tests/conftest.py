@@ -1,7 +1,28 @@
+import base64
+import hashlib
+import io
+import json
+import socketserver
+import struct
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
 import pytest
+import yaml
 from click.testing import CliRunner
 
 from cobo_cli.cli import cli
+from cobo_cli.utils.template_cache import TEMPLATE_BASE_URL_ENV
+
+
+@pytest.fixture(autouse=True)
+def stop_patches():
+    """Undo ``patch(...).start()`` patches a test leaves active."""
+    yield
+    mock.patch.stopall()
 
 
 @pytest.fixture
@@ -15,3 +36,405 @@ def invoke_cli(cli_runner):
         return cli_runner.invoke(cli, *args, **kwargs)
 
     return _invoke_cli
+
+
+SAMPLE_OPENAPI_SPEC = {
+    "openapi": "3.0.3",
+    "info": {"title": "Sample WaaS API", "version": "1.0.0"},
+    "paths": {
+        "/wallets": {
+            "get": {
+                "description": "List all wallets.",
+                "parameters": [
+                    {"$ref": "#/components/parameters/limit"},
+                    {"$ref": "#/components/parameters/before"},
+                    {"$ref": "#/components/parameters/after"},
+                ],
+                "responses": {
+                    "200": {
+                        "description": "The request was successful.",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "data": {
+                                            "type": "array",
+                                            "items": {
+                                                "$ref": "#/components/schemas/WalletInfo"
+                                            },
+                                        },
+                                        "pagination": {
+                                            "$ref": "#/components/schemas/Pagination"
+                                        },
+                                    },
+                                }
+                            }
+                        },
+                    }
+                },
+            },
+            "post": {
+                "description": "Create a wallet.",
+                "requestBody": {"$ref": "#/components/requestBodies/CreateWallet"},
+                "responses": {"201": {"description": "Created."}},
+            },
+        },
+        "/wallets/{wallet_id}": {
+            "get": {
+                "description": "Get wallet information.",
+                "parameters": [{"$ref": "#/components/parameters/walletId"}],
+                "responses": {
+                    "200": {
+                        "description": "The request was successful.",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/WalletInfo"}
+                            }
+                        },
+                    }
+                },
+            },
+        },
+        "/wallets/tokens": {
+            "get": {
+                "description": "List enabled tokens.",
+                "parameters": [{"$ref": "#/components/parameters/limit"}],
+                "responses": {"200": {"description": "The request was successful."}},
+            }
+        },
+        "/wallets/{wallet_id}/addresses": {
+            "get": {
+                "description": "List wallet addresses.",
+                "parameters": [
+                    {"$ref": "#/components/parameters/walletId"},
+                    {"$ref": "#/components/parameters/limit"},
+                ],
+                "responses": {"200": {"description": "The request was successful."}},
+            }
+        },
+        "/nodes": {
+            "put": {
+                "description": "Replace the node tree.",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Node"}
+                        }
+                    }
+                },
+                "responses": {"200": {"description": "The request was successful."}},
+            }
+        },
+    },
+    "components": {
+        "parameters": {
+            "walletId": {
+                "name": "wallet_id",
+                "in": "path",
+                "required": True,
+                "description": "The wallet ID.",
+                "schema": {"type": "string"},
+            },
+            "limit": {
+                "name": "limit",
+                "in": "query",
+                "description": "The maximum number of objects to return.",
+                "schema": {"type": "integer"},
+            },
+            "before": {
+                "name": "before",
+                "in": "query",
+                "description": "A cursor for the previous page.",
+                "schema": {"type": "string"},
+            },
+            "after": {
+                "name": "after",
+                "in": "query",
+                "description": "A cursor for the next page.",
+                "schema": {"type": "string"},
+            },
+        },
+        "requestBodies": {
+            "CreateWallet": {
+                "content": {
+                    "application/json": {
+                        "schema": {"$ref": "#/components/schemas/CreateWalletParams"}
+                    }
+                }
+            }
+        },
+        "schemas": {
+            "Pagination": {
+                "type": "object",
+                "properties": {
+                    "before": {"type": "string", "description": "Previous cursor."},
+                    "after": {"type": "string", "description": "Next cursor."},
+                    "total_count": {"type": "integer", "description": "Total."},
+                },
+            },
+            "WalletInfo": {
+                "type": "object",
+                "required": ["wallet_id"],
+                "properties": {
+                    "wallet_id": {"type": "string", "description": "The wallet ID."},
+                    "name": {"type": "string", "description": "The wallet name."},
+                },
+            },
+            "CreateWalletParams": {
+                "oneOf": [
+                    {"$ref": "#/components/schemas/CreateCustodialWalletParams"},
+                    {"$ref": "#/components/schemas/CreateMpcWalletParams"},
+                ],
+                "discriminator": {
+                    "propertyName": "wallet_type",
+                    "mapping": {
+                        "Custodial": "#/components/schemas/CreateCustodialWalletParams",
+                        "MPC": "#/components/schemas/CreateMpcWalletParams",
+                    },
+                },
+            },
+            "CreateCustodialWalletParams": {
+                "title": "Custodial",
+                "type": "object",
+                "required": ["wallet_type", "name"],
+                "properties": {
+                    "wallet_type": {"type": "string", "description": "Type."},
+                    "name": {"type": "string", "description": "The wallet name."},
+                },
+            },
+            "CreateMpcWalletParams": {
+                "title": "MPC",
+                "type": "object",
+                "required": ["wallet_type", "name", "vault_id"],
+                "properties": {
+                    "wallet_type": {"type": "string", "description": "Type."},
+                    "name": {"type": "string", "description": "The wallet name."},
+                    "vault_id": {"type": "string", "description": "The vault ID."},
+                },
+            },
+            "Node": {
+                "type": "object",
+                "description": "A recursive tree node.",
+                "properties": {
+                    "name": {"type": "string", "description": "Node name."},
+                    "children": {
+                        "type": "array",
+                        "description": "Child nodes.",
+                        "items": {"$ref": "#/components/schemas/Node"},
+                    },
+                },
+            },
+            "WebhookEventType": {
+                "type": "string",
+                "enum": ["wallets.transaction.created", "wallets.transaction.updated"],
+            },
+        },
+    },
+}
+
+
+@pytest.fixture
+def cobo_home(tmp_path, monkeypatch):
+    """Point ``~/.cobo`` at a temporary directory."""
+    monkeypatch.setattr(Path, "home", classmethod(lambda cls: tmp_path))
+    return tmp_path / ".cobo"
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    path = tmp_path / "openapi.yaml"
+    path.write_text(yaml.safe_dump(SAMPLE_OPENAPI_SPEC))
+    return path
+
+
+@pytest.fixture
+def http_server():
+    """Start local HTTP stand-ins: ``http_server(handler_cls)`` returns a base URL."""
+    servers = []
+
+    def _start(handler_cls):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_archive(root, files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        info = tarfile.TarInfo(root)
+        info.type = tarfile.DIRTYPE
+        tar.addfile(info)
+        for name, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(f"{root}/{name}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class TemplateHost:
+    """Serves ``<repo>/archive/<ref>.tar.gz`` with an ETag, like GitHub."""
+
+    def __init__(self):
+        self.archives = {}
+        # Repo -> bytes sent before the connection is dropped mid-body.
+        self.truncate = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def handler(self):
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with host.lock:
+                    host.requests.append((self.path, self.headers.get("If-None-Match")))
+                repo = self.path.strip("/").split("/")[0]
+                if repo not in host.archives:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = host.archives[repo]
+                etag = f'"{len(body)}-{hash(body) & 0xFFFF:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[: host.truncate.get(repo)])
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def template_host(http_server, monkeypatch, cobo_home):
+    host = TemplateHost()
+    monkeypatch.setenv(TEMPLATE_BASE_URL_ENV, http_server(host.handler()))
+    return host
+
+
+class WebSocketStandIn:
+    """A minimal websocket server for exercising stream clients.
+
+    ``scripts`` holds, per connection, the messages to push after the client
+    subscribes. Every connection but the last is then dropped; the last one
+    stays open until the client closes it.
+    """
+
+    GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+    def __init__(self, scripts):
+        self.scripts = list(scripts)
+        self.handshakes = []
+        self.subscriptions = []
+        self.pings = 0
+        self.server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), self._handler_class()
+        )
+        self.server.daemon_threads = True
+        self.url = f"ws://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                stand_in._serve(self.rfile, self.wfile)
+
+        return Handler
+
+    @staticmethod
+    def _read_frame(rfile):
+        header = rfile.read(2)
+        if len(header) < 2:
+            return None, b""
+        opcode, length = header[0] & 0x0F, header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", rfile.read(8))[0]
+        mask = rfile.read(4) if header[1] & 0x80 else b"\0\0\0\0"
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(rfile.read(length)))
+        return opcode, payload
+
+    @staticmethod
+    def _write_frame(wfile, opcode, payload=b""):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        wfile.write(header + payload)
+        wfile.flush()
+
+    def _serve(self, rfile, wfile):
+        headers = {}
+        rfile.readline()  # Request line
+        for line in iter(rfile.readline, b"\r\n"):
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        self.handshakes.append(headers)
+        accept = base64.b64encode(
+            hashlib.sha1(
+                (headers["sec-websocket-key"] + self.GUID).encode(),
+                usedforsecurity=False,
+            ).digest()
+        ).decode()
+        wfile.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            b"Connection: Upgrade\r\nSec-WebSocket-Accept: "
+            + accept.encode()
+            + b"\r\n\r\n"
+        )
+        wfile.flush()
+
+        script = self.scripts.pop(0) if self.scripts else []
+        keep_open = not self.scripts
+        while True:
+            opcode, payload = self._read_frame(rfile)
+            if opcode is None or opcode == 0x8:
+                if opcode == 0x8:
+                    self._write_frame(wfile, 0x8, payload[:2])
+                return
+            if opcode == 0x9:
+                self.pings += 1
+                self._write_frame(wfile, 0xA, payload)
+            elif opcode == 0x1:
+                self.subscriptions.append(json.loads(payload))
+                for message in script:
+                    self._write_frame(wfile, 0x1, json.dumps(message).encode())
+                if not keep_open:
+                    return  # Drop the connection without a close frame.
+
+
+@pytest.fixture
+def ws_server():
+    """Start a :class:`WebSocketStandIn`: ``ws_server(scripts)``."""
+    stand_ins = []
+
+    def _start(scripts):
+        stand_in = WebSocketStandIn(scripts)
+        threading.Thread(target=stand_in.server.serve_forever, daemon=True).start()
+        stand_ins.append(stand_in)
+        return stand_in
+
+    yield _start
+    for stand_in in stand_ins:
+        stand_in.server.shutdown()
+        stand_in.server.server_close()
@@ -0,0 +1,203 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from cobo_cli.commands.batch import BatchRunner
+from cobo_cli.utils.config import ConfigManager
+
+API_SECRET = "0281d349927d3b4342129aa4d86bd0ed70163feb7b8d06fecc25c667974b6297"
+
+
+class WalletHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        # The first wallet is slow so completion order differs from input order.
+        time.sleep(0.2 if self.path.startswith("/v2/wallets/w0") else 0.02)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        status = 201 if self.command == "POST" else 200
+        payload = json.dumps(
+            {
+                "path": self.path,
+                "body": body,
+                "api_key": self.headers.get("Biz-Api-Key"),
+            }
+        ).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _respond
+
+
+@pytest.fixture
+def batch_config(tmp_path, http_server, cobo_home):
+    WalletHandler.max_in_flight = 0
+    config_file = tmp_path / "config.toml"
+    config_manager = ConfigManager(str(config_file))
+    config_manager.set_config("api_host", http_server(WalletHandler))
+    config_manager.set_config("api_key", "test-key")
+    config_manager.set_config("api_secret", API_SECRET)
+    return str(config_file)
+
+
+def _records(*records):
+    return "\n".join(json.dumps(record) for record in records) + "\n"
+
+
+def test_batch_streams_results(invoke_cli, batch_config, spec_file):
+    records = _records(
+        *[{"id": f"w{i}", "method": "GET", "path": f"/wallets/w{i}"} for i in range(4)],
+        {
+            "method": "POST",
+            "path": "/wallets",
+            "body": {"wallet_type": "Custodial", "name": "new"},
+        },
+    )
+
+    result = invoke_cli(
+        ["--config-file", batch_config, "--spec", str(spec_file), "batch", "-c", "4"],
+        input=records,
+    )
+
+    assert result.exit_code == 0, result.output
+    results = [json.loads(line) for line in result.output.splitlines()]
+    assert len(results) == 5
+    # Completion order: the slow first record comes last.
+    assert results[-1]["id"] == "w0"
+    by_index = {r["index"]: r for r in results}
+    assert by_index[1]["status"] == 200
+    assert by_index[1]["body"]["path"] == "/v2/wallets/w1"
+    assert by_index[4]["status"] == 201
+    assert by_index[4]["body"]["body"] == {"wallet_type": "Custodial", "name": "new"}
+    assert all(r["latency_ms"] > 0 for r in results)
+
+
+def test_batch_ordered_and_per_host_limit(invoke_cli, batch_config, spec_file):
+    records = _records(*[{"method": "GET", "path": f"/wallets/w{i}"} for i in range(6)])
+
+    result = invoke_cli(
+        [
+            "--config-file",
+            batch_config,
+            "--spec",
+            str(spec_file),
+            "batch",
+            "-c",
+            "6",
+            "--per-host",
+            "2",
+            "--ordered",
+        ],
+        input=records,
+    )
+
+    assert result.exit_code == 0, result.output
+    results = [json.loads(line) for line in result.output.splitlines()]
+    assert [r["index"] for r in results] == list(range(6))
+    assert WalletHandler.max_in_flight <= 2
+
+
+def test_batch_reports_invalid_records(invoke_cli, batch_config, spec_file):
+    records = (
+        _records(
+            {"method": "GET", "path": "/unknown"},
+            {"method": "POST", "path": "/wallets", "body": {"colour": "red"}},
+            {"method": "GET", "path": "/wallets/w1"},
+        )
+        + "not json\n"
+    )
+
+    result = invoke_cli(
+        [
+            "--config-file",
+            batch_config,
+            "--spec",
+            str(spec_file),
+            "batch",
+            "--ordered",
+        ],
+        input=records,
+    )
+
+    assert result.exit_code == 1
+    results = [json.loads(line) for line in result.output.splitlines()]
+    assert "not defined" in results[0]["error"]
+    assert "Invalid parameter(s): colour" in results[1]["error"]
+    assert results[2]["status"] == 200
+    assert results[3]["error"].startswith("Invalid JSON")
+
+
+def test_batch_records_use_their_profile(invoke_cli, batch_config, spec_file):
+    for profile in ("org-a", "org-b"):
+        config_manager = ConfigManager(batch_config, profile=profile)
+        config_manager.set_config("api_key", f"{profile}-key")
+        config_manager.set_config("api_secret", API_SECRET)
+    records = _records(
+        *[
+            {"id": f"w{i}", "path": f"/wallets/w{i}", "profile": f"org-{'ab'[i % 2]}"}
+            for i in range(6)
+        ],
+        {"id": "default", "path": "/wallets/w9"},
+        {"id": "typo", "path": "/wallets/w9", "profile": "org-c"},
+    )
+
+    result = invoke_cli(
+        ["--config-file", batch_config, "--spec", str(spec_file), "batch", "--ordered"],
+        input=records,
+    )
+
+    results = {r["id"]: r for r in map(json.loads, result.output.splitlines())}
+    for i in range(6):
+        assert results[f"w{i}"]["body"]["api_key"] == f"org-{'ab'[i % 2]}-key"
+    assert results["default"]["body"]["api_key"] == "test-key"
+    assert results["typo"]["error"] == "Unknown profile: org-c"
+    assert result.exit_code == 1
+
+
+def test_batch_ordered_memory_is_bounded_by_window():
+    head_done = threading.Event()
+
+    class SlowHeadRunner(BatchRunner):
+        def execute(self, index, record, spec):
+            if index == 0:
+                head_done.wait(timeout=10)
+            return {"index": index}
+
+    runner = SlowHeadRunner(None, concurrency=2, per_host=2)
+    window = runner.concurrency * 4
+    emitted = []
+    outstanding = []
+
+    def records():
+        for index in range(100):
+            outstanding.append(index + 1 - len(emitted))
+            if index == 50:
+                head_done.set()
+            yield index, {}
+
+    threading.Timer(0.3, head_done.set).start()
+    for result in runner.run(records(), spec=None, ordered=True):
+        emitted.append(result["index"])
+
+    assert emitted == list(range(100))
+    assert max(outstanding) <= window
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Modules that only specific commands need; none of them may be imported just
+# to start the CLI.
+HEAVY_MODULES = [
+    "requests",
+    "websocket",
+    "nacl",
+    "yaml",
+    "pydantic",
+    "pydantic_settings",
+    "dotenv",
+    "tomli",
+    "git",
+]
+
+# Cumulative import time budget for ``cobo_cli.cli`` in microseconds, as
+# reported by ``python -X importtime``. Eager command imports took ~550ms.
+# It depends on the machine, so it is only checked with COBO_BENCHMARK=1.
+IMPORT_TIME_BUDGET_US = 150_000
+
+
+def _run_python(code, *args):
+    result = subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result
+
+
+def test_import_cli_does_not_import_command_dependencies():
+    code = (
+        "import json, sys\n"
+        "import cobo_cli.cli\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    assert json.loads(_run_python(code).stdout) == []
+
+
+def test_config_get_only_imports_what_it_needs(tmp_path):
+    code = (
+        "import json, sys\n"
+        "from cobo_cli.cli import cli\n"
+        f"cli.main(['--config-file', {str(tmp_path / 'config.toml')!r}, "
+        "'config', 'get', 'environment'], standalone_mode=False)\n"
+        "print(json.dumps([m for m in ['requests', 'websocket', 'nacl', 'yaml'] "
+        "if m in sys.modules]))\n"
+    )
+    output = _run_python(code).stdout.splitlines()
+    assert output[0] == "environment: dev"
+    assert json.loads(output[-1]) == []
+
+
+@pytest.mark.skipif(not os.environ.get("COBO_BENCHMARK"), reason="set COBO_BENCHMARK=1")
+def test_import_cli_within_budget():
+    stderr = _run_python("import cobo_cli.cli", "-X", "importtime").stderr
+    cumulative = {}
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[1].isdigit():
+            cumulative[parts[2]] = int(parts[1])
+    assert cumulative["cobo_cli.cli"] < IMPORT_TIME_BUDGET_US, cumulative
@@ -0,0 +1,151 @@
+import os
+
+import pytest
+
+from cobo_cli.utils.code_gen import (
+    CodeGen,
+    ProcessContext,
+    TemplateCodeGen,
+    compile_template,
+)
+
+CONTEXT = ProcessContext(app_type="portal", wallet_type="custodial-web3", auth="org")
+
+
+@pytest.fixture
+def make_code_gen(tmp_path):
+    def _make(rules_yaml):
+        rules_file = tmp_path / ".code_gen.yaml"
+        rules_file.write_text(rules_yaml)
+        return CodeGen(rules_file)
+
+    return _make
+
+
+def test_should_process_file_first_matching_pattern_wins(make_code_gen):
+    code_gen = make_code_gen("""
+"app/*":
+  - app_type: mobile
+"app/keep.py":
+  - app_type: portal
+"docs/guide.md":
+  - auth: "!org"
+"docs/*":
+  - auth: org
+""")
+    # The wildcard comes first, so it decides for app/keep.py too.
+    assert not code_gen.should_process_file("app/keep.py", CONTEXT)
+    assert not code_gen.should_process_file("app/nested/deep/file.py", CONTEXT)
+    assert not code_gen.should_process_file("docs/guide.md", CONTEXT)
+    assert code_gen.should_process_file("docs/other.md", CONTEXT)
+    assert code_gen.should_process_file("application/file.py", CONTEXT)
+    assert code_gen.should_process_file("app", CONTEXT)
+
+
+def test_should_process_file_directory_patterns(make_code_gen):
+    code_gen = make_code_gen("""
+"mobile/":
+  - app_type: mobile
+""")
+    assert not code_gen.should_process_file("mobile/", CONTEXT)
+    assert code_gen.should_process_file("./web/index.js", CONTEXT)
+    mobile_context = CONTEXT.model_copy(update={"app_type": "mobile"})
+    assert code_gen.should_process_file("mobile/", mobile_context)
+    assert not code_gen.should_process_file("mobile", CONTEXT)
+
+
+def write_tree(root, files):
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content if isinstance(content, bytes) else content.encode())
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_process_directory(tmp_path, max_workers):
+    rules_file = tmp_path / ".code_gen.yaml"
+    rules_file.write_text('"app/":\n  - app_type: mobile\n')
+    project = tmp_path / "project"
+    write_tree(
+        project,
+        {
+            "app/main.py": "removed\n",
+            "application/main.py": "# %if auth == org\norg = True\n# %endif\n",
+            "plain.py": "# 100% plain\r\nvalue = 1\r\n",
+            "image.png": b"\x89PNG\xff%if",
+            **{
+                f"pkg/module{i}.py": "# %if app_type == mobile\nmobile\n# %endif\nx\n"
+                for i in range(20)
+            },
+        },
+    )
+    TemplateCodeGen(rules_file, max_workers=max_workers).process(project, CONTEXT)
+
+    assert not (project / "app").exists()
+    # Only the removed directory itself is skipped, not its namesakes.
+    assert (project / "application" / "main.py").read_text() == "org = True\n"
+    # Files without directives are left byte for byte.
+    assert (project / "plain.py").read_bytes() == b"# 100% plain\r\nvalue = 1\r\n"
+    assert (project / "image.png").read_bytes() == b"\x89PNG\xff%if"
+    for i in range(20):
+        assert (project / "pkg" / f"module{i}.py").read_text() == "x\n"
+
+
+def test_process_file_skips_unchanged_rewrite(tmp_path):
+    path = tmp_path / "main.py"
+    # Mentions the marker, but has no directive lines.
+    path.write_text('MARKER = "%if"\n')
+    os.utime(path, ns=(0, 0))
+    TemplateCodeGen().process(path, CONTEXT)
+    assert path.read_text() == 'MARKER = "%if"\n'
+    assert path.stat().st_mtime_ns == 0
+
+
+BRANCHES = """\
+# %if app_type == portal
+portal
+# %elif app_type == web
+web
+# %elif auth == org
+org
+# %else
+other
+# %endif
+end"""
+
+
+@pytest.mark.parametrize(
+    "app_type, expected",
+    [("portal", "portal\nend"), ("web", "web\nend"), ("mobile", "org\nend")],
+)
+def test_process_template_takes_first_matching_branch(app_type, expected):
+    context = CONTEXT.model_copy(update={"app_type": app_type})
+    assert TemplateCodeGen().process_template(BRANCHES, context) == expected
+
+    context = context.model_copy(update={"app_type": "mobile", "auth": "user"})
+    assert TemplateCodeGen().process_template(BRANCHES, context) == "other\nend"
+
+
+def test_process_template_comment_styles():
+    template = """\
+{/* %if wallet_type not in [mpc-org-controlled, mpc-user-controlled] */}
+<Custodial />
+{/* %endif */}
+  // %if auth != org
+  useApiKey();
+  // %endif
+#%if app_type in [portal, web]
+# 100% of portal and web apps
+#%endif
+{/* %if is not a directive without the closing brace"""
+    assert TemplateCodeGen().process_template(template, CONTEXT) == (
+        "<Custodial />\n"
+        "# 100% of portal and web apps\n"
+        "{/* %if is not a directive without the closing brace"
+    )
+
+
+def test_compile_template_is_cached_by_content():
+    template = "# %if auth == org\norg\n# %endif\n"
+    assert compile_template(template) is compile_template(template[:-1] + "\n")
+    assert compile_template(template) is not compile_template(template + "\n")
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+
+import pytest
+import tomli
+
+from cobo_cli.utils.config import ConfigManager
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    return str(tmp_path / "config.toml")
+
+
+def test_parse_is_cached_until_the_file_changes(config_file, mocker):
+    ConfigManager(config_file)
+    load = mocker.patch("cobo_cli.utils.config.tomli.load", wraps=tomli.load)
+    first = ConfigManager(config_file)
+    assert load.call_count == 0
+
+    # Instances don't share the cached data.
+    first.config_data["common"]["environment"] = "prod"
+    assert ConfigManager(config_file).get_config("environment") == "dev"
+
+    with open(config_file, "a") as f:
+        f.write('\n[extra]\nkey = "value"\n')
+    assert ConfigManager(config_file).config_data["extra"] == {"key": "value"}
+    assert load.call_count == 1
+
+
+def test_settings_are_validated_on_first_read(config_file):
+    with open(config_file, "w") as f:
+        f.write('[common]\nenvironment = "nowhere"\nauth_method = "apikey"\n')
+    config_manager = ConfigManager(config_file)
+    with pytest.raises(ValueError, match="Environment must be one of"):
+        config_manager.get_config("environment")
+
+
+def test_set_and_delete_config_rewrite_atomically(config_file):
+    config_manager = ConfigManager(config_file)
+    config_manager.set_config("api_key", "key")
+    other = ConfigManager(config_file)
+    # ``other`` has not seen the change; it must not undo it.
+    other.set_config("api_secret", "secret")
+
+    config_manager = ConfigManager(config_file)
+    assert config_manager.get_config("api_key") == "key"
+    assert config_manager.get_config("api_secret") == "secret"
+    assert config_manager.delete_config("api_key")
+    assert ConfigManager(config_file).get_config("api_key") is None
+    assert sorted(os.listdir(os.path.dirname(config_file))) == [
+        "config.toml",
+        "config.toml.lock",
+    ]
+
+
+def _set_many(config_file, worker):
+    for i in range(10):
+        ConfigManager(config_file).set_config(f"key_{worker}_{i}", str(i))
+
+
+def test_concurrent_writers_do_not_lose_updates(config_file):
+    ConfigManager(config_file)
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_set_many, args=(config_file, n)) for n in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    config_manager = ConfigManager(config_file)
+    for n in range(4):
+        for i in range(10):
+            assert config_manager.get_config(f"key_{n}_{i}") == str(i)
+
+
+PROFILES = """
+[common]
+auth_method = "apikey"
+environment = "dev"
+
+[dev]
+api_host = "https://api.dev.cobo.com"
+api_key = "dev-key"
+
+[sandbox]
+api_host = "https://api.sandbox.cobo.com"
+
+[profiles.ci]
+environment = "sandbox"
+api_key = "ci-key"
+"""
+
+
+def test_profiles_override_environment_settings(config_file):
+    with open(config_file, "w") as f:
+        f.write(PROFILES)
+
+    config_manager = ConfigManager(config_file, profile="ci")
+    assert config_manager.get_config("api_key") == "ci-key"
+    assert config_manager.get_config("api_host") == "https://api.sandbox.cobo.com"
+    assert ConfigManager(config_file, "dev", "ci").get_config("api_host") == (
+        "https://api.dev.cobo.com"
+    )
+    assert ConfigManager(config_file).get_config("api_key") == "dev-key"
+
+    config_manager.set_config("api_secret", "ci-secret")
+    ConfigManager(config_file, profile="new").set_config("api_key", "new-key")
+    assert ConfigManager(config_file).list_profiles() == ["ci", "new"]
+    assert ConfigManager(config_file).get_config("api_secret") is None
+    assert ConfigManager(config_file, profile="ci").delete_config("environment")
+    assert ConfigManager(config_file, profile="ci").get_config("api_host") == (
+        "https://api.dev.cobo.com"
+    )
+
+
+def test_profile_option(config_file, invoke_cli, monkeypatch):
+    with open(config_file, "w") as f:
+        f.write(PROFILES)
+
+    result = invoke_cli(
+        ["--config-file", config_file, "--profile", "ci", "config", "get", "api_key"]
+    )
+    assert result.output == "api_key: ci-key\n"
+    monkeypatch.setenv("COBO_PROFILE", "ci")
+    result = invoke_cli(["--config-file", config_file, "config", "profiles"])
+    assert result.output == "* ci\n"
+
+    result = invoke_cli(["--config-file", config_file, "--profile", "nope", "env"])
+    assert result.exit_code == 2
+    assert "Unknown profile: nope" in result.output
+
+
+def test_commands_do_not_validate_settings_they_do_not_read(
+    config_file, invoke_cli, mocker
+):
+    init = mocker.spy(ConfigManager, "__init__")
+    result = invoke_cli(["--config-file", config_file, "config", "get", "environment"])
+    assert result.output == "environment: dev\n"
+    config_manager = init.call_args.args[0]
+    assert config_manager._settings is None
@@ -0,0 +1,155 @@
+import json
+import os
+import pty
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from cobo_cli.utils.daemon_client import daemon_supported, find_subcommand
+
+pytestmark = pytest.mark.skipif(
+    not daemon_supported() or not hasattr(os, "fork"),
+    reason="the daemon needs Unix domain sockets and fork()",
+)
+
+CLIENT = "from cobo_cli.utils.daemon_client import main; main()"
+STATUS = (
+    "import json; from cobo_cli.utils.daemon_client import send_control; "
+    "print(json.dumps(send_control('status')))"
+)
+
+
+@pytest.mark.parametrize(
+    "argv, subcommand",
+    [
+        (["config", "get", "environment"], "config"),
+        (["-e", "prod", "--enable-debug", "get", "/wallets"], "get"),
+        (["--config-file", "serve", "serve"], "serve"),
+        (["--", "serve"], "serve"),
+        (["--help"], None),
+    ],
+)
+def test_find_subcommand(argv, subcommand):
+    assert find_subcommand(argv) == subcommand
+
+
+def run_python(code, env, *args, **kwargs):
+    return subprocess.run(
+        [sys.executable, "-c", code, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+        **kwargs,
+    )
+
+
+def status(env):
+    return json.loads(run_python(STATUS, env).stdout)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    env = {**os.environ, "HOME": str(tmp_path)}
+    env.pop("COBO_NO_DAEMON", None)
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "from cobo_cli.cli import cli; cli()",
+            "serve",
+            "--foreground",
+            "--idle-timeout",
+            "60",
+        ],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 30
+    while status(env) is None:
+        assert process.poll() is None, process.stdout.read()
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    yield env
+    run_python(CLIENT, env, "serve", "--stop")
+    try:
+        process.wait(timeout=10)
+    finally:
+        process.kill()
+        process.stdout.close()
+
+
+def test_daemon_runs_commands(daemon, tmp_path):
+    result = run_python(CLIENT, daemon, "config", "get", "environment")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "environment: dev\n"
+    first = status(daemon)
+    assert first["requests"] == 1
+
+    # Exit codes and stderr come back from the daemon.
+    result = run_python(CLIENT, daemon, "config", "get")
+    assert result.returncode == 2
+    assert "Missing argument" in result.stderr
+    assert status(daemon)["requests"] == 2
+
+    result = run_python(CLIENT, daemon, "config", "set", "environment", "sandbox")
+    assert result.returncode == 0, result.stderr
+    result = run_python(CLIENT, daemon, "config", "get", "environment")
+    assert result.stdout == "environment: sandbox\n"
+    # The config file changed, so the preloaded state was rebuilt.
+    assert status(daemon)["loads"] > first["loads"]
+
+
+def test_daemon_can_be_bypassed(daemon):
+    env = {**daemon, "COBO_NO_DAEMON": "1"}
+    result = run_python(CLIENT, env, "config", "get", "environment")
+    assert result.stdout == "environment: dev\n"
+    assert status(daemon)["requests"] == 0
+
+
+def test_serve_status_and_stop(daemon):
+    result = run_python(CLIENT, daemon, "serve", "--status")
+    assert result.returncode == 0, result.stderr
+    assert "requests: 0" in result.stdout
+
+    result = run_python(CLIENT, daemon, "serve", "--foreground")
+    assert "already running" in result.stderr
+
+    result = run_python(CLIENT, daemon, "serve", "--stop")
+    assert result.stdout == "Daemon stopped.\n"
+    deadline = time.monotonic() + 10
+    while status(daemon) is not None:
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    # Without a daemon, commands run locally.
+    result = run_python(CLIENT, daemon, "config", "get", "environment")
+    assert result.stdout == "environment: dev\n"
+
+
+def test_stalled_client_does_not_block_others(daemon, tmp_path):
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with stalled:
+        stalled.connect(str(tmp_path / ".cobo" / "run" / "daemon.sock"))
+        stalled.send(b"\x00\x00")  # A partial frame, and then nothing.
+        result = run_python(CLIENT, daemon, "config", "get", "environment")
+        assert result.stdout == "environment: dev\n"
+    assert status(daemon)["requests"] == 1
+
+
+def test_prompting_commands_run_locally_on_a_terminal(daemon):
+    primary, secondary = pty.openpty()
+    try:
+        result = run_python(CLIENT, daemon, "keys", "--help", stdin=secondary)
+    finally:
+        os.close(primary)
+        os.close(secondary)
+    assert result.returncode == 0, result.stderr
+    assert status(daemon)["requests"] == 0
+
+    result = run_python(CLIENT, daemon, "keys", "--help", stdin=subprocess.DEVNULL)
+    assert result.returncode == 0, result.stderr
+    assert status(daemon)["requests"] == 1
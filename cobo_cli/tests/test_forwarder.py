@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from cobo_cli.utils.forwarder import EventForwarder
+from cobo_cli.utils.http import HttpOptions
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    statuses = []
+    received = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        time.sleep(self.delay)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            status = self.statuses.pop(0) if self.statuses else 200
+            if status == 200:
+                self.received.append(body["id"])
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def _receiver(http_server, delay=0.0, statuses=(), handler=ReceiverHandler):
+    ReceiverHandler.delay = delay
+    ReceiverHandler.statuses = list(statuses)
+    ReceiverHandler.received = []
+    return http_server(handler)
+
+
+def _forwarder(url, **kwargs):
+    options = HttpOptions(read_timeout=5, backoff_base=0.01, backoff_max=0.05)
+    return EventForwarder(url, options=options, **kwargs).start()
+
+
+class BlockedReceiverHandler(ReceiverHandler):
+    arrived = threading.Event()
+    release = threading.Event()
+
+    def do_POST(self):
+        self.arrived.set()
+        self.release.wait(10)
+        super().do_POST()
+
+
+@pytest.mark.parametrize("overflow", ["drop", "spill"])
+def test_submit_does_not_wait_for_a_blocked_receiver(http_server, tmp_path, overflow):
+    BlockedReceiverHandler.arrived.clear()
+    BlockedReceiverHandler.release.clear()
+    forwarder = _forwarder(
+        _receiver(http_server, handler=BlockedReceiverHandler),
+        concurrency=1,
+        queue_size=2,
+        overflow=overflow,
+        spill_dir=str(tmp_path),
+    )
+    forwarder.submit({"id": 0})
+    assert BlockedReceiverHandler.arrived.wait(10)
+
+    # The only worker is stuck on event 0 and the queue holds two events;
+    # the rest are dropped or spilled without waiting for the receiver.
+    accepted = [forwarder.submit({"id": i}) for i in range(1, 10)]
+    stats = forwarder.snapshot()
+    if overflow == "drop":
+        assert accepted == [True] * 2 + [False] * 7
+        assert stats["dropped"] == 7
+    else:
+        assert accepted == [True] * 9
+        assert stats["spilled"] == 7
+    assert stats["forwarded"] == 0
+
+    BlockedReceiverHandler.release.set()
+    forwarder.close(timeout=10)
+    expected = 3 if overflow == "drop" else 10
+    assert sorted(ReceiverHandler.received) == list(range(expected))
+    assert forwarder.snapshot()["queue_depth"] == 0
+
+
+def test_failed_deliveries_are_retried(http_server):
+    forwarder = _forwarder(_receiver(http_server, statuses=[503, 500]), concurrency=1)
+
+    forwarder.submit({"id": 1})
+    forwarder.close(timeout=10)
+
+    assert ReceiverHandler.received == [1]
+    assert forwarder.snapshot()["retried"] == 2
+
+
+def test_overflow_spills_to_disk_and_keeps_order(http_server, tmp_path):
+    forwarder = _forwarder(
+        _receiver(http_server, delay=0.01),
+        concurrency=1,
+        queue_size=4,
+        spill_dir=str(tmp_path),
+    )
+
+    for i in range(30):
+        forwarder.submit({"id": i})
+    assert forwarder.snapshot()["spilled"] > 0
+
+    forwarder.close(timeout=10)
+    assert ReceiverHandler.received == list(range(30))
+    assert forwarder.snapshot()["dropped"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_overflow_drop(http_server):
+    forwarder = _forwarder(
+        _receiver(http_server, delay=0.05),
+        concurrency=1,
+        queue_size=2,
+        overflow="drop",
+    )
+
+    results = [forwarder.submit({"id": i}) for i in range(10)]
+    forwarder.close(timeout=10)
+
+    stats = forwarder.snapshot()
+    assert results.count(False) == stats["dropped"] > 0
+    assert stats["forwarded"] == 10 - stats["dropped"]
@@ -0,0 +1,130 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import click
+import pytest
+import requests
+
+from cobo_cli.data.auth_methods import AuthMethodType
+from cobo_cli.data.context import CommandContext
+from cobo_cli.data.environments import EnvironmentType
+from cobo_cli.utils.api import make_request
+from cobo_cli.utils.config import ConfigManager
+from cobo_cli.utils.http import HttpOptions, backoff_delay, get_session, should_retry
+
+API_SECRET = "0281d349927d3b4342129aa4d86bd0ed70163feb7b8d06fecc25c667974b6297"
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    statuses = []
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        self.requests.append((self.command, dict(self.headers), self.client_address[1]))
+        status = self.statuses.pop(0) if self.statuses else 200
+        payload = json.dumps({"success": status == 200}).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _respond
+
+
+@pytest.fixture
+def api_ctx(tmp_path, http_server, cobo_home):
+    FlakyHandler.requests = []
+    base_url = http_server(FlakyHandler)
+    config_manager = ConfigManager(str(tmp_path / "config.toml"))
+    config_manager.set_config("api_host", base_url)
+    config_manager.set_config("api_key", "test-key")
+    config_manager.set_config("api_secret", API_SECRET)
+    config_manager.set_config("http_backoff_base", "0.01")
+    command_context = CommandContext(
+        env=EnvironmentType.DEVELOPMENT,
+        auth_method=AuthMethodType.APIKEY,
+        config_manager=config_manager,
+    )
+    return click.Context(click.Command("test"), obj=command_context)
+
+
+def test_make_request_retries_with_fresh_signature(api_ctx):
+    FlakyHandler.statuses = [429, 503]
+
+    response = make_request(api_ctx, "GET", "/wallets", params={"limit": 1})
+
+    assert response.status_code == 200
+    assert len(FlakyHandler.requests) == 3
+    nonces = {headers["Biz-Api-Nonce"] for _, headers, _ in FlakyHandler.requests}
+    signatures = {
+        headers["Biz-Api-Signature"] for _, headers, _ in FlakyHandler.requests
+    }
+    assert len(nonces) == len(signatures) == 3
+    # All attempts went over the same keep-alive connection.
+    assert len({port for _, _, port in FlakyHandler.requests}) == 1
+
+
+def test_make_request_does_not_retry_non_idempotent_server_errors(api_ctx):
+    FlakyHandler.statuses = [503]
+
+    response = make_request(api_ctx, "POST", "/wallets", json={"name": "w"})
+
+    assert response.status_code == 503
+    assert len(FlakyHandler.requests) == 1
+
+
+def test_make_request_gives_up_after_max_retries(api_ctx):
+    api_ctx.obj.config_manager.set_config("http_max_retries", "1")
+    FlakyHandler.statuses = [429, 429, 429]
+
+    response = make_request(api_ctx, "GET", "/wallets")
+
+    assert response.status_code == 429
+    assert len(FlakyHandler.requests) == 2
+
+
+def test_make_request_is_rate_limited(api_ctx, cobo_home):
+    api_ctx.obj.config_manager.set_config("rate_limit", "20")
+    api_ctx.obj.config_manager.set_config("rate_limit_burst", "1")
+
+    started = time.monotonic()
+    for _ in range(5):
+        assert make_request(api_ctx, "GET", "/wallets").status_code == 200
+
+    assert time.monotonic() - started >= 4 / 20 * 0.9
+    assert len(list((cobo_home / "ratelimit").glob("dev-*-wallets.bucket"))) == 1
+
+
+def test_sessions_are_shared_per_pool_size():
+    assert get_session(4) is get_session(4)
+    assert get_session(4) is not get_session(5)
+
+
+def test_should_retry_and_backoff():
+    response = requests.Response()
+    response.status_code = 502
+    assert should_retry("GET", response)
+    assert not should_retry("POST", response)
+    assert should_retry("POST", error=requests.ConnectTimeout())
+    assert not should_retry("POST", error=requests.ReadTimeout())
+
+    options = HttpOptions(backoff_base=1, backoff_max=8)
+    assert 2 <= backoff_delay(2, options) <= 4
+    assert 4 <= backoff_delay(10, options) <= 8
+    response.headers["Retry-After"] = "3"
+    assert backoff_delay(0, options, response) == 3
+
+
+def test_invalid_http_option_in_config(tmp_path):
+    config_manager = ConfigManager(str(tmp_path / "config.toml"))
+    config_manager.set_config("http_max_retries", "abc")
+    with pytest.raises(click.ClickException, match="Invalid http_max_retries"):
+        HttpOptions.from_config(config_manager)
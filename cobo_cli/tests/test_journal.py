@@ -0,0 +1,177 @@
+import copy
+import json
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import yaml
+
+from cobo_cli.tests.conftest import SAMPLE_OPENAPI_SPEC
+from cobo_cli.utils.journal import EventJournal, iter_journal, pace, read_index
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.received.append(body["id"])
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def _fill(journal, count, start_ts=1000.0):
+    for i in range(count):
+        journal.append({"id": i, "padding": "x" * 100}, ts=start_ts + i)
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_journal_rotates_and_reads_ranges(tmp_path, compression):
+    journal = EventJournal(str(tmp_path), segment_size=1024, compression=compression)
+    _fill(journal, 50)
+    journal.close()
+
+    segments = read_index(str(tmp_path))
+    assert len(segments) > 1
+    assert all(segment["closed"] for segment in segments)
+    assert sum(segment["count"] for segment in segments) == 50
+
+    records = list(iter_journal(str(tmp_path)))
+    assert [r["offset"] for r in records] == list(range(50))
+    assert [r["event"]["id"] for r in records] == list(range(50))
+
+    by_offset = iter_journal(str(tmp_path), start_offset=10, end_offset=19)
+    assert [r["offset"] for r in by_offset] == list(range(10, 20))
+    by_time = iter_journal(str(tmp_path), since=1030.0, until=1032.0)
+    assert [r["offset"] for r in by_time] == [30, 31, 32]
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_journal_recovers_after_crash(tmp_path, compression):
+    journal = EventJournal(str(tmp_path), segment_size=1 << 20, compression=compression)
+    _fill(journal, 5)
+    # No close(): the index still says the open segment is empty.
+    assert [r["offset"] for r in iter_journal(str(tmp_path))] == list(range(5))
+
+    reopened = EventJournal(str(tmp_path), compression=compression)
+    assert reopened.next_offset == 5
+    assert reopened.append({"id": 5}) == 5
+    reopened.close()
+
+    assert [r["offset"] for r in iter_journal(str(tmp_path))] == list(range(6))
+    assert len(os.listdir(tmp_path)) == 3  # Two segments and the index.
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def test_pace_replays_faster_than_real_time():
+    records = [{"ts": 100.0 + i * 0.1} for i in range(6)]
+
+    clock = FakeClock()
+    assert list(pace(records, speed=5, clock=clock, sleep=clock.sleep)) == records
+    assert clock.sleeps == pytest.approx([0.02] * 5)
+
+    clock = FakeClock()
+    list(pace(records, rate=100, clock=clock, sleep=clock.sleep))
+    assert clock.sleeps == pytest.approx([0.01] * 5)
+
+    clock = FakeClock()
+    list(pace(records, speed=0, clock=clock, sleep=clock.sleep))
+    assert clock.sleeps == []
+
+
+def test_webhook_replay(invoke_cli, tmp_path, http_server, cobo_home):
+    ReceiverHandler.received = []
+    journal = EventJournal(str(tmp_path / "journal"), segment_size=1024)
+    _fill(journal, 30)
+    journal.close()
+
+    result = invoke_cli(
+        [
+            "--config-file",
+            str(tmp_path / "config.toml"),
+            "webhook",
+            "replay",
+            "--journal",
+            str(tmp_path / "journal"),
+            "--forward",
+            http_server(ReceiverHandler),
+            "--from-offset",
+            "5",
+            "--to-offset",
+            "24",
+            "--speed",
+            "0",
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Replayed 20 events" in result.output
+    assert sorted(ReceiverHandler.received) == list(range(5, 25))
+
+
+class LateEventSession:
+    """Delivers one more event while the listener is shutting down."""
+
+    def __init__(self, url, on_event, **kwargs):
+        self.on_event = on_event
+        self.stopped = threading.Event()
+
+    def run(self):
+        self.on_event({"event_id": "1"})
+        os.kill(os.getpid(), signal.SIGINT)  # Ctrl-C
+        self.stopped.wait(5)
+        time.sleep(0.1)  # Still handling a message when close() is called.
+        self.on_event({"event_id": "2"})
+
+    def close(self):
+        self.stopped.set()
+
+
+def test_webhook_listen_stops_session_before_closing_journal(
+    invoke_cli, tmp_path, cobo_home, mocker
+):
+    spec = copy.deepcopy(SAMPLE_OPENAPI_SPEC)
+    spec["components"]["schemas"]["WebhookEventType"] = {
+        "type": "string",
+        "enum": ["wallets.transaction.created"],
+    }
+    spec_file = tmp_path / "openapi.yaml"
+    spec_file.write_text(yaml.safe_dump(spec))
+    mocker.patch("cobo_cli.commands.webhook.WebSocketSession", LateEventSession)
+
+    result = invoke_cli(
+        [
+            "--config-file",
+            str(tmp_path / "config.toml"),
+            "--spec",
+            str(spec_file),
+            "webhook",
+            "listen",
+            "--journal",
+            str(tmp_path / "journal"),
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Stopping webhook listener" in result.output
+    assert sum(s["count"] for s in read_index(str(tmp_path / "journal"))) == 2
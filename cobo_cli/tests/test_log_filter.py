@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from cobo_cli.utils.log_filter import (
+    FilterSyntaxError,
+    LogFilter,
+    LogRecord,
+    compile_filters,
+)
+
+
+def _log(**overrides):
+    log = {
+        "api_request_uuid": "req-1",
+        "time": "2024-01-01T00:00:00Z",
+        "api_method": "POST",
+        "api_endpoint": "/v2/wallets/123/addresses",
+        "status": 502,
+        "ip_address": "10.0.0.1",
+        "api_key": "key-1",
+        "latency": 350,
+        "query_params": "{}",
+        "request_body": json.dumps({"wallet_type": "MPC", "tags": ["a", "b"]}),
+        "response_body": json.dumps({"success": False}),
+    }
+    log.update(overrides)
+    return LogRecord(log)
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("status >= 500", True),
+        ("status in 400..499", False),
+        ('status == "502"', True),
+        ('method == "POST" and path ~ "/v2/wallets/*"', True),
+        ('path =~ "^/v2/wallets/[^/]+$"', False),
+        ('path !~ "/v2/transactions/*"', True),
+        ("latency > 200 and latency <= 350", True),
+        ('ip in ("10.0.0.1", "10.0.0.2")', True),
+        ('not ip in ("10.0.0.1")', False),
+        ('request_body.wallet_type == "MPC"', True),
+        ('request_body.tags.1 == "b"', True),
+        ("response_body.success == false", True),
+        ('request_body.missing == "x"', False),
+        ('status < 500 or (method != "GET" and key == "key-1")', True),
+    ],
+)
+def test_filter_expressions(expression, expected):
+    assert LogFilter(expression)(_log()) is expected
+
+
+def test_bodies_are_decoded_lazily_and_cheap_predicates_go_first():
+    record = _log(response_body="not json at all {")
+    log_filter = LogFilter("response_body.success == false and status < 500")
+
+    assert not log_filter(record)
+    assert record._decoded == {}
+
+    assert LogFilter('request_body.wallet_type == "MPC"')(record)
+    assert list(record._decoded) == ["request_body"]
+
+
+def test_server_params_only_use_implied_equalities():
+    log_filter = compile_filters(
+        ['method == "POST" and status >= 500', '(ip == "10.0.0.1")']
+    )
+    assert log_filter.server_params() == {"method": "POST", "ip_address": "10.0.0.1"}
+
+    disjunction = LogFilter('method == "POST" or status == 500')
+    assert disjunction.server_params() == {}
+    mixed = LogFilter('path == "/v2/wallets" and (status == 500 or status == 502)')
+    assert mixed.server_params() == {"api_endpoint": "/v2/wallets"}
+
+
+@pytest.mark.parametrize(
+    "expression, params",
+    [
+        ("status == 500", {"status": "500"}),
+        ("status == 500.0", {}),
+        ("status == 0500", {}),
+        ('status == "500"', {"status": "500"}),
+        ("path == 1", {}),
+        ('path == "a\\"b"', {"api_endpoint": 'a"b'}),
+        ("status == true", {}),
+        ("ip == null", {}),
+    ],
+)
+def test_server_params_push_literals_as_written(expression, params):
+    assert LogFilter(expression).server_params() == params
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["status >=", "status > 'abc'", 'path =~ "("', "status in 5..x", "(a == 1"],
+)
+def test_syntax_errors(expression):
+    with pytest.raises(FilterSyntaxError):
+        LogFilter(expression)
+
+
+def test_compact_output(capsys):
+    from cobo_cli.commands.logs import print_log_line
+
+    print_log_line(_log())
+
+    assert capsys.readouterr().out == (
+        "2024-01-01T00:00:00Z POST 502 /v2/wallets/123/addresses 10.0.0.1 req-1\n"
+    )
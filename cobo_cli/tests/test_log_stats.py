@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from cobo_cli.tests.conftest import SAMPLE_OPENAPI_SPEC
+from cobo_cli.utils.log_filter import LogRecord
+from cobo_cli.utils.log_stats import (
+    DDSketch,
+    LogStats,
+    format_stats_table,
+    route_template_normalizer,
+)
+from cobo_cli.utils.openapi import RouteIndex
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _log(endpoint="/v2/wallets", status=200, latency=100, method="GET"):
+    return LogRecord(
+        api_method=method, api_endpoint=endpoint, status=status, latency=latency
+    )
+
+
+def test_ddsketch_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(4, 1) for _ in range(20000)]
+    sketch = DDSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+    assert len(sketch.bins) < 2048
+
+
+def test_ddsketch_merge_and_bounded_bins():
+    a, b = DDSketch(), DDSketch(max_bins=64)
+    for i in range(1, 1001):
+        (a if i % 2 else b).add(i)
+    b.merge(a)
+
+    assert b.count == 1000
+    assert len(b.bins) <= 64
+    # Collapsing only loses accuracy at the low end.
+    assert b.quantile(0.99) == pytest.approx(990, rel=0.02)
+    assert DDSketch().quantile(0.5) is None
+
+
+def test_log_stats_sliding_window():
+    clock = FakeClock()
+    stats = LogStats(("method", "endpoint"), window=10, slices=5, clock=clock)
+    for _ in range(10):
+        stats.add(_log(latency=100))
+    stats.add(_log(status=500, latency=900))
+    stats.add(_log(status=502, latency=900))
+    clock.now += 6
+    for _ in range(5):
+        stats.add(_log(endpoint="/v2/transactions", latency=50))
+
+    rows = stats.snapshot()
+    assert [row["endpoint"] for row in rows] == ["/v2/wallets", "/v2/transactions"]
+    wallets = rows[0]
+    assert wallets["count"] == 12
+    assert wallets["error_rate"] == pytest.approx(2 / 12, abs=1e-4)
+    assert wallets["p50"] == pytest.approx(100, rel=0.01)
+    assert wallets["p99"] == pytest.approx(900, rel=0.01)
+    assert wallets["rate"] == pytest.approx(12 / 6, rel=0.01)
+
+    # The first burst falls out of the window.
+    clock.now += 6
+    rows = stats.snapshot()
+    assert [(row["endpoint"], row["count"]) for row in rows] == [
+        ("/v2/transactions", 5)
+    ]
+
+
+def test_endpoints_are_grouped_by_template():
+    normalize = route_template_normalizer(RouteIndex(SAMPLE_OPENAPI_SPEC["paths"]))
+
+    assert normalize("/v2/wallets/abc/addresses") == "/v2/wallets/{wallet_id}/addresses"
+    assert normalize("/v2/wallets/tokens?limit=1") == "/v2/wallets/tokens"
+    assert normalize("/v2/unknown/path") == "/v2/unknown/path"
+
+
+def test_format_stats_table():
+    stats = LogStats(("method",), clock=FakeClock())
+    stats.add(_log(latency=None))
+
+    table = format_stats_table(stats.snapshot(), ("method",)).splitlines()
+
+    assert table[0].split() == [
+        "METHOD",
+        "COUNT",
+        "RATE",
+        "ERROR_RATE",
+        "P50",
+        "P95",
+        "P99",
+    ]
+    assert table[1].split()[:2] == ["GET", "1"]
+    assert table[1].split()[-3:] == ["-", "-", "-"]
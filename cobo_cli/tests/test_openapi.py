@@ -0,0 +1,283 @@
+import copy
+import gzip
+import json
+import os
+from http.server import BaseHTTPRequestHandler
+
+import click
+import pytest
+import yaml
+
+from cobo_cli.tests.conftest import SAMPLE_OPENAPI_SPEC
+from cobo_cli.utils import openapi
+from cobo_cli.utils.api import get_operation_help, validate_parameters
+from cobo_cli.utils.openapi import (
+    ApiSpec,
+    RouteIndex,
+    freeze,
+    get_api_details,
+    get_spec_cache_path,
+    load_api_spec,
+    match_route,
+    resolve_reference,
+    update_spec,
+)
+
+
+def test_load_api_spec_uses_compiled_cache(cobo_home, spec_file, mocker):
+    spec = load_api_spec(str(spec_file))
+    assert spec == SAMPLE_OPENAPI_SPEC
+    assert os.path.exists(get_spec_cache_path(str(spec_file)))
+
+    yaml_load = mocker.patch.object(openapi.yaml, "load")
+    assert load_api_spec(str(spec_file)) == SAMPLE_OPENAPI_SPEC
+    yaml_load.assert_not_called()
+
+
+def test_touched_spec_is_hashed_only_once(cobo_home, spec_file, mocker):
+    openapi.read_spec_file(str(spec_file))
+    os.utime(spec_file, ns=(0, 0))
+    digest = mocker.spy(openapi, "_file_digest")
+    yaml_load = mocker.patch.object(openapi.yaml, "load")
+
+    assert openapi.read_spec_file(str(spec_file)) == SAMPLE_OPENAPI_SPEC
+    assert openapi.read_spec_file(str(spec_file)) == SAMPLE_OPENAPI_SPEC
+    assert digest.call_count == 1
+    yaml_load.assert_not_called()
+
+
+def test_load_api_spec_rebuilds_cache_when_source_changes(cobo_home, spec_file):
+    load_api_spec(str(spec_file))
+
+    changed = dict(SAMPLE_OPENAPI_SPEC, info={"title": "Changed", "version": "2"})
+    spec_file.write_text(yaml.safe_dump(changed))
+    os.utime(spec_file, ns=(0, 0))
+
+    assert load_api_spec(str(spec_file))["info"]["title"] == "Changed"
+
+
+def test_load_api_spec_ignores_corrupt_cache(cobo_home, spec_file):
+    cache_file = get_spec_cache_path(str(spec_file))
+    os.makedirs(os.path.dirname(cache_file))
+    with open(cache_file, "wb") as f:
+        f.write(b"not a cache")
+
+    assert load_api_spec(str(spec_file)) == SAMPLE_OPENAPI_SPEC
+
+
+def test_match_route_prefers_literal_segments():
+    spec = ApiSpec(copy.deepcopy(SAMPLE_OPENAPI_SPEC))
+
+    _, matched_path, path_params = match_route(spec, "/wallets/tokens", "GET")
+    assert matched_path == "/wallets/tokens"
+    assert path_params == {}
+
+    details, matched_path, path_params = match_route(
+        spec, "/wallets/w-1/addresses", "GET"
+    )
+    assert matched_path == "/wallets/{wallet_id}/addresses"
+    assert path_params == {"wallet_id": "w-1"}
+    assert details["description"] == "List wallet addresses."
+
+
+def test_match_route_errors():
+    spec = ApiSpec(copy.deepcopy(SAMPLE_OPENAPI_SPEC))
+
+    with pytest.raises(click.ClickException, match="not defined"):
+        match_route(spec, "/unknown", "GET")
+    with pytest.raises(click.ClickException, match="No DELETE operation"):
+        match_route(spec, "/wallets/w-1", "DELETE")
+
+
+def test_route_index_is_built_once(mocker):
+    spec = ApiSpec(copy.deepcopy(SAMPLE_OPENAPI_SPEC))
+    build = mocker.spy(RouteIndex, "__init__")
+
+    get_api_details(spec, "/wallets/w-1", "GET")
+    get_api_details(spec, "/wallets", "POST")
+    assert build.call_count == 1
+
+
+def test_ref_resolver_memoizes_and_detects_cycles():
+    raw = copy.deepcopy(SAMPLE_OPENAPI_SPEC)
+    raw["components"]["schemas"]["A"] = {"$ref": "#/components/schemas/B"}
+    raw["components"]["schemas"]["B"] = {"$ref": "#/components/schemas/A"}
+    spec = ApiSpec(raw)
+    resolver = spec.resolver
+
+    wallet = resolver.resolve("#/components/schemas/WalletInfo")
+    assert wallet == freeze(raw["components"]["schemas"]["WalletInfo"])
+    assert resolve_reference(spec, "#/components/schemas/WalletInfo") is wallet
+
+    with pytest.raises(ValueError, match="Circular reference"):
+        resolver.resolve("#/components/schemas/A")
+    with pytest.raises(ValueError, match="Unable to resolve"):
+        resolver.resolve("#/components/schemas/Missing")
+
+
+def test_ref_resolver_dereferenced_operation_view():
+    spec = ApiSpec(copy.deepcopy(SAMPLE_OPENAPI_SPEC))
+    resolver = spec.resolver
+
+    operation = resolver.operation("/nodes", "PUT")
+    schema = operation["requestBody"]["content"]["application/json"]["schema"]
+    assert schema["description"] == "A recursive tree node."
+    # The recursive back-reference is kept instead of expanding forever.
+    assert schema["properties"]["children"]["items"] == {
+        "$ref": "#/components/schemas/Node"
+    }
+    assert resolver.operation("/nodes", "put") is operation
+
+    operation = resolver.operation("/wallets", "get")
+    assert [p["name"] for p in operation["parameters"]] == ["limit", "before", "after"]
+
+
+def test_validate_parameters_with_discriminator():
+    spec = ApiSpec(copy.deepcopy(SAMPLE_OPENAPI_SPEC))
+
+    assert validate_parameters(
+        spec, "/wallets", "POST", {"wallet_type": "MPC", "vault_id": "v"}
+    ) == (True, None)
+    is_valid, error = validate_parameters(
+        spec, "/wallets", "POST", {"wallet_type": "Custodial", "vault_id": "v"}
+    )
+    assert not is_valid and "vault_id" in error
+    assert validate_parameters(spec, "/wallets", "GET", {"limit": "10"}) == (
+        True,
+        None,
+    )
+
+
+def test_validate_parameters_with_all_of_variants():
+    raw = copy.deepcopy(SAMPLE_OPENAPI_SPEC)
+    schemas = raw["components"]["schemas"]
+    schemas["BaseWalletParams"] = {
+        "type": "object",
+        "properties": {
+            "wallet_type": {"type": "string"},
+            "name": {"type": "string"},
+        },
+    }
+    schemas["CreateMpcWalletParams"] = {
+        "title": "MPC",
+        "allOf": [
+            {"$ref": "#/components/schemas/BaseWalletParams"},
+            {"type": "object", "properties": {"vault_id": {"type": "string"}}},
+        ],
+    }
+    spec = ApiSpec(raw)
+
+    # Without a discriminator value any variant's properties are accepted.
+    assert validate_parameters(
+        spec, "/wallets", "POST", {"name": "w", "vault_id": "v"}
+    ) == (True, None)
+    assert validate_parameters(
+        spec, "/wallets", "POST", {"wallet_type": "MPC", "vault_id": "v"}
+    ) == (True, None)
+    is_valid, error = validate_parameters(
+        spec, "/wallets", "POST", {"name": "w", "color": "red"}
+    )
+    assert not is_valid and "color" in error
+
+
+def test_spec_objects_are_read_only():
+    spec = ApiSpec(copy.deepcopy(SAMPLE_OPENAPI_SPEC))
+
+    details, _ = get_api_details(spec, "/wallets/w-1", "GET")
+    with pytest.raises(TypeError):
+        details["parameters"] = []
+    with pytest.raises(TypeError):
+        details["parameters"][0]["required"] = False
+    with pytest.raises(TypeError):
+        spec["paths"] = {}
+    assert get_api_details(spec, "/wallets/w-1", "GET")[0] is details
+
+    # Rendering help must not leak "required" markers into shared schemas.
+    get_operation_help(spec, "/wallets", "POST")
+    get_operation_help(spec, "/wallets/w-1", "GET")
+    wallet = resolve_reference(spec, "#/components/schemas/WalletInfo")
+    assert "required" not in wallet["properties"]["wallet_id"]
+    assert copy.deepcopy(details) == details
+
+
+class SpecHandler(BaseHTTPRequestHandler):
+    body = yaml.safe_dump(SAMPLE_OPENAPI_SPEC).encode()
+    etag = '"v1"'
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == self.etag:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            payload = self.body[start:]
+            self.send_response(206)
+        elif "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(self.body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            payload = self.body
+            self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def test_update_spec_revalidates_with_etag(cobo_home, http_server):
+    SpecHandler.requests = []
+    url = http_server(SpecHandler)
+    spec_file = str(cobo_home / "openapi.yaml")
+
+    assert update_spec(url, spec_file)
+    with open(spec_file, "rb") as f:
+        assert f.read() == SpecHandler.body
+    assert "gzip" in SpecHandler.requests[0]["Accept-Encoding"]
+
+    os.utime(spec_file, (0, 0))
+    assert update_spec(url, spec_file)
+    assert SpecHandler.requests[1]["If-None-Match"] == '"v1"'
+    assert os.path.getmtime(spec_file) > 0
+    assert not os.path.exists(spec_file + ".part")
+
+
+def test_update_spec_resumes_partial_download(cobo_home, http_server):
+    SpecHandler.requests = []
+    url = http_server(SpecHandler)
+    spec_file = str(cobo_home / "openapi.yaml")
+    os.makedirs(cobo_home)
+    with open(spec_file + ".part", "wb") as f:
+        f.write(SpecHandler.body[:100])
+    with open(spec_file + ".meta.json", "w") as f:
+        json.dump({"partial_etag": '"v1"'}, f)
+
+    assert update_spec(url, spec_file)
+    assert SpecHandler.requests[0]["Range"] == "bytes=100-"
+    with open(spec_file, "rb") as f:
+        assert f.read() == SpecHandler.body
+
+
+def test_load_api_spec_refreshes_stale_spec_in_background(cobo_home, mocker):
+    os.makedirs(cobo_home)
+    spec_file = cobo_home / "openapi.yaml"
+    spec_file.write_text(yaml.safe_dump(SAMPLE_OPENAPI_SPEC))
+    os.utime(spec_file, (0, 0))
+    popen = mocker.patch.object(openapi.subprocess, "Popen")
+    update = mocker.patch.object(openapi, "update_spec")
+
+    assert load_api_spec(refresh_mode="background") == SAMPLE_OPENAPI_SPEC
+    update.assert_not_called()
+    popen.assert_called_once()
+    assert popen.call_args[0][0][-2:] == ["--refresh", str(spec_file)]
+
+    # A refresh that is already running is not started twice.
+    load_api_spec(refresh_mode="background")
+    popen.assert_called_once()
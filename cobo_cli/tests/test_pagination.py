@@ -0,0 +1,118 @@
+import json
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from cobo_cli.tests.conftest import SAMPLE_OPENAPI_SPEC
+from cobo_cli.utils.config import ConfigManager
+from cobo_cli.utils.openapi import is_cursor_paginated
+
+API_SECRET = "0281d349927d3b4342129aa4d86bd0ed70163feb7b8d06fecc25c667974b6297"
+TOTAL_ITEMS = 25
+
+
+class PagedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self.requests.append(query)
+        start = int(query.get("after", ["0"])[0])
+        limit = int(query.get("limit", ["10"])[0])
+        end = min(start + limit, TOTAL_ITEMS)
+        page = {
+            "data": [{"wallet_id": f"w{i}"} for i in range(start, end)],
+            "pagination": {"after": str(end) if end < TOTAL_ITEMS else ""},
+        }
+        payload = json.dumps(page).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def paged_config(tmp_path, http_server, cobo_home):
+    PagedHandler.requests = []
+    config_file = tmp_path / "config.toml"
+    config_manager = ConfigManager(str(config_file))
+    config_manager.set_config("api_host", http_server(PagedHandler))
+    config_manager.set_config("api_key", "test-key")
+    config_manager.set_config("api_secret", API_SECRET)
+    return str(config_file)
+
+
+def test_is_cursor_paginated():
+    assert is_cursor_paginated(SAMPLE_OPENAPI_SPEC, "/wallets")
+    assert not is_cursor_paginated(SAMPLE_OPENAPI_SPEC, "/wallets/tokens")
+    assert not is_cursor_paginated(SAMPLE_OPENAPI_SPEC, "/wallets/{wallet_id}")
+
+
+def test_get_all_follows_cursors(invoke_cli, paged_config, spec_file):
+    result = invoke_cli(
+        [
+            "--config-file",
+            paged_config,
+            "--spec",
+            str(spec_file),
+            "get",
+            "/wallets",
+            "--all",
+            "--limit",
+            "10",
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    items = [json.loads(line) for line in result.output.splitlines()]
+    assert [item["wallet_id"] for item in items] == [f"w{i}" for i in range(25)]
+    assert [q.get("after") for q in PagedHandler.requests] == [
+        None,
+        ["10"],
+        ["20"],
+    ]
+
+
+def test_get_max_items_stops_early(invoke_cli, paged_config, spec_file):
+    result = invoke_cli(
+        [
+            "--config-file",
+            paged_config,
+            "--spec",
+            str(spec_file),
+            "get",
+            "/wallets",
+            "--max-items",
+            "12",
+            "--limit",
+            "5",
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert len(result.output.splitlines()) == 12
+    # Three pages are needed; at most one more may have been prefetched.
+    assert 3 <= len(PagedHandler.requests) <= 4
+
+
+def test_get_all_rejects_unpaginated_endpoints(invoke_cli, paged_config, spec_file):
+    result = invoke_cli(
+        [
+            "--config-file",
+            paged_config,
+            "--spec",
+            str(spec_file),
+            "get",
+            "/wallets/tokens",
+            "--all",
+        ]
+    )
+
+    assert result.exit_code == 1
+    assert "does not support cursor pagination" in result.output
@@ -0,0 +1,212 @@
+import multiprocessing
+import threading
+import time
+
+import click
+import pytest
+import requests
+
+from cobo_cli.utils import rate_limit
+from cobo_cli.utils.config import ConfigManager
+from cobo_cli.utils.rate_limit import (
+    MIN_RATE,
+    Bucket,
+    RateLimiter,
+    RateLimitOptions,
+    endpoint_group,
+    parse_rate_limit_headers,
+)
+
+
+def make_response(status=200, **headers):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update({k.replace("_", "-"): v for k, v in headers.items()})
+    return response
+
+
+def read_state(bucket):
+    return bucket._update(lambda state, now: (None, state))
+
+
+@pytest.mark.parametrize(
+    "path, group",
+    [
+        ("/wallets/123/addresses", "wallets"),
+        ("/transactions?limit=1", "transactions"),
+        ("/oauth/token", "oauth"),
+        ("/", "root"),
+        ("/Auto-Sweep/tasks", "auto_sweep"),
+    ],
+)
+def test_endpoint_group(path, group):
+    assert endpoint_group(path) == group
+
+
+def test_parse_rate_limit_headers():
+    response = make_response(X_RateLimit_Remaining="7", X_RateLimit_Reset="30")
+    assert parse_rate_limit_headers(response) == (7, 30)
+    response = make_response(
+        RateLimit_Remaining="0", RateLimit_Reset=str(time.time() + 60)
+    )
+    remaining, reset = parse_rate_limit_headers(response)
+    assert remaining == 0 and 59 < reset <= 60
+    assert parse_rate_limit_headers(make_response()) == (None, None)
+
+
+def test_bucket_paces_requests(tmp_path):
+    bucket = Bucket(str(tmp_path / "b.bucket"), rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - started >= 10 / 50 * 0.9
+
+
+def test_unlimited_bucket_stays_off_disk(tmp_path):
+    bucket = Bucket(str(tmp_path / "b.bucket"), rate=0, burst=0)
+    assert bucket.acquire() == 0
+    bucket.observe(make_response())
+    assert not (tmp_path / "b.bucket").exists()
+
+
+def _take_tokens(path, count, queue):
+    bucket = Bucket(path, rate=50, burst=1)
+    for _ in range(count):
+        bucket.acquire()
+        queue.put(time.time())
+
+
+def test_bucket_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "shared.bucket")
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    workers = [
+        context.Process(target=_take_tokens, args=(path, 5, queue)) for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    times = sorted(queue.get(timeout=60) for _ in range(15))
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    # 15 tokens at 50/s with no burst take at least 14 intervals overall.
+    assert times[-1] - times[0] >= 14 / 50 * 0.9
+
+
+def test_retry_after_pauses_bucket(tmp_path):
+    bucket = Bucket(str(tmp_path / "b.bucket"), rate=0, burst=0)
+    bucket.observe(make_response(429, Retry_After="0.3"))
+    other = Bucket(bucket.path, rate=0, burst=0)
+    assert 0.2 < other.acquire() <= 0.3
+
+
+def test_rate_limit_headers_pace_remaining_quota(tmp_path):
+    bucket = Bucket(str(tmp_path / "b.bucket"), rate=100, burst=0)
+    bucket.acquire()
+    bucket.observe(make_response(X_RateLimit_Remaining="5", X_RateLimit_Reset="10"))
+    state = read_state(bucket)
+    assert state.rate == pytest.approx(0.5)
+    assert state.tokens <= 5
+
+
+def test_throttling_halves_rate_and_success_recovers_it(tmp_path):
+    bucket = Bucket(str(tmp_path / "b.bucket"), rate=10, burst=0)
+    bucket.acquire()
+    bucket.observe(make_response(429))
+    assert read_state(bucket).rate == 5
+    for _ in range(3):
+        bucket.observe(make_response())
+    assert read_state(bucket).rate == pytest.approx(6.5)
+    for _ in range(20):
+        bucket.observe(make_response(429))
+    assert read_state(bucket).rate == MIN_RATE
+
+
+def test_concurrency_slots(tmp_path):
+    limiter = RateLimiter("dev", RateLimitOptions(concurrency=2), str(tmp_path))
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with limiter.slot("key"):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 2
+
+
+def _hold_slot(limiter):
+    acquired, release = threading.Event(), threading.Event()
+
+    def hold():
+        with limiter.slot("key"):
+            acquired.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=hold, daemon=True)
+    thread.start()
+    return thread, acquired, release
+
+
+def test_waiting_for_a_slot_takes_whichever_frees_first(tmp_path, mocker):
+    limiter = RateLimiter("dev", RateLimitOptions(concurrency=2), str(tmp_path))
+    # Try the slots in order, so the holders take slots 0 and 1.
+    mocker.patch.object(
+        rate_limit.random, "sample", side_effect=lambda population, k: list(population)
+    )
+    flock = mocker.spy(rate_limit.fcntl, "flock")
+    first, first_acquired, release_first = _hold_slot(limiter)
+    assert first_acquired.wait(5)
+    second, second_acquired, release_second = _hold_slot(limiter)
+    assert second_acquired.wait(5)
+    waiter, waiter_acquired, release_waiter = _hold_slot(limiter)
+    # Holders: one attempt and two; the waiter: both slots found busy.
+    deadline = time.monotonic() + 5
+    while flock.call_count < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # The waiter tried slot 0 first; freeing slot 1 must still let it in.
+    release_second.set()
+    assert waiter_acquired.wait(5)
+    assert first.is_alive()
+    release_first.set()
+    release_waiter.set()
+    for thread in (first, second, waiter):
+        thread.join(5)
+
+
+def test_options_from_config(tmp_path):
+    config_manager = ConfigManager(str(tmp_path / "config.toml"))
+    config_manager.set_config("rate_limit", "10")
+    config_manager.set_config("rate_limit_wallets", "2")
+    config_manager.set_config("rate_limit_concurrency", "4")
+    options = RateLimitOptions.from_config(config_manager)
+    assert options.rate_for("wallets") == 2
+    assert options.rate_for("transactions") == 10
+    assert options.concurrency == 4
+
+
+@pytest.mark.parametrize(
+    "key, value",
+    [
+        ("rate_limit", "fast"),
+        ("rate_limit_burst", "1O"),
+        ("rate_limit_concurrency", "2.5"),
+        ("rate_limit_wallets", "-1"),
+    ],
+)
+def test_invalid_options_in_config(tmp_path, key, value):
+    config_manager = ConfigManager(str(tmp_path / "config.toml"))
+    config_manager.set_config(key, value)
+    with pytest.raises(click.ClickException, match=f"Invalid {key} in config"):
+        RateLimitOptions.from_config(config_manager)
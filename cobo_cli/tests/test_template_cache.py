@@ -0,0 +1,199 @@
+import io
+import os
+import tarfile
+
+import click
+import pytest
+
+from cobo_cli.tests.conftest import make_archive
+from cobo_cli.utils.template_cache import (
+    TEMPLATE_BASE_URL_ENV,
+    TemplateCache,
+    extract_archive,
+    fetch_template,
+)
+
+
+def test_fetch_template_caches_and_revalidates(template_host, cobo_home):
+    archive = make_archive("cobo-fastapi-template-main", {"main.py": "app = 1\n"})
+    template_host.archives["cobo-fastapi-template"] = archive
+
+    first = fetch_template("cobo-fastapi-template")
+    assert first.read_bytes() == archive
+    assert first.parent == cobo_home / "templates" / "objects"
+
+    second = fetch_template("cobo-fastapi-template")
+    assert second == first
+    # The second request was conditional and answered with 304.
+    assert template_host.requests[0][1] is None
+    assert template_host.requests[1][1] is not None
+    assert not list(first.parent.glob("*.part"))
+
+
+def test_fetch_template_refreshes_changed_archive(template_host):
+    template_host.archives["cobo-fastapi-template"] = make_archive(
+        "root", {"a.txt": "one"}
+    )
+    first = fetch_template("cobo-fastapi-template")
+    template_host.archives["cobo-fastapi-template"] = make_archive(
+        "root", {"a.txt": "two"}
+    )
+    second = fetch_template("cobo-fastapi-template")
+    assert second != first
+    assert second.read_bytes() == template_host.archives["cobo-fastapi-template"]
+
+
+def test_fetch_template_offline(template_host):
+    with pytest.raises(click.ClickException, match="not cached"):
+        fetch_template("cobo-fastapi-template", offline=True)
+
+    template_host.archives["cobo-fastapi-template"] = make_archive(
+        "root", {"a.txt": "one"}
+    )
+    cached = fetch_template("cobo-fastapi-template")
+    requests_made = len(template_host.requests)
+    assert fetch_template("cobo-fastapi-template", offline=True) == cached
+    assert len(template_host.requests) == requests_made
+
+
+def test_fetch_template_falls_back_to_cache(cobo_home, monkeypatch, tmp_path):
+    cache = TemplateCache()
+    writer = cache.open_object_writer()
+    writer.write(b"archive")
+    path = writer.commit()
+    cache.write_ref("cobo-fastapi-template", "main", {"sha256": writer.digest})
+    # Nothing listens here, so the refresh fails.
+    monkeypatch.setenv(TEMPLATE_BASE_URL_ENV, "http://127.0.0.1:9")
+
+    assert fetch_template("cobo-fastapi-template") == path
+
+
+def test_app_init_fetches_sub_projects(template_host, invoke_cli, tmp_path):
+    template_host.archives["cobo-react-template"] = make_archive(
+        "cobo-react-template-main",
+        {"package.json": "{}\n", ".code_gen.yaml": ""},
+    )
+    template_host.archives["cobo-fastapi-template"] = make_archive(
+        "cobo-fastapi-template-main",
+        {
+            "main.py": "# %if auth == apikey\nuse_api_key = True\n# %endif\n",
+            ".code_gen.yaml": "",
+        },
+    )
+    args = [
+        "app",
+        "init",
+        "--app-type",
+        "web",
+        "--web",
+        "react",
+        "--backend",
+        "fastapi",
+        "--wallet-type",
+        "custodial-web3",
+        "--auth",
+        "apikey",
+    ]
+
+    project_dir = tmp_path / "my-app"
+    result = invoke_cli([*args, "-d", str(project_dir)])
+    assert result.exit_code == 0, result.output
+    assert (project_dir / "frontend" / "package.json").exists()
+    assert (project_dir / "backend" / "main.py").read_text() == "use_api_key = True\n"
+
+    template_host.archives.clear()
+    offline_dir = tmp_path / "offline-app"
+    result = invoke_cli([*args, "--offline", "-d", str(offline_dir)])
+    assert result.exit_code == 0, result.output
+    assert (offline_dir / "backend" / "main.py").exists()
+
+
+def test_app_init_offline_without_cache(template_host, invoke_cli, tmp_path):
+    result = invoke_cli(
+        [
+            "app",
+            "init",
+            "--app-type",
+            "web",
+            "--web",
+            "react",
+            "--backend",
+            "fastapi",
+            "--wallet-type",
+            "custodial-web3",
+            "--auth",
+            "apikey",
+            "--offline",
+            "-d",
+            str(tmp_path / "app"),
+        ]
+    )
+    assert result.exit_code != 0
+    assert "not cached" in result.output
+
+
+def test_fetch_template_extracts_while_downloading(template_host, tmp_path):
+    archive = make_archive(
+        "cobo-fastapi-template-main", {"main.py": "app = 1\n", "app/api.py": "x\n"}
+    )
+    template_host.archives["cobo-fastapi-template"] = archive
+
+    target = tmp_path / "backend"
+    path = fetch_template("cobo-fastapi-template", extract_to=str(target))
+    assert path.read_bytes() == archive
+    assert (target / "main.py").read_text() == "app = 1\n"
+    assert (target / "app" / "api.py").read_text() == "x\n"
+    assert not (target / "cobo-fastapi-template-main").exists()
+
+    # A 304 extracts the cached copy.
+    again = tmp_path / "again"
+    fetch_template("cobo-fastapi-template", extract_to=str(again))
+    assert (again / "main.py").read_text() == "app = 1\n"
+
+
+def test_failed_refresh_does_not_mix_versions(template_host, tmp_path):
+    template_host.archives["cobo-fastapi-template"] = make_archive(
+        "root", {"a.txt": "one"}
+    )
+    fetch_template("cobo-fastapi-template")
+    # The new version's first files arrive, then the download breaks off.
+    archive = make_archive(
+        "root", {"new.txt": "new", "a.txt": "two", "big.bin": os.urandom(1 << 18).hex()}
+    )
+    template_host.archives["cobo-fastapi-template"] = archive
+    template_host.truncate["cobo-fastapi-template"] = len(archive) // 2
+
+    target = tmp_path / "backend"
+    fetch_template("cobo-fastapi-template", extract_to=str(target))
+    assert sorted(os.listdir(target)) == ["a.txt"]
+    assert (target / "a.txt").read_text() == "one"
+    assert not list(tmp_path.glob(".backend.*"))
+
+
+def test_extract_archive_skips_unsafe_members(tmp_path):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, kind, linkname in [
+            ("root", tarfile.DIRTYPE, ""),
+            ("root/ok.txt", tarfile.REGTYPE, ""),
+            ("root/../../evil.txt", tarfile.REGTYPE, ""),
+            ("/abs.txt", tarfile.REGTYPE, ""),
+            ("root/escape", tarfile.SYMTYPE, "../../outside"),
+            ("root/inside", tarfile.SYMTYPE, "ok.txt"),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.type = kind
+            info.linkname = linkname
+            data = b"data" if kind == tarfile.REGTYPE else b""
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data) if data else None)
+    buffer.seek(0)
+
+    target = tmp_path / "out" / "project"
+    target.mkdir(parents=True)
+    extract_archive(buffer, str(target))
+
+    assert sorted(p.name for p in target.iterdir()) == ["inside", "ok.txt"]
+    assert (target / "inside").read_text() == "data"
+    assert not (tmp_path / "evil.txt").exists()
+    assert not (tmp_path / "out" / "evil.txt").exists()
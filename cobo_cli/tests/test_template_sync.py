@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+from cobo_cli.tests.conftest import make_archive
+from cobo_cli.utils.app import create_sub_project
+from cobo_cli.utils.template_sync import LOCK_FILE, merge3
+
+REPO = "cobo-fastapi-template"
+ROOT = "cobo-fastapi-template-main"
+RULES = '"mobile_only/":\n  - app_type: mobile\n'
+
+V1 = {
+    ".code_gen.yaml": RULES,
+    "main.py": "# %if auth == org\norg = True\n# %endif\nline1\nline2\n",
+    "settings.py": "a = 1\nb = 2\nc = 3\n",
+    "untouched.py": "x = 1\n",
+    "gone.py": "old\n",
+    "edited_gone.py": "old\n",
+    "conflict.py": "v = 1\n",
+    "mobile_only/app.py": "m\n",
+}
+V2 = {
+    ".code_gen.yaml": RULES,
+    "main.py": "# %if auth == org\norg = True\n# %endif\nline1\nline2 changed\n",
+    "settings.py": "a = 1\nb = 2\nc = 30\n",
+    "untouched.py": "x = 1\n",
+    "conflict.py": "v = 3\n",
+    "mobile_only/app.py": "m2\n",
+    "new.py": "new\n",
+}
+
+
+def lines(text):
+    return text.splitlines(keepends=True)
+
+
+def test_merge3_combines_independent_changes():
+    merged, conflicts = merge3(
+        lines("a\nb\nc\nd\n"), lines("a\nB\nc\nd\n"), lines("a\nb\nc\nD\ne\n")
+    )
+    assert "".join(merged) == "a\nB\nc\nD\ne\n"
+    assert conflicts == 0
+
+
+def test_merge3_marks_conflicts():
+    merged, conflicts = merge3(lines("a\nb\nc"), lines("a\nlocal\nc"), lines("a\nnew"))
+    assert conflicts == 1
+    assert "".join(merged) == (
+        "a\n<<<<<<< local\nlocal\nc\n=======\nnew\n>>>>>>> template\n"
+    )
+
+
+@pytest.fixture
+def project(template_host, tmp_path):
+    template_host.archives[REPO] = make_archive(ROOT, V1)
+    create_sub_project(
+        str(tmp_path / "app"), "backend", "web", "fastapi", "Custodial", "org"
+    )
+    return tmp_path / "app"
+
+
+def test_app_init_writes_lockfile(project):
+    lock = json.loads((project / "backend" / LOCK_FILE).read_text())
+    assert lock["repo"] == REPO
+    assert lock["context"] == {
+        "app_type": "web",
+        "wallet_type": "Custodial",
+        "auth": "org",
+    }
+    assert "mobile_only/app.py" not in lock["files"]
+    assert set(lock["files"]) == set(V1) - {"mobile_only/app.py"}
+
+
+def test_sync_template_merges_local_edits(project, template_host, invoke_cli):
+    backend = project / "backend"
+    (backend / "settings.py").write_text("a = 10\nb = 2\nc = 3\n")
+    (backend / "edited_gone.py").write_text("edited\n")
+    (backend / "conflict.py").write_text("v = 2\n")
+    template_host.archives[REPO] = make_archive(ROOT, V2)
+
+    result = invoke_cli(["app", "sync-template", "-d", str(project)])
+    assert result.exit_code == 1
+    assert "backend: 1 added, 1 updated, 1 merged, 1 removed, 1 kept, 1 conflicts" in (
+        result.output
+    )
+    assert "1 file(s) have conflicting changes" in result.output
+
+    assert (backend / "main.py").read_text() == "org = True\nline1\nline2 changed\n"
+    assert (backend / "settings.py").read_text() == "a = 10\nb = 2\nc = 30\n"
+    assert (backend / "untouched.py").read_text() == "x = 1\n"
+    assert (backend / "new.py").read_text() == "new\n"
+    assert not (backend / "gone.py").exists()
+    assert (backend / "edited_gone.py").read_text() == "edited\n"
+    assert not (backend / "mobile_only").exists()
+    assert "<<<<<<< local\nv = 2\n=======\nv = 3\n>>>>>>> template\n" == (
+        (backend / "conflict.py").read_text()
+    )
+
+    result = invoke_cli(["app", "sync-template", "-d", str(project)])
+    assert result.exit_code == 0, result.output
+    assert "backend: up to date" in result.output
+
+
+def test_sync_template_only_renders_changed_sources(
+    project, template_host, invoke_cli, mocker
+):
+    template_host.archives[REPO] = make_archive(ROOT, {**V1, "new.py": "new\n"})
+    render = mocker.patch(
+        "cobo_cli.utils.code_gen.TemplateCodeGen.render_file_content",
+        side_effect=lambda data, context: data,
+        autospec=False,
+    )
+    result = invoke_cli(["app", "sync-template", "-d", str(project / "backend")])
+    assert result.exit_code == 0, result.output
+    assert ".: 1 added" in result.output
+    rendered = {call.args[0] for call in render.call_args_list}
+    assert rendered <= {b"new\n", RULES.encode()}
+
+
+def test_sync_template_dry_run(project, template_host, invoke_cli):
+    backend = project / "backend"
+    lock = (backend / LOCK_FILE).read_text()
+    template_host.archives[REPO] = make_archive(ROOT, V2)
+
+    result = invoke_cli(["app", "sync-template", "--dry-run", "-d", str(project)])
+    assert "added: new.py" in result.output
+    assert not (backend / "new.py").exists()
+    assert (backend / "gone.py").exists()
+    assert (backend / LOCK_FILE).read_text() == lock
+
+
+def test_sync_template_without_lockfile(invoke_cli, tmp_path):
+    result = invoke_cli(["app", "sync-template", "-d", str(tmp_path)])
+    assert result.exit_code != 0
+    assert f"No {LOCK_FILE} found" in result.output
@@ -0,0 +1,78 @@
+import itertools
+import threading
+import time
+
+from cobo_cli.utils.ws import RecentIds, WebSocketSession
+
+
+def _log(request_uuid):
+    return {"message": {"message": {"api_request_uuid": request_uuid}}}
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_session_reconnects_resubscribes_and_dedupes(ws_server):
+    server = ws_server(
+        [
+            [_log("a"), _log("b")],
+            [_log("b"), {"message": {}}, _log("c")],
+        ]
+    )
+    attempts = itertools.count(1)
+    received = []
+    subscription = {"type": "subscribe", "action": "api_logs_fetch", "message": {}}
+    session = WebSocketSession(
+        server.url,
+        headers_factory=lambda: {"Biz-Api-Nonce": str(next(attempts))},
+        subscription=subscription,
+        on_event=received.append,
+        event_id=lambda event: event.get("api_request_uuid"),
+        ping_interval=0.2,
+        ping_timeout=0.1,
+        reconnect_base=0.01,
+    )
+    thread = threading.Thread(target=session.run, daemon=True)
+    thread.start()
+
+    _wait_for(lambda: len(received) == 3 and server.pings)
+    session.close()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert [event["api_request_uuid"] for event in received] == ["a", "b", "c"]
+    assert session.connections == 2
+    assert server.subscriptions == [subscription, subscription]
+    # Every connection is signed with fresh headers.
+    assert [h["biz-api-nonce"] for h in server.handshakes] == ["1", "2"]
+
+
+def test_session_gives_up_after_max_reconnects():
+    attempts = []
+    session = WebSocketSession(
+        "ws://127.0.0.1:9",
+        headers_factory=lambda: attempts.append(1) or {},
+        subscription={},
+        on_event=lambda event: None,
+        reconnect_base=0.01,
+        max_reconnects=2,
+    )
+
+    session.run()
+
+    assert len(attempts) == 3
+    assert session.connections == 0
+
+
+def test_recent_ids_is_bounded():
+    recent_ids = RecentIds(maxsize=2)
+    assert recent_ids.add("a")
+    assert recent_ids.add("b")
+    assert not recent_ids.add("a")
+    assert recent_ids.add("c")
+    # "b" was the least recently seen and has been evicted.
+    assert recent_ids.add("b")
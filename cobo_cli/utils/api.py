@@ -1,5 +1,7 @@
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 
 import click
@@ -12,13 +14,19 @@ from cobo_cli.utils.app import (
     app_directory_with_env_file,
     validate_manifest_and_get_app_id,
 )
+from cobo_cli.utils.http import backoff_delay, should_retry
 from cobo_cli.utils.openapi import (
     format_help,
     get_api_details,
     get_parameter_help,
+    get_resolver,
+    is_cursor_paginated,
     load_api_spec,
+    match_route,
     resolve_reference,
+    schema_properties,
 )
+from cobo_cli.utils.rate_limit import credential_id, endpoint_group
 from cobo_cli.utils.signer import Signer
 
 
@@ -39,32 +47,31 @@ def prepare_auth_headers(key, secret, method, path, nonce, params, body):
     }
 
 
-def make_request(ctx, method, path, prefix="/v2", auth=None, **kwargs):
-    command_context: CommandContext = ctx.obj
-    auth = auth or command_context.auth_method
-    config_manager = command_context.config_manager
-    base_url = config_manager.get_config("api_host")
+_nonce_lock = threading.Lock()
+_last_nonce = 0
 
-    # Replace path parameters with their values
-    path_params = kwargs.pop("path_params", {})
-    for param, value in path_params.items():
-        path = path.replace(f"{{{param}}}", value)
 
-    path = prefix + path
+def next_nonce():
+    """Millisecond timestamp nonce, strictly increasing within the process."""
+    global _last_nonce
+    with _nonce_lock:
+        _last_nonce = max(int(time.time() * 1000), _last_nonce + 1)
+        return _last_nonce
 
-    url = f"{base_url}{path}"
 
-    headers = {}
-    nonce = int(time.time() * 1000)
-    params = urlencode(kwargs.get("params", {}))
-    body = json.dumps(kwargs.get("json", {})) if kwargs.get("json") else ""
+def get_request_credentials(ctx, auth):
+    """Return ``(key, secret, bearer_token)`` for an authentication method."""
+    command_context: CommandContext = ctx.obj
+    config_manager = command_context.config_manager
 
     if auth == AuthMethodType.APIKEY:
         key = config_manager.get_config("api_key")
         secret = config_manager.get_config("api_secret")
-        headers.update(
-            prepare_auth_headers(key, secret, method, path, nonce, params, body)
-        )
+        if not key or not secret:
+            raise click.ClickException(
+                "Key or secret not found. Please run 'cobo keys generate' to generate a new key pair."
+            )
+        return key, secret, None
     elif auth == AuthMethodType.ORG:
         if not app_directory_with_env_file():
             raise click.ClickException(
@@ -79,42 +86,95 @@ def make_request(ctx, method, path, prefix="/v2", auth=None, **kwargs):
         app_key = manifest.app_key
         app_secret = get_key(".env", "APP_SECRET")
         org_token = get_key(".env", f"ORG_TOKEN_{get_key('.env', 'CURRENT_ORG_UUID')}")
-
-        headers.update(
-            prepare_auth_headers(app_key, app_secret, method, path, nonce, params, body)
-        )
-        if org_token:
-            headers["Authorization"] = f"Bearer {org_token}"
+        if not app_key or not app_secret:
+            raise click.ClickException(
+                "Key or secret not found. Please run 'cobo keys generate' to generate a new key pair."
+            )
+        return app_key, app_secret, org_token
     elif auth == AuthMethodType.USER:
-        user_token = config_manager.get_config("user_access_token")
-        if user_token:
-            headers["Authorization"] = f"Bearer {user_token}"
+        return None, None, config_manager.get_config("user_access_token")
     elif auth == AuthMethodType.NONE:
-        pass
+        return None, None, None
     else:
         raise click.ClickException(f"Invalid authentication method: {auth}")
 
-    click.echo(f"Making {method} request to {url}")
 
-    response = requests.request(method, url, headers=headers, **kwargs)
+def make_request(ctx, method, path, prefix="/v2", auth=None, echo=True, **kwargs):
+    command_context: CommandContext = ctx.obj
+    auth = auth or command_context.auth_method
+    config_manager = command_context.config_manager
+    base_url = config_manager.get_config("api_host")
 
-    return response
+    # Replace path parameters with their values
+    path_params = kwargs.pop("path_params", {})
+    for param, value in path_params.items():
+        path = path.replace(f"{{{param}}}", value)
+
+    group = endpoint_group(path)
+    path = prefix + path
+
+    url = f"{base_url}{path}"
+
+    params = urlencode(kwargs.get("params", {}))
+    body = json.dumps(kwargs.get("json", {})) if kwargs.get("json") else ""
+    key, secret, bearer_token = get_request_credentials(ctx, auth)
+
+    if echo:
+        click.echo(f"Making {method} request to {url}")
+
+    options = command_context.http_options
+    session = command_context.http_session
+    limiter = command_context.rate_limiter
+    credential = credential_id(key or bearer_token)
+    bucket = limiter.bucket(credential, group)
+    attempt = 0
+    while True:
+        # Wait for the rate limit before signing, so the nonce is fresh.
+        bucket.acquire()
+        # Every attempt gets a fresh nonce and therefore a fresh signature.
+        headers = {}
+        if key and secret:
+            headers.update(
+                prepare_auth_headers(
+                    key, secret, method, path, next_nonce(), params, body
+                )
+            )
+        if bearer_token:
+            headers["Authorization"] = f"Bearer {bearer_token}"
+
+        response = error = None
+        try:
+            with limiter.slot(credential):
+                response = session.request(
+                    method, url, headers=headers, timeout=options.timeout, **kwargs
+                )
+        except requests.RequestException as e:
+            error = e
+        bucket.observe(response)
+
+        if attempt >= options.max_retries or not should_retry(method, response, error):
+            if error is not None:
+                raise error
+            return response
+
+        delay = backoff_delay(attempt, options, response)
+        reason = response.status_code if response is not None else error
+        click.echo(
+            f"Request failed ({reason}), retrying in {delay:.1f}s "
+            f"[{attempt + 1}/{options.max_retries}]",
+            err=True,
+        )
+        if response is not None:
+            response.close()
+        time.sleep(delay)
+        attempt += 1
 
 
 def handle_api_request(ctx, spec, path, method, params=None):
-    api_details, matched_path = get_api_details(spec, path, method)
+    api_details, matched_path, path_params = match_route(spec, path, method)
 
     if api_details:
         request_params = {}
-        path_params = {}
-
-        # Extract path parameters
-        spec_parts = matched_path.split("/")
-        input_parts = path.split("/")
-        for spec_part, input_part in zip(spec_parts, input_parts):
-            if spec_part.startswith("{") and spec_part.endswith("}"):
-                param_name = spec_part[1:-1]
-                path_params[param_name] = input_part
 
         if params:
             request_params = params
@@ -186,34 +246,95 @@ def handle_api_request(ctx, spec, path, method, params=None):
         click.echo(f"No {method.upper()} operation found for path: {path}")
 
 
+def iter_pages(ctx, path, params=None, path_params=None, prefetch=True):
+    """Yield the JSON pages of a cursor-paginated GET, following ``after``.
+
+    With ``prefetch`` the next page is requested while the caller is still
+    consuming the current one, so at most two pages are held in memory.
+    """
+    params = dict(params or {})
+
+    def fetch(cursor):
+        page_params = {**params, "after": cursor} if cursor else params
+        response = make_request(
+            ctx,
+            "GET",
+            path,
+            echo=False,
+            params=page_params,
+            path_params=path_params or {},
+        )
+        if response.status_code >= 400:
+            raise click.ClickException(
+                f"Request failed with status {response.status_code}: {response.text}"
+            )
+        return response.json()
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(fetch, params.get("after"))
+    try:
+        while future is not None:
+            page = future.result()
+            cursor = (page.get("pagination") or {}).get("after")
+            has_next = bool(cursor and page.get("data"))
+            future = executor.submit(fetch, cursor) if has_next and prefetch else None
+            yield page
+            if has_next and future is None:
+                future = executor.submit(fetch, cursor)
+    finally:
+        # Do not wait for a prefetched page nobody is going to read.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_api_items(ctx, spec, path, params=None, max_items=None):
+    """Write every item of a cursor-paginated list endpoint as NDJSON."""
+    _, matched_path, path_params = match_route(spec, path, "GET")
+    if not is_cursor_paginated(spec, matched_path, "GET"):
+        raise click.ClickException(
+            f"GET {matched_path} does not support cursor pagination."
+        )
+
+    count = 0
+    for page in iter_pages(ctx, matched_path, params, path_params):
+        for item in page.get("data", ()):
+            click.echo(json.dumps(item))
+            count += 1
+            if max_items is not None and count >= max_items:
+                return count
+    return count
+
+
 def validate_parameters(spec, path, method, params):
     api_details, matched_path = get_api_details(spec, path, method)
     if not api_details:
         return False, f"No {method.upper()} operation found for path: {path}"
 
+    operation = get_resolver(spec).operation(matched_path, method)
     valid_params = set()
     if method.lower() in ["get", "delete"]:
-        for param in api_details.get("parameters", []):
-            if "$ref" in param:
-                param = resolve_reference(spec, param["$ref"])
+        for param in operation.get("parameters", []):
             valid_params.add(param.get("name"))
     else:  # POST or PUT
-        if "requestBody" in api_details:
-            request_body = api_details["requestBody"]
-            if "$ref" in request_body:
-                request_body = resolve_reference(spec, request_body["$ref"])
-            content = request_body.get("content", {}).get("application/json", {})
-            schema = content.get("schema", {})
-            if "$ref" in schema:
-                schema = resolve_reference(spec, schema["$ref"])
-                if "discriminator" in schema:
-                    property_name = schema["discriminator"]["propertyName"]
-                    property_mapping = schema["discriminator"]["mapping"]
-                    property_mapping_key = params[property_name]
-                    schema = resolve_reference(
-                        spec, property_mapping[property_mapping_key]
+        if "requestBody" in operation:
+            content = operation["requestBody"].get("content", {})
+            schema = content.get("application/json", {}).get("schema", {})
+            if "discriminator" in schema:
+                property_name = schema["discriminator"]["propertyName"]
+                property_mapping = schema["discriminator"].get("mapping", {})
+                if params.get(property_name) in property_mapping:
+                    schema = get_resolver(spec).dereference(
+                        {"$ref": property_mapping[params[property_name]]}
                     )
-            valid_params = set(schema.get("properties", {}).keys())
+                else:
+                    # Without a (valid) discriminator value accept any variant
+                    schema = {
+                        "properties": {
+                            prop: None
+                            for variant in schema.get("oneOf", ())
+                            for prop in schema_properties(variant)
+                        }
+                    }
+            valid_params = set(schema_properties(schema))
 
     invalid_params = set(params.keys()) - valid_params
     if invalid_params:
@@ -247,6 +368,27 @@ def get_operation_help(spec, path, method):
         )
 
 
+def pagination_options(method):
+    """Add ``--all``/``--max-items`` to the GET command only."""
+
+    def decorator(f):
+        if method != "get":
+            return f
+        f = click.option(
+            "--max-items",
+            type=click.IntRange(min=1),
+            help="Like --all, but stop after this many items.",
+        )(f)
+        return click.option(
+            "--all",
+            "fetch_all",
+            is_flag=True,
+            help="Follow pagination cursors and stream every item as NDJSON.",
+        )(f)
+
+    return decorator
+
+
 def create_api_command(method):
     @click.command(
         method,
@@ -263,8 +405,9 @@ def create_api_command(method):
     @click.option(
         "-l", "--list", is_flag=True, help="List all API operations for this method"
     )
+    @pagination_options(method)
     @click.pass_context
-    def command(ctx, path, describe, list):
+    def command(ctx, path, describe, list, fetch_all=False, max_items=None):
         """Make a {method} request to a Cobo API endpoint."""
 
         command_context: CommandContext = ctx.obj
@@ -335,6 +478,10 @@ def create_api_command(method):
             click.echo(f"Error: {error_message}", err=True)
             return
 
+        if fetch_all or max_items is not None:
+            stream_api_items(ctx, spec, path, params, max_items=max_items)
+            return
+
         handle_api_request(ctx, spec, path, method.upper(), params)
 
     return command
@@ -1,7 +1,6 @@
 import logging
 import os
 import tarfile
-import tempfile
 from pathlib import Path
 
 import click
@@ -12,46 +11,12 @@ from cobo_cli.data.environments import EnvironmentType
 from cobo_cli.data.manifest import Manifest
 from cobo_cli.utils.code_gen import ProcessContext, TemplateCodeGen
 from cobo_cli.utils.config import default_manifest_file
+from cobo_cli.utils.template_cache import fetch_template
+from cobo_cli.utils.template_sync import hash_tree, write_lock
 
 logger = logging.getLogger(__name__)
-GITHUB_REPO_BASE_URL = "https://github.com/CoboGlobal"
 
-
-def download_file(url: str, path: str) -> None:
-    """
-    Download a file from a given URL and save it to the specified path.
-    """
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-
-    # Only create directories if the path is not a temporary file
-    if not path.startswith("/var/folders") and not path.startswith("/tmp"):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-
-    with open(path, "wb") as file:
-        for chunk in response.iter_content(chunk_size=8192):
-            file.write(chunk)
-
-
-def extract_file(file_path: str, directory: str):
-    with tarfile.open(file_path, "r:gz") as tar_ref:
-        root_dirs = []
-        for member in tar_ref.getmembers():
-            if member.isdir():
-                r_dir = member.name.split("/")
-                r_dir = r_dir[0]
-                if r_dir not in root_dirs:
-                    root_dirs.append(r_dir)
-        if len(root_dirs) == 1:
-            root_dir = root_dirs[0].rstrip("/")
-            for member in tar_ref.getmembers():
-                if member.name.rstrip("/") != root_dir and member.name.startswith(
-                    root_dir + "/"
-                ):
-                    member.name = member.name[len(root_dir + "/") :]
-                    tar_ref.extract(member, directory)
-        else:
-            tar_ref.extractall(directory)
+TEMPLATE_REF = "main"
 
 
 def is_app_directory() -> bool:
@@ -100,6 +65,12 @@ def validate_manifest_and_get_app_id(
     return manifest, app_id
 
 
+def get_template_repo_name(framework: str) -> str:
+    if framework == "flutter":
+        return "cobo-ucw-flutter-template"
+    return f"cobo-{framework}-template"
+
+
 def create_sub_project(
     project_dir: str,
     sub_dir: str,
@@ -107,22 +78,18 @@ def create_sub_project(
     framework: str,
     wallet_type: str,
     auth: str,
+    offline: bool = False,
 ):
     sub_project_dir = os.path.join(project_dir, sub_dir)
     os.makedirs(sub_project_dir, exist_ok=True)
 
-    if framework == "flutter":
-        repo_name = "cobo-ucw-flutter-template"
-    else:
-        repo_name = f"cobo-{framework}-template"
-    archive_url = f"{GITHUB_REPO_BASE_URL}/{repo_name}/archive/main.tar.gz"
-
+    repo_name = get_template_repo_name(framework)
     try:
-        with tempfile.NamedTemporaryFile(suffix=".tar.gz", delete=False) as temp_file:
-            temp_file_path = temp_file.name
-            download_file(archive_url, temp_file_path)
-
-            extract_file(temp_file_path, sub_project_dir)
+        archive_path = fetch_template(
+            repo_name, TEMPLATE_REF, offline=offline, extract_to=sub_project_dir
+        )
+    except click.ClickException:
+        raise
     except requests.RequestException as e:
         logger.error(f"Failed to download template: {e}")
         raise click.ClickException(f"Failed to download template: {e}")
@@ -132,17 +99,21 @@ def create_sub_project(
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}")
         raise click.ClickException(f"An unexpected error occurred: {e}")
-    finally:
-        # Clean up the temporary file
-        if "temp_file_path" in locals():
-            try:
-                os.unlink(temp_file_path)
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file {temp_file_path}: {e}")
 
     # Call post_process after extracting the template
     post_process(sub_project_dir, app_type, wallet_type, auth)
 
+    # Record what was generated, for `app sync-template`
+    context = ProcessContext(app_type=app_type, wallet_type=wallet_type, auth=auth)
+    write_lock(
+        sub_project_dir,
+        repo_name,
+        TEMPLATE_REF,
+        archive_path,
+        context,
+        hash_tree(sub_project_dir),
+    )
+
 
 def post_process(sub_project_dir: str, app_type: str, wallet_type: str, auth: str):
     """后处理项目文件"""
@@ -1,14 +1,30 @@
+import hashlib
 import logging
 import os
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import yaml
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
+# Every template block starts with an ``%if`` directive.
+DIRECTIVE_MARKER = b"%if"
+# A directive is a whole comment line: ``# %if ...``, ``// %elif ...``,
+# ``{/* %else */}`` or ``# %endif``.
+_DIRECTIVE_RE = re.compile(
+    r"^\s*(?:#|//|(?P<jsx>\{/\*))\s*%(?P<name>if|elif|else|endif)\b(?P<rest>.*)$"
+)
+# Compiled templates, keyed by content hash
+_COMPILED_CACHE_SIZE = 1024
+_compiled_templates: "OrderedDict[bytes, CompiledTemplate]" = OrderedDict()
+_compiled_lock = threading.Lock()
+
 
 class ProcessContext(BaseModel):
     """Context information for file processing"""
@@ -22,6 +38,135 @@ class ProcessContext(BaseModel):
         return getattr(self, key, default)
 
 
+class Condition:
+    """A compiled ``%if``/``%elif`` condition: ``key op value``"""
+
+    __slots__ = ("key", "op", "value")
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) < 2:
+            raise ValueError(f"Invalid template condition: {expression!r}")
+        self.key, self.op = parts[0], parts[1]
+        value = " ".join(parts[2:])
+        if self.op == "not" and parts[2:3] == ["in"]:
+            self.op = "not in"
+            value = " ".join(parts[3:])
+        if self.op in ("in", "not in"):
+            value = frozenset(v.strip() for v in value.strip("[]").split(","))
+        self.value = value
+
+    def evaluate(self, context: ProcessContext) -> bool:
+        current_value = context.get(self.key)
+        if self.op == "==":
+            return current_value == self.value
+        elif self.op == "!=":
+            return current_value != self.value
+        elif self.op == "in":
+            return current_value in self.value
+        elif self.op == "not in":
+            return current_value not in self.value
+        return False
+
+
+class _Block:
+    """An ``%if`` block: the first branch whose condition holds is rendered"""
+
+    __slots__ = ("branches", "otherwise")
+
+    def __init__(self, condition: Condition):
+        self.branches: List[Tuple[Condition, list]] = [(condition, [])]
+        self.otherwise: Optional[list] = None
+
+
+class CompiledTemplate:
+    """A template parsed once into text runs and ``%if`` blocks.
+
+    Rendering only descends into the branches that apply, so its cost is
+    proportional to the output rather than to the template and its nesting.
+    """
+
+    def __init__(self, content: str):
+        self.body: list = []
+        # Each open block and the body that lines are currently added to
+        stack: List[Tuple[Optional[_Block], list]] = [(None, self.body)]
+        text: List[str] = []
+
+        def flush():
+            if text:
+                stack[-1][1].append(text.copy())
+                text.clear()
+
+        for line in content.split("\n"):
+            match = _DIRECTIVE_RE.match(line) if "%" in line else None
+            if match and match.group("jsx"):
+                rest = match.group("rest").rstrip()
+                if not rest.endswith("*/}"):
+                    match = None
+            if not match:
+                text.append(line)
+                continue
+
+            flush()
+            name = match.group("name")
+            rest = match.group("rest").strip()
+            if match.group("jsx"):
+                rest = rest[:-3].strip()
+            block = stack[-1][0]
+            if name == "if":
+                block = _Block(Condition(rest))
+                stack[-1][1].append(block)
+                stack.append((block, block.branches[0][1]))
+            elif block is None:
+                # Stray %elif/%else/%endif outside any block
+                continue
+            elif name == "elif" and block.otherwise is None:
+                branch: list = []
+                block.branches.append((Condition(rest), branch))
+                stack[-1] = (block, branch)
+            elif name == "else" and block.otherwise is None:
+                block.otherwise = []
+                stack[-1] = (block, block.otherwise)
+            elif name == "endif":
+                stack.pop()
+        # Blocks left open run to the end of the template.
+        flush()
+
+    def render(self, context: ProcessContext) -> str:
+        lines: List[str] = []
+        self._render(self.body, context, lines)
+        return "\n".join(lines)
+
+    def _render(self, body: list, context: ProcessContext, lines: List[str]):
+        for node in body:
+            if isinstance(node, list):
+                lines.extend(node)
+                continue
+            for condition, branch in node.branches:
+                if condition.evaluate(context):
+                    self._render(branch, context, lines)
+                    break
+            else:
+                if node.otherwise is not None:
+                    self._render(node.otherwise, context, lines)
+
+
+def compile_template(content: str) -> CompiledTemplate:
+    """Compile template content, reusing the result for identical content"""
+    key = hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+    with _compiled_lock:
+        template = _compiled_templates.get(key)
+        if template is not None:
+            _compiled_templates.move_to_end(key)
+            return template
+    template = CompiledTemplate(content)
+    with _compiled_lock:
+        _compiled_templates[key] = template
+        if len(_compiled_templates) > _COMPILED_CACHE_SIZE:
+            _compiled_templates.popitem(last=False)
+    return template
+
+
 class Rule:
     """Class representing a single rule"""
 
@@ -94,17 +239,59 @@ class Rule:
         return True
 
 
+class RuleMatcher:
+    """Rules compiled for one processing context.
+
+    The context is fixed for a run, so each rule is evaluated once up front.
+    Patterns are indexed by the path (``exact``) or directory (``prefixes``,
+    from ``dir/*`` patterns) they match, so deciding a path costs one dict
+    lookup per path component however many rules there are. As before, the
+    first matching pattern in the rules file decides.
+    """
+
+    def __init__(self, rules: Dict[str, Rule], context: ProcessContext):
+        self.exact: Dict[str, Tuple[int, bool]] = {}
+        self.prefixes: Dict[str, Tuple[int, bool]] = {}
+        for order, (pattern, rule) in enumerate(rules.items()):
+            pattern = str(Path(pattern))
+            decision = (order, rule.evaluate(context))
+            if pattern.endswith("/*"):
+                self.prefixes.setdefault(pattern[:-2], decision)
+            else:
+                self.exact.setdefault(pattern, decision)
+
+    def should_process(self, normalized_path: str) -> bool:
+        best = self.exact.get(normalized_path)
+        if self.prefixes:
+            index = normalized_path.find(os.sep)
+            while index != -1:
+                found = self.prefixes.get(normalized_path[:index])
+                if found is not None and (best is None or found[0] < best[0]):
+                    best = found
+                index = normalized_path.find(os.sep, index + 1)
+        # Keep file by default
+        return True if best is None else best[1]
+
+
 class CodeGen:
     """Main code generator class"""
 
-    def __init__(self, code_gen_file: Optional[Union[str, Path]] = None):
+    def __init__(
+        self,
+        code_gen_file: Optional[Union[str, Path]] = None,
+        max_workers: Optional[int] = None,
+    ):
         """Initialize code generator
 
         Args:
             code_gen_file: Path to .code_gen.yaml file
+            max_workers: Number of files processed in parallel (default: one
+                per CPU core; 1 processes them sequentially)
         """
         self.code_gen_file = Path(code_gen_file) if code_gen_file else None
+        self.max_workers = max_workers or os.cpu_count() or 1
         self.rules: Dict[str, Rule] = {}
+        self._matchers: Dict[Tuple, RuleMatcher] = {}
         self._load_rules()
 
     def _load_rules(self) -> None:
@@ -114,17 +301,20 @@ class CodeGen:
             return
 
         try:
-            with self.code_gen_file.open("r") as f:
-                raw_rules = yaml.safe_load(f) or {}
-
-            for pattern, rule_list in raw_rules.items():
-                if not isinstance(rule_list, list):
-                    raise ValueError(f"Rules for {pattern} must be a list")
-                self.rules[pattern] = Rule(rule_list)
+            self.load_rules(self.code_gen_file.read_text())
         except Exception as e:
             logger.error(f"Failed to load rules: {e}")
             raise
 
+    def load_rules(self, text: str) -> None:
+        """Load rules from the content of a .code_gen.yaml file"""
+        raw_rules = yaml.safe_load(text) or {}
+        for pattern, rule_list in raw_rules.items():
+            if not isinstance(rule_list, list):
+                raise ValueError(f"Rules for {pattern} must be a list")
+            self.rules[pattern] = Rule(rule_list)
+        self._matchers.clear()
+
     def process(self, path: Union[str, Path], context: ProcessContext) -> None:
         """Process a file or directory
 
@@ -154,43 +344,30 @@ class CodeGen:
     def _process_directory(self, directory: Path, context: ProcessContext) -> None:
         """Process a directory"""
         to_remove = set()
-        to_process = set()
-        skip_paths = set()
+        to_process = []
 
         # Collect files to process and remove
         for root, dirs, files in os.walk(directory, topdown=True):
             root_path = Path(root)
-            relative_root = root_path.relative_to(directory)
+            relative_root = str(root_path.relative_to(directory))
 
-            # Check if current directory should be removed
-            if str(relative_root) != ".":
-                folder_path = str(relative_root) + "/"
+            # Check if current directory should be removed. Its subtree is
+            # pruned from the walk along with it.
+            if relative_root != ".":
+                folder_path = relative_root + "/"
                 if not self.should_process_file(folder_path, context):
                     to_remove.add(root_path)
-                    skip_paths.add(str(relative_root))
                     dirs.clear()
                     continue
 
-            # Check if parent directory is marked for removal
-            if any(
-                str(relative_root).startswith(skip_path) for skip_path in skip_paths
-            ):
-                dirs.clear()
-                continue
-
             for file in files:
-                file_path = root_path / file
-                relative_path = file_path.relative_to(directory)
-
-                if any(
-                    str(relative_path).startswith(skip_path) for skip_path in skip_paths
-                ):
-                    continue
-
-                if self.should_process_file(str(relative_path), context):
-                    to_process.add(file_path)
+                relative_path = (
+                    file if relative_root == "." else os.path.join(relative_root, file)
+                )
+                if self.should_process_file(relative_path, context):
+                    to_process.append(root_path / file)
                 else:
-                    to_remove.add(file_path)
+                    to_remove.add(root_path / file)
 
         # Execute removals (starting from deepest paths)
         sorted_removes = sorted(
@@ -209,26 +386,33 @@ class CodeGen:
             except Exception as e:
                 logger.error(f"Failed to remove {path}: {e}")
 
-        # Process files
-        for file_path in to_process:
+        # Process files, in parallel unless limited to one worker
+        def process(file_path: Path) -> None:
             if file_path.exists():
                 try:
                     self._process_file(file_path, context)
                 except Exception as e:
                     logger.error(f"Failed to process {file_path}: {e}")
 
+        if self.max_workers == 1 or len(to_process) < 2:
+            for file_path in to_process:
+                process(file_path)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for _ in executor.map(process, to_process):
+                pass
+
     def should_process_file(self, file_path: str, context: ProcessContext) -> bool:
         """Determine if a file should be processed"""
-        # Normalize file path
-        normalized_path = str(Path(file_path))
-
-        # Check all rules
-        for pattern, rule in self.rules.items():
-            if self._match_path_pattern(normalized_path, pattern):
-                return rule.evaluate(context)
+        return self.get_matcher(context).should_process(str(Path(file_path)))
 
-        # Keep file by default
-        return True
+    def get_matcher(self, context: ProcessContext) -> RuleMatcher:
+        """Return the rules compiled for ``context``"""
+        key = tuple(context.model_dump().items())
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = self._matchers[key] = RuleMatcher(self.rules, context)
+        return matcher
 
     def _match_path_pattern(self, file_path: str, pattern: str) -> bool:
         """Check if file path matches pattern"""
@@ -258,85 +442,29 @@ class TemplateCodeGen(CodeGen):
 
     def _process_file(self, file_path: Path, context: ProcessContext) -> None:
         """Process file using template engine"""
+        data = file_path.read_bytes()
+        processed = self.render_file_content(data, context)
+        if processed is not data:
+            file_path.write_bytes(processed)
+
+    def render_file_content(self, data: bytes, context: ProcessContext) -> bytes:
+        """Return the processed content of a file, or ``data`` if unchanged"""
+        # Most files have no directives at all; leave them untouched.
+        if DIRECTIVE_MARKER not in data:
+            return data
         try:
-            # Try reading as UTF-8 to check if it's a text file
-            content = file_path.read_text(encoding="utf-8")
+            # Try decoding as UTF-8 to check if it's a text file
+            content = data.decode("utf-8")
         except UnicodeDecodeError:
             # Skip non-UTF-8 files (likely binary files)
-            return
+            return data
+        # Universal newlines, as read_text would give.
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
         processed_content = self.process_template(content, context)
-        with open(file_path, "w") as f:
-            f.write(processed_content)
+        if processed_content == content:
+            return data
+        return processed_content.encode("utf-8")
 
     def process_template(self, content: str, context: ProcessContext) -> str:
         """Process template content"""
-        lines = content.split("\n")
-        processed_lines = []
-        stack = [True]  # Condition stack
-        for line in lines:
-            # Check comment lines
-            is_comment_lines = (
-                (line.strip().startswith("#") and "%" in line.strip())
-                or (line.strip().startswith("//") and "%" in line.strip())
-                or (
-                    line.strip().startswith("{/*")
-                    and line.strip().endswith("*/}")
-                    and "%" in line.strip()
-                )
-            )
-
-            if is_comment_lines:
-                if "%if" in line:
-                    condition = self._parse_condition(line, context)
-                    stack.append(condition and stack[-1])
-                elif "%elif" in line:
-                    if stack[-1]:  # Skip this block if previous condition was true
-                        stack[-1] = False
-                    else:
-                        condition = self._parse_condition(line, context)
-                        stack[-1] = condition and stack[-2]
-                elif "%else" in line:
-                    if len(stack) > 1:
-                        stack[-1] = not stack[-1] and stack[-2]
-                elif "%endif" in line:
-                    if len(stack) > 1:
-                        stack.pop()
-            elif all(stack):  # Add line only if all conditions are true
-                processed_lines.append(line)
-
-        return "\n".join(processed_lines)
-
-    def _parse_condition(self, line: str, context: ProcessContext) -> bool:
-        """Parse condition statement"""
-        condition = re.search(r"%if\s+(.+)$|%elif\s+(.+)$", line)
-        if condition:
-            cond = condition.group(1) or condition.group(2)
-            return self._eval_condition(cond, context)
-        return False
-
-    def _eval_condition(self, condition: str, context: ProcessContext) -> bool:
-        """Evaluate condition"""
-        parts = condition.split()
-        key = parts[0]
-        op = parts[1]
-        value = " ".join(parts[2:])
-        if value.endswith("*/}"):
-            value = value[:-3].strip()
-
-        if op == "==":
-            return context.get(key) == value
-        elif op == "!=":
-            return context.get(key) != value
-        elif op == "in":
-            values = self._parse_list(value)
-            return context.get(key) in values
-        elif op == "not" and parts[2] == "in":
-            values = self._parse_list(" ".join(parts[3:]))
-            return context.get(key) not in values
-
-        return False
-
-    def _parse_list(self, value: str) -> list:
-        """Parse list string"""
-        value = value.strip("[]")
-        return [v.strip() for v in value.split(",")]
+        return compile_template(content).render(context)
@@ -1,6 +1,9 @@
+import contextlib
+import copy
 import os
+import tempfile
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import tomli
 import tomli_w
@@ -9,6 +12,11 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from cobo_cli.data.environments import EnvironmentType
 
+try:
+    import fcntl
+except ImportError:  # Windows: writes are still atomic, just not serialized.
+    fcntl = None
+
 default_manifest_file = "manifest.json"
 
 user_access_token_key = "user_access_token"
@@ -45,8 +53,30 @@ class CoboSettings(BaseSettings):
         return v
 
 
+# Parsed config files, keyed by absolute path and checked against the file's
+# inode, mtime and size, so repeated ConfigManager instances (and commands run
+# by ``cobo serve``) only parse a file again once it has changed.
+_parsed_configs: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
+
+
+def _file_stamp(stat: os.stat_result) -> Tuple[int, int, int]:
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
 class ConfigManager:
-    def __init__(self, config_file: str = None, env_type: str = None):
+    """Settings from ``config.toml``.
+
+    Settings are layered: ``[common]``, then the section of the current
+    environment and, when a profile is selected, ``[profiles.<name>]``. A
+    profile may set ``environment`` to pick the environment section it
+    builds on, and any other setting such as its own ``api_key`` and
+    ``api_secret``. Setting a value with a profile selected creates the
+    profile if needed.
+    """
+
+    def __init__(
+        self, config_file: str = None, env_type: str = None, profile: str = None
+    ):
         self.config_file = config_file if config_file else self.get_config_file_path()
 
         if not os.path.exists(self.config_file):
@@ -55,28 +85,76 @@ class ConfigManager:
         if env_type is not None and env_type not in EnvironmentType.values():
             raise Exception(f"Invalid env type: {env_type}")
         self.env_type = env_type
+        self.profile = profile
         self.config_data = self.load_config_data()
-        self.settings = self.load_settings()
+        self._settings = None
 
     @classmethod
     def get_config_file_path(cls):
         return os.path.join(get_config_path(), "config.toml")
 
+    @property
+    def settings(self) -> CoboSettings:
+        # Validated on first use: commands that never read a setting don't
+        # pay for it.
+        if self._settings is None:
+            self._settings = self.load_settings()
+        return self._settings
+
     def load_config_data(self) -> Dict:
+        path = os.path.abspath(self.config_file)
         try:
-            with open(self.config_file, "rb") as f:
-                return tomli.load(f)
+            with open(path, "rb") as f:
+                stamp = _file_stamp(os.fstat(f.fileno()))
+                cached = _parsed_configs.get(path)
+                if cached is not None and cached[0] == stamp:
+                    data = cached[1]
+                else:
+                    data = tomli.load(f)
+                    _parsed_configs[path] = (stamp, data)
         except Exception as e:
             raise Exception(f"Failed to load config file: {e}")
+        # Callers modify the data in place before saving it.
+        return copy.deepcopy(data)
 
     def load_env_type(self):
         common_config = self.config_data.get("common", {})
-        return self.env_type or common_config.get("environment", "dev")
+        return (
+            self.env_type
+            or self.get_profile_config().get("environment")
+            or common_config.get("environment", "dev")
+        )
+
+    def list_profiles(self) -> List[str]:
+        return sorted(self.config_data.get("profiles", {}))
+
+    def has_profile(self, profile: str) -> bool:
+        return profile in self.config_data.get("profiles", {})
+
+    def get_profile_config(self) -> Dict:
+        if not self.profile:
+            return {}
+        return self.config_data.get("profiles", {}).get(self.profile, {})
+
+    def get_raw_config(self, key: str, default=None):
+        """Look ``key`` up in the parsed file without validating the settings.
+
+        For start-up and display paths; commands that rely on validated
+        values use :meth:`get_config`.
+        """
+        for section in (
+            self.get_profile_config(),
+            self.config_data.get(self.load_env_type(), {}),
+            self.config_data.get("common", {}),
+        ):
+            if key in section:
+                return section[key]
+        return default
 
     def load_settings(self):
         common_config = self.config_data.get("common", {})
         env_config = self.config_data.get(self.load_env_type(), {})
-        combined_config = {**common_config, **env_config}
+        combined_config = {**common_config, **env_config, **self.get_profile_config()}
         return CoboSettings.model_validate(combined_config)
 
     def create_default_config(self):
@@ -100,26 +178,78 @@ api_host = "https://api.cobo.com"
 websocket_host = "wss://api.cobo.com"
 base_url = "https://portal.cobo.com"
 """
-        os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-        with open(self.config_file, "w") as f:
-            f.write(default_config)
+        with self.locked():
+            # Another process may have created it while we waited.
+            if not os.path.exists(self.config_file):
+                self._write_atomic(default_config.encode())
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Hold an exclusive lock on the config file across a read-modify-write.
+
+        The lock is taken on a separate ``.lock`` file, since saving replaces
+        the config file itself.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.config_file)), exist_ok=True)
+        fd = os.open(f"{self.config_file}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Releases the lock.
+
+    def _write_atomic(self, data: bytes):
+        path = os.path.abspath(self.config_file)
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if os.path.exists(path):
+                    os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+        with contextlib.suppress(OSError, AttributeError):
+            # Persist the rename itself (not supported on Windows).
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
 
     def save_config(self):
-        os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-        with open(self.config_file, "wb") as f:
-            tomli_w.dump(self.config_data, f)
+        self._write_atomic(tomli_w.dumps(self.config_data).encode())
+        path = os.path.abspath(self.config_file)
+        _parsed_configs[path] = (
+            _file_stamp(os.stat(path)),
+            copy.deepcopy(self.config_data),
+        )
 
     def set_config(self, key: str, value: str) -> bool:
-        if key in ["environment", "auth_method"]:
-            self.config_data["common"][key] = value
-        else:
-            current_env = self.load_env_type()
-            if current_env not in self.config_data:
-                self.config_data[current_env] = {}
-            self.config_data[current_env][key] = value
-
-        self.save_config()
-        self.settings = self.load_settings()
+        with self.locked():
+            # Apply the change to the latest file, not a stale copy, so
+            # concurrent writers don't undo each other's changes.
+            self.config_data = self.load_config_data()
+            if self.profile:
+                # Creates the profile if needed.
+                profiles = self.config_data.setdefault("profiles", {})
+                profiles.setdefault(self.profile, {})[key] = value
+            elif key in ["environment", "auth_method"]:
+                self.config_data.setdefault("common", {})[key] = value
+            else:
+                current_env = self.load_env_type()
+                if current_env not in self.config_data:
+                    self.config_data[current_env] = {}
+                self.config_data[current_env][key] = value
+            self.save_config()
+
+        self._settings = None
         return True
 
     def get_config(self, key: str, default: str = None) -> Union[str, None]:
@@ -130,14 +260,17 @@ base_url = "https://portal.cobo.com"
         return self.settings.model_dump(exclude_none=True)
 
     def delete_config(self, key: str) -> bool:
-        if key in ["environment", "auth_method"]:
+        if key in ["environment", "auth_method"] and not self.profile:
             return False  # Don't allow deletion of these keys
-        current_env = self.load_env_type()
-        if self.config_data.get(current_env) and key in self.config_data.get(
-            current_env
-        ):
-            del self.config_data[current_env][key]
-            self.save_config()
-            self.settings = self.load_settings()
-            return True
+        with self.locked():
+            self.config_data = self.load_config_data()
+            if self.profile:
+                section = self.get_profile_config()
+            else:
+                section = self.config_data.get(self.load_env_type())
+            if section and key in section:
+                del section[key]
+                self.save_config()
+                self._settings = None
+                return True
         return False
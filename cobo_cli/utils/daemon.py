@@ -0,0 +1,354 @@
+"""The ``cobo serve`` daemon.
+
+The daemon imports the CLI and preloads the API spec (with its route index
+and reference resolver), the configured signing key and the HTTP session
+once. Each command is then run in a child forked from that warm state, with
+the client's stdin/stdout/stderr, environment and working directory. The
+child has no controlling terminal, which is why the client keeps commands
+that prompt in-process when it runs on one. Preloaded state is
+rebuilt when the config or spec file changes, and the daemon exits (letting
+clients fall back to running locally) once its own code has changed.
+"""
+
+import importlib
+import logging
+import os
+import select
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+from typing import Dict, Optional, Set, Tuple
+
+from cobo_cli.utils.daemon_client import (
+    PROTOCOL_VERSION,
+    daemon_supported,
+    get_socket_path,
+    recv_message,
+    send_message,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+# Clients send their request right after connecting; one that stalls must
+# not hold up the accept loop for everybody else.
+REQUEST_TIMEOUT = 2.0
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WarmState:
+    """What the daemon preloads for the commands it runs."""
+
+    def __init__(self):
+        self.stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+        self.loads = 0
+
+    def watched_files(self):
+        from cobo_cli.utils.config import ConfigManager
+        from cobo_cli.utils.openapi import get_spec_file_path
+
+        return [ConfigManager.get_config_file_path(), get_spec_file_path()]
+
+    def refresh(self):
+        """Reload if any watched file changed since the last load."""
+        stamps = {path: _stamp(path) for path in self.watched_files()}
+        if stamps != self.stamps:
+            self.stamps = stamps
+            self.load()
+
+    def load(self):
+        from cobo_cli.cli import LAZY_SUBCOMMANDS
+        from cobo_cli.utils.config import ConfigManager
+        from cobo_cli.utils.http import HttpOptions, get_session
+        from cobo_cli.utils.openapi import get_spec_file_path, load_api_spec
+        from cobo_cli.utils.signer import clear_signing_keys, get_signing_key
+
+        self.loads += 1
+        for target in LAZY_SUBCOMMANDS.values():
+            try:
+                importlib.import_module(target.split(":")[0])
+            except Exception as e:
+                logger.warning(f"Failed to preload {target}: {e}")
+        try:
+            config_manager = ConfigManager()
+            if os.path.exists(get_spec_file_path()):
+                spec = load_api_spec(refresh_mode="off")
+                spec.route_index, spec.resolver
+            clear_signing_keys()
+            api_secret = config_manager.get_config("api_secret")
+            if api_secret:
+                get_signing_key(api_secret)
+            get_session(HttpOptions.from_config(config_manager).pool_size)
+        except Exception as e:
+            # Commands load whatever is missing themselves.
+            logger.warning(f"Failed to preload state: {e}")
+
+
+class DaemonServer:
+    """Accept commands on a Unix socket and run each in a forked child."""
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        if not daemon_supported() or not hasattr(os, "fork"):
+            raise RuntimeError("cobo serve needs Unix domain sockets and fork()")
+        self.socket_path = socket_path or get_socket_path()
+        self.idle_timeout = idle_timeout
+        self.state = WarmState()
+        self.children: Set[int] = set()
+        self.requests = 0
+        self.started = time.time()
+        self.last_activity = time.monotonic()
+        self.stopping = False
+        self._listener: Optional[socket.socket] = None
+        self._code_stamps = self._stamp_code()
+
+    def _stamp_code(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        return {
+            module.__file__: _stamp(module.__file__)
+            for name, module in list(sys.modules.items())
+            if name.startswith("cobo_cli") and getattr(module, "__file__", None)
+        }
+
+    def code_changed(self) -> bool:
+        return any(_stamp(path) != stamp for path, stamp in self._code_stamps.items())
+
+    def bind(self):
+        directory = os.path.dirname(self.socket_path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.chmod(directory, 0o700)
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)  # Left behind by a dead daemon.
+            else:
+                raise RuntimeError(
+                    f"A daemon is already listening on {self.socket_path}"
+                )
+            finally:
+                probe.close()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(64)
+        self._listener = listener
+
+    def serve_forever(self):
+        if self._listener is None:
+            self.bind()
+        self.state.refresh()
+        self._stamp_code_after_preload()
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        logger.info(f"Listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            while not self.stopping:
+                try:
+                    readable, _, _ = select.select([self._listener], [], [], 1.0)
+                except InterruptedError:
+                    readable = []
+                self._reap()
+                if readable:
+                    conn, _ = self._listener.accept()
+                    self.last_activity = time.monotonic()
+                    with conn:
+                        self._handle(conn)
+                elif self._idle():
+                    logger.info("Idle timeout reached, exiting")
+                    break
+        finally:
+            self.close()
+
+    def _stamp_code_after_preload(self):
+        # Preloading imports the command modules; watch those as well.
+        self._code_stamps.update(
+            (path, stamp)
+            for path, stamp in self._stamp_code().items()
+            if path not in self._code_stamps
+        )
+
+    def _idle(self) -> bool:
+        return (
+            bool(self.idle_timeout)
+            and not self.children
+            and time.monotonic() - self.last_activity > self.idle_timeout
+        )
+
+    def _on_stop_signal(self, signum, frame):
+        self.stopping = True
+
+    def _reap(self):
+        for pid in list(self.children):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                self.children.discard(pid)
+                self.last_activity = time.monotonic()
+
+    def _peer_uid(self, conn: socket.socket) -> Optional[int]:
+        if not hasattr(socket, "SO_PEERCRED"):
+            return None  # The socket's permissions still restrict access.
+        creds = conn.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        return struct.unpack("3i", creds)[1]
+
+    def _handle(self, conn: socket.socket):
+        uid = self._peer_uid(conn)
+        if uid is not None and uid != os.getuid():
+            logger.warning(f"Rejected connection from uid {uid}")
+            return
+        conn.settimeout(REQUEST_TIMEOUT)
+        try:
+            request, fds = recv_message(conn, maxfds=3)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Bad request: {e}")
+            return
+        try:
+            if request.get("version") != PROTOCOL_VERSION:
+                send_message(conn, {"declined": "protocol version mismatch"})
+            elif "control" in request:
+                send_message(conn, self._control(request["control"]))
+            elif len(fds) != 3:
+                send_message(conn, {"declined": "missing stdio"})
+            elif self.code_changed():
+                # Clients fall back to running the new code themselves.
+                send_message(conn, {"declined": "daemon code is outdated"})
+                self.stopping = True
+            else:
+                self.requests += 1
+                self._fork(conn, request, fds)
+        except OSError as e:
+            logger.warning(f"Failed to handle request: {e}")
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def _control(self, command: str) -> dict:
+        if command == "stop":
+            self.stopping = True
+            return {"stopping": True}
+        if command == "status":
+            return {
+                "pid": os.getpid(),
+                "socket": self.socket_path,
+                "uptime": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "active": len(self.children),
+                "loads": self.state.loads,
+            }
+        return {"error": f"Unknown control command: {command}"}
+
+    def _fork(self, conn: socket.socket, request: dict, fds):
+        self.state.refresh()
+        for stream in (sys.stdout, sys.stderr):
+            stream.flush()
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return
+        exit_code = 1
+        try:
+            self._listener.close()
+            conn.settimeout(None)
+            exit_code = run_request(conn, request, fds)
+        finally:
+            os._exit(exit_code)
+
+    def close(self, unlink: bool = True):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            if not unlink:
+                return
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+
+def run_request(conn: socket.socket, request: dict, fds) -> int:
+    """Run a forwarded command in this (forked) process; returns its status."""
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+    encoding = request.get("encoding") or "utf-8"
+    sys.stdin = open(0, "r", encoding=encoding, closefd=False)
+    sys.stdout = open(
+        1, "w", encoding=encoding, closefd=False, line_buffering=os.isatty(1)
+    )
+    sys.stderr = open(2, "w", encoding=encoding, closefd=False, line_buffering=True)
+    # Let the command configure logging (e.g. --enable-debug) from scratch.
+    for handler in list(logging.root.handlers):
+        logging.root.removeHandler(handler)
+
+    exit_code = 1
+    try:
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.argv = ["cobo", *request["argv"]]
+        send_message(conn, {"pid": os.getpid()})
+
+        from cobo_cli.cli import cli
+
+        try:
+            cli.main(args=request["argv"], prog_name="cobo")
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except OSError:
+                pass
+        try:
+            send_message(conn, {"exit_code": exit_code})
+        except OSError:
+            pass
+    return exit_code
+
+
+def daemonize(log_file: str) -> bool:
+    """Detach into the background; returns True in the daemon process."""
+    if os.fork():
+        return False
+    os.setsid()
+    if os.fork():
+        os._exit(0)
+    os.chdir("/")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    os.dup2(devnull, 0)
+    os.dup2(log_fd, 1)
+    os.dup2(log_fd, 2)
+    os.close(devnull)
+    os.close(log_fd)
+    return True
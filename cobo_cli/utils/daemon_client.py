@@ -0,0 +1,195 @@
+"""Entry point of the ``cobo`` command and client of the ``cobo serve`` daemon.
+
+When a daemon is running, the command line, environment and working
+directory are sent to it over a per-user Unix domain socket together with
+the client's stdin, stdout and stderr file descriptors. The daemon runs the
+command in a process forked from its warm state, writing straight to the
+client's terminal, and reports the exit status back. Without a daemon (or
+with ``COBO_NO_DAEMON=1``) the command runs in-process as usual.
+
+The forked process has no controlling terminal, so ``getpass``-style hidden
+input and job control would not work there. Commands that prompt are
+therefore run in-process whenever stdin is a terminal.
+
+This module is imported on every invocation, so it only uses the standard
+library.
+"""
+
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+PROTOCOL_VERSION = 1
+DISABLE_ENV = "COBO_NO_DAEMON"
+# Commands that always run in the calling process.
+LOCAL_SUBCOMMANDS = {"serve"}
+# Commands that prompt; run in the calling process when used from a terminal.
+INTERACTIVE_SUBCOMMANDS = {"login", "logout", "keys", "app", "auth"}
+# Global options of the ``cobo`` group that take a value.
+_VALUE_OPTIONS = {
+    "-e",
+    "--env",
+    "-a",
+    "--auth",
+    "--profile",
+    "--config-file",
+    "--spec",
+}
+_HEADER = struct.Struct("!I")
+_MAX_MESSAGE = 16 * 1024 * 1024
+_FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT")
+
+
+def get_socket_path() -> str:
+    return str(Path.home() / ".cobo" / "run" / "daemon.sock")
+
+
+def daemon_supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+
+
+def send_message(sock: socket.socket, message: dict, fds: List[int] = ()):
+    payload = json.dumps(message).encode()
+    data = _HEADER.pack(len(payload)) + payload
+    sent = socket.send_fds(sock, [data], list(fds)) if fds else 0
+    sock.sendall(data[sent:])
+
+
+def recv_message(sock: socket.socket, maxfds: int = 0) -> Tuple[dict, List[int]]:
+    """Receive one message (and up to ``maxfds`` file descriptors).
+
+    Exactly one message is read, so consecutive messages are not mixed up.
+    """
+    if maxfds:
+        header, fds, _, _ = socket.recv_fds(sock, _HEADER.size, maxfds)
+    else:
+        header, fds = sock.recv(_HEADER.size), []
+    try:
+        header += _recv_exactly(sock, _HEADER.size - len(header))
+        (size,) = _HEADER.unpack(header)
+        if size > _MAX_MESSAGE:
+            raise ValueError(f"Message too large: {size} bytes")
+        return json.loads(_recv_exactly(sock, size)), fds
+    except BaseException:
+        for fd in fds:
+            os.close(fd)
+        raise
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message")
+        data += chunk
+    return data
+
+
+def connect(socket_path: Optional[str] = None) -> Optional[socket.socket]:
+    socket_path = socket_path or get_socket_path()
+    if not daemon_supported() or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def send_control(command: str, socket_path: Optional[str] = None) -> Optional[dict]:
+    """Send a control command (``status``, ``stop``) to the running daemon."""
+    sock = connect(socket_path)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            send_message(sock, {"version": PROTOCOL_VERSION, "control": command})
+            return recv_message(sock)[0]
+        except (OSError, ValueError):
+            return None
+
+
+def find_subcommand(argv: List[str]) -> Optional[str]:
+    args = iter(argv)
+    for arg in args:
+        if arg == "--":
+            return next(args, None)
+        if arg in _VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def forward(argv: List[str], socket_path: Optional[str] = None) -> Optional[int]:
+    """Run ``argv`` in the daemon; returns the exit status, or None if not run."""
+    sock = connect(socket_path)
+    if sock is None:
+        return None
+    with sock:
+        request = {
+            "version": PROTOCOL_VERSION,
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+            "encoding": getattr(sys.stdout, "encoding", None) or "utf-8",
+        }
+        try:
+            send_message(sock, request, fds=[0, 1, 2])
+            reply, _ = recv_message(sock)
+        except (OSError, ValueError):
+            return None
+        pid = reply.get("pid")
+        if not pid:
+            return None  # Declined, e.g. by a daemon running outdated code.
+
+        # The command runs outside our process group, so relay the signals
+        # the terminal sends us.
+        def relay(signum, frame):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+        for name in _FORWARDED_SIGNALS:
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), relay)
+        try:
+            result, _ = recv_message(sock)
+        except (OSError, ValueError):
+            return 1
+        return result.get("exit_code", 1)
+
+
+def should_forward(argv: List[str]) -> bool:
+    if os.environ.get(DISABLE_ENV):
+        return False
+    subcommand = find_subcommand(argv)
+    if subcommand in LOCAL_SUBCOMMANDS:
+        return False
+    if subcommand in INTERACTIVE_SUBCOMMANDS:
+        try:
+            return not os.isatty(0)
+        except OSError:
+            return True
+    return True
+
+
+def main():
+    argv = sys.argv[1:]
+    if should_forward(argv):
+        exit_code = forward(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    from cobo_cli.cli import cli
+
+    cli()
@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import requests
+
+from cobo_cli.utils.http import (
+    RETRY_STATUS_CODES,
+    HttpOptions,
+    backoff_delay,
+    get_session,
+)
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_MODES = ["spill", "drop", "block"]
+# Receivers should be idempotent on the event ID, so transient failures are
+# retried even though forwarding is a POST.
+FORWARD_RETRY_STATUS_CODES = {408, *RETRY_STATUS_CODES}
+
+
+@dataclass
+class ForwarderStats:
+    """Counters for an :class:`EventForwarder`, safe to read at any time."""
+
+    received: int = 0
+    forwarded: int = 0
+    failed: int = 0
+    retried: int = 0
+    spilled: int = 0
+    dropped: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_delivery(self, latency: float, ok: bool):
+        with self._lock:
+            if ok:
+                self.forwarded += 1
+            else:
+                self.failed += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def snapshot(self, queue_depth: int = 0, spill_depth: int = 0) -> dict:
+        with self._lock:
+            delivered = self.forwarded + self.failed
+            return {
+                "queue_depth": queue_depth,
+                "spill_depth": spill_depth,
+                "received": self.received,
+                "forwarded": self.forwarded,
+                "failed": self.failed,
+                "retried": self.retried,
+                "spilled": self.spilled,
+                "dropped": self.dropped,
+                "latency_avg_ms": round(
+                    self.latency_total / delivered * 1000 if delivered else 0.0, 2
+                ),
+                "latency_max_ms": round(self.latency_max * 1000, 2),
+            }
+
+
+class SpillFile:
+    """An on-disk FIFO of JSON events used when the in-memory queue is full."""
+
+    def __init__(self, directory: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(
+            prefix="cobo-forward-", suffix=".ndjson", dir=directory
+        )
+        self._file = os.fdopen(fd, "r+b")
+        self._read_offset = 0
+        self._lock = threading.Lock()
+        self.depth = 0
+
+    def append(self, event):
+        line = json.dumps(event).encode() + b"\n"
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(line)
+            self.depth += 1
+
+    def pop(self, limit: int) -> List:
+        with self._lock:
+            if not self.depth:
+                return []
+            self._file.flush()
+            self._file.seek(self._read_offset)
+            events = []
+            while len(events) < limit:
+                line = self._file.readline()
+                if not line:
+                    break
+                events.append(json.loads(line))
+            self._read_offset = self._file.tell()
+            self.depth -= len(events)
+            if not self.depth:
+                # Everything has been read back; reclaim the space.
+                self._file.seek(0)
+                self._file.truncate()
+                self._read_offset = 0
+            return events
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            if not self.depth:
+                os.unlink(self.path)
+
+
+class EventForwarder:
+    """Forward events to an HTTP endpoint from a pool of worker threads.
+
+    :meth:`submit` never waits on the network: events go to a bounded
+    in-memory queue, and when it is full they are either spilled to a
+    temporary file and read back once the workers catch up (``"spill"``),
+    dropped (``"drop"``), or the caller waits for room (``"block"``).
+    Failed deliveries are retried with jittered backoff.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = 4,
+        queue_size: int = 1000,
+        max_retries: int = 3,
+        overflow: str = "spill",
+        spill_dir: Optional[str] = None,
+        options: Optional[HttpOptions] = None,
+    ):
+        if overflow not in OVERFLOW_MODES:
+            raise ValueError(f"Invalid overflow mode: {overflow}")
+        self.url = url
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.overflow = overflow
+        self.options = options or HttpOptions(read_timeout=10.0, backoff_max=10.0)
+        self.session: requests.Session = get_session(concurrency)
+        self.stats = ForwarderStats()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._spill = SpillFile(spill_dir) if overflow == "spill" else None
+        self._workers: List[threading.Thread] = []
+        self._closing = threading.Event()
+        self._refill_lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def snapshot(self) -> dict:
+        spill_depth = self._spill.depth if self._spill else 0
+        return self.stats.snapshot(self.queue_depth, spill_depth)
+
+    def start(self) -> "EventForwarder":
+        for i in range(self.concurrency):
+            worker = threading.Thread(
+                target=self._run, name=f"cobo-forwarder-{i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def submit(self, event) -> bool:
+        """Queue an event; returns ``False`` if it had to be dropped."""
+        self.stats.record(received=1)
+        if self.overflow == "block":
+            self._queue.put(event)
+            return True
+        # Once events have spilled, keep spilling until they have been read
+        # back so that delivery stays in arrival order.
+        if not (self._spill and self._spill.depth):
+            try:
+                self._queue.put_nowait(event)
+                return True
+            except queue.Full:
+                pass
+        if self._spill:
+            self._spill.append(event)
+            self.stats.record(spilled=1)
+            return True
+        self.stats.record(dropped=1)
+        logger.warning("Forward queue is full, dropping event")
+        return False
+
+    def close(self, timeout: Optional[float] = None):
+        """Deliver everything that is queued (or spilled), then stop."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks or (self._spill and self._spill.depth):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            self._refill()
+            time.sleep(0.01)
+        self._closing.set()
+        for worker in self._workers:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            worker.join(None if remaining is None else max(0.0, remaining))
+        if self._spill:
+            self._spill.close()
+
+    def _refill(self):
+        """Move spilled events back into the queue once it is half empty."""
+        if not self._spill or not self._spill.depth:
+            return
+        if not self._refill_lock.acquire(blocking=False):
+            return  # Another worker is already refilling.
+        try:
+            room = self._queue.maxsize - self._queue.qsize()
+            if room >= self._queue.maxsize // 2:
+                for event in self._spill.pop(room):
+                    self._queue.put(event)
+        finally:
+            self._refill_lock.release()
+
+    def _run(self):
+        while not self._closing.is_set():
+            try:
+                event = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                self._refill()
+                continue
+            try:
+                self._deliver(event)
+            except Exception:
+                logger.exception("Unexpected error while forwarding event")
+            finally:
+                self._queue.task_done()
+            self._refill()
+
+    def _deliver(self, event):
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            response = error = None
+            try:
+                response = self.session.post(
+                    self.url, json=event, timeout=self.options.timeout
+                )
+            except requests.RequestException as e:
+                error = e
+
+            ok = response is not None and response.status_code < 400
+            retryable = (
+                error is not None or response.status_code in FORWARD_RETRY_STATUS_CODES
+            )
+            if ok or not retryable or attempt >= self.max_retries:
+                break
+            if response is not None:
+                response.close()
+            self.stats.record(retried=1)
+            time.sleep(backoff_delay(attempt, self.options, response))
+            attempt += 1
+
+        self.stats.record_delivery(time.perf_counter() - started, ok)
+        if not ok:
+            reason = error if error is not None else f"status {response.status_code}"
+            logger.warning(f"Failed to forward event to {self.url}: {reason}")
@@ -0,0 +1,123 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import click
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying. 429 means the request was rejected before being
+# processed, so it is retried for every method; 5xx only for idempotent ones.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+@dataclass(frozen=True)
+class HttpOptions:
+    """Connection pool, timeout and retry settings for API requests.
+
+    Every field can be overridden from the config file, e.g.
+    ``cobo config set http_max_retries 5``.
+    """
+
+    pool_size: int = 10
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+
+    @property
+    def timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+    @classmethod
+    def from_config(cls, config_manager) -> "HttpOptions":
+        overrides = {}
+        for field_name, field_def in cls.__dataclass_fields__.items():
+            key = f"http_{field_name}"
+            value = config_manager.get_config(key)
+            if value is None:
+                continue
+            try:
+                overrides[field_name] = field_def.type(value)
+            except (TypeError, ValueError):
+                raise click.ClickException(
+                    f"Invalid {key} in config: {value!r} "
+                    f"(expected {field_def.type.__name__})"
+                )
+        return cls(**overrides)
+
+
+_sessions: Dict[int, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(pool_size: int = HttpOptions.pool_size) -> requests.Session:
+    """Return the process-wide keep-alive session for ``pool_size``."""
+    with _sessions_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            # Retries are handled by the caller so that every attempt can be
+            # re-signed with a fresh nonce.
+            adapter = HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[pool_size] = session
+        return session
+
+
+def should_retry(
+    method: str,
+    response: Optional[requests.Response] = None,
+    error: Optional[Exception] = None,
+) -> bool:
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    if response is not None:
+        if response.status_code == 429:
+            return True
+        return idempotent and response.status_code in RETRY_STATUS_CODES
+    if isinstance(error, requests.ConnectTimeout):
+        return True  # The request never reached the server.
+    return idempotent and isinstance(
+        error, (requests.ConnectionError, requests.Timeout)
+    )
+
+
+def get_retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Parse a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(
+    attempt: int,
+    options: HttpOptions,
+    response: Optional[requests.Response] = None,
+) -> float:
+    """Delay before retry ``attempt`` (0-based): Retry-After or jittered backoff."""
+    retry_after = get_retry_after(response)
+    if retry_after is not None:
+        return min(retry_after, options.backoff_max)
+    delay = min(options.backoff_max, options.backoff_base * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)  # nosec B311
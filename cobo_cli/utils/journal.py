@@ -0,0 +1,276 @@
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Callable, Iterator, List, Optional
+
+import click
+
+JOURNAL_COMPRESSIONS = ["none", "gzip", "zstd"]
+SEGMENT_SUFFIXES = {"none": ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+INDEX_FILE = "index.json"
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise click.ClickException(
+            "zstd compression requires the 'zstandard' package: pip install zstandard"
+        )
+    return zstandard
+
+
+def _compression_of(segment_name: str) -> str:
+    for compression, suffix in SEGMENT_SUFFIXES.items():
+        if compression != "none" and segment_name.endswith(suffix):
+            return compression
+    return "none"
+
+
+def _open_segment_writer(path: str, compression: str):
+    raw = open(path, "ab")
+    if compression == "gzip":
+        return raw, gzip.GzipFile(fileobj=raw, mode="ab")
+    if compression == "zstd":
+        return raw, _zstandard().ZstdCompressor().stream_writer(raw)
+    return raw, raw
+
+
+def _iter_gzip_chunks(raw) -> Iterator[bytes]:
+    # zlib rather than GzipFile, which discards what it has decompressed
+    # when the stream ends without a trailer, as the active segment does.
+    decompressor = zlib.decompressobj(wbits=31)
+    while True:
+        chunk = raw.read(65536)
+        if not chunk:
+            return
+        while chunk:
+            yield decompressor.decompress(chunk)
+            chunk = b""
+            if decompressor.eof:  # Start of another gzip member.
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(wbits=31)
+
+
+def _iter_segment_chunks(raw, compression: str) -> Iterator[bytes]:
+    if compression == "gzip":
+        yield from _iter_gzip_chunks(raw)
+        return
+    stream = raw
+    if compression == "zstd":
+        stream = _zstandard().ZstdDecompressor().stream_reader(raw)
+    yield from iter(lambda: stream.read(65536), b"")
+
+
+def _iter_segment_lines(path: str) -> Iterator[bytes]:
+    """Yield the complete lines of a segment, ignoring a torn last line."""
+    with open(path, "rb") as raw:
+        buffered = b""
+        for chunk in _iter_segment_chunks(raw, _compression_of(path)):
+            buffered += chunk
+            *lines, buffered = buffered.split(b"\n")
+            yield from lines
+
+
+class EventJournal:
+    """Append-only, segmented NDJSON log of received events.
+
+    Each line is ``{"offset": n, "ts": epoch_seconds, "event": {...}}``.
+    Segments are named after their first offset and rotated once they reach
+    ``segment_size`` bytes (before compression). ``index.json`` records the
+    offset and time range of every segment so that readers only open the
+    segments a range touches. Every event is flushed as it is written, so a
+    segment is readable up to the last complete line even after a crash.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        compression: str = "none",
+    ):
+        if compression not in JOURNAL_COMPRESSIONS:
+            raise ValueError(f"Invalid compression: {compression}")
+        if compression == "zstd":
+            _zstandard()
+        self.directory = directory
+        self.segment_size = segment_size
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._raw = self._writer = None
+        self._segment = None
+        os.makedirs(directory, exist_ok=True)
+        self.segments: List[dict] = read_index(directory)
+        self._recover_last_segment()
+
+    @property
+    def next_offset(self) -> int:
+        if not self.segments:
+            return 0
+        last = self.segments[-1]
+        return last["first_offset"] + last["count"]
+
+    def _recover_last_segment(self):
+        """Bring the index up to date with a segment left open by a crash."""
+        if not self.segments or self.segments[-1].get("closed"):
+            return
+        last = self.segments[-1]
+        path = os.path.join(self.directory, last["name"])
+        if not os.path.exists(path):
+            self.segments.pop()
+            return
+        count, last_ts = 0, last["last_ts"]
+        for line in _iter_segment_lines(path):
+            if line:
+                count += 1
+                last_ts = json.loads(line)["ts"]
+        last.update(count=count, last_ts=last_ts, size=os.path.getsize(path))
+        # Never append to a recovered segment: a torn gzip member or line
+        # would corrupt everything written after it.
+        last["closed"] = True
+
+    def append(self, event: dict, ts: Optional[float] = None) -> int:
+        """Append ``event`` and return its offset."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            if self._segment is None or self._segment["size"] >= self.segment_size:
+                self._rotate()
+            offset = self.next_offset
+            line = json.dumps({"offset": offset, "ts": ts, "event": event}) + "\n"
+            data = line.encode()
+            self._writer.write(data)
+            self._writer.flush()
+            if self._writer is not self._raw:
+                self._raw.flush()
+            segment = self._segment
+            segment["count"] += 1
+            segment["size"] += len(data)
+            segment["last_ts"] = ts
+            if segment["first_ts"] is None:
+                segment["first_ts"] = ts
+            return offset
+
+    def _rotate(self):
+        self._close_segment()
+        first_offset = self.next_offset
+        name = f"events-{first_offset:020d}{SEGMENT_SUFFIXES[self.compression]}"
+        self._segment = {
+            "name": name,
+            "first_offset": first_offset,
+            "count": 0,
+            "first_ts": None,
+            "last_ts": None,
+            "size": 0,
+            "closed": False,
+        }
+        self.segments.append(self._segment)
+        self._raw, self._writer = _open_segment_writer(
+            os.path.join(self.directory, name), self.compression
+        )
+        self._write_index()
+
+    def _close_segment(self):
+        if self._segment is None:
+            return
+        if self._writer is not self._raw:
+            self._writer.close()
+        self._raw.close()
+        self._segment["closed"] = True
+        self._segment = self._raw = self._writer = None
+        self._write_index()
+
+    def _write_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"segments": self.segments}, f)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+def read_index(directory: str) -> List[dict]:
+    path = os.path.join(directory, INDEX_FILE)
+    try:
+        with open(path) as f:
+            return json.load(f)["segments"]
+    except FileNotFoundError:
+        return []
+
+
+def iter_journal(
+    directory: str,
+    start_offset: Optional[int] = None,
+    end_offset: Optional[int] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+) -> Iterator[dict]:
+    """Yield journal records within the (inclusive) offset and time bounds."""
+    if not os.path.exists(os.path.join(directory, INDEX_FILE)):
+        raise click.ClickException(f"No event journal found in {directory}")
+
+    for segment in read_index(directory):
+        first = segment["first_offset"]
+        last = first + segment["count"] - 1
+        open_segment = not segment.get("closed")
+        # The index is only rewritten on rotation, so the range of a segment
+        # that is still being written is unknown and it is always read.
+        if not open_segment:
+            if start_offset is not None and last < start_offset:
+                continue
+            if end_offset is not None and first > end_offset:
+                continue
+            if since is not None and (segment["last_ts"] or 0) < since:
+                continue
+            if until is not None and (segment["first_ts"] or 0) > until:
+                continue
+        path = os.path.join(directory, segment["name"])
+        for line in _iter_segment_lines(path):
+            if not line:
+                continue
+            record = json.loads(line)
+            if start_offset is not None and record["offset"] < start_offset:
+                continue
+            if end_offset is not None and record["offset"] > end_offset:
+                return
+            if since is not None and record["ts"] < since:
+                continue
+            if until is not None and record["ts"] > until:
+                continue
+            yield record
+
+
+def pace(
+    records,
+    speed: float = 1.0,
+    rate: Optional[float] = None,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+):
+    """Yield ``records`` on a schedule.
+
+    With ``rate`` records are spaced evenly at that many per second;
+    otherwise the original gaps between events are replayed ``speed`` times
+    faster (``speed`` 0 disables pacing).
+    """
+    started = clock()
+    first_ts = None
+    for i, record in enumerate(records):
+        if rate:
+            due = started + i / rate
+        elif speed:
+            if first_ts is None:
+                first_ts = record["ts"]
+            due = started + (record["ts"] - first_ts) / speed
+        else:
+            due = started
+        delay = due - clock()
+        if delay > 0:
+            sleep(delay)
+        yield record
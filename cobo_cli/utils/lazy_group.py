@@ -0,0 +1,38 @@
+import importlib
+from typing import Dict, Optional
+
+import click
+
+
+class LazyGroup(click.Group):
+    """A click group whose subcommands are imported on first use.
+
+    ``lazy_subcommands`` maps a command name to ``"module.path:attribute"``.
+    The names are known up front (for listing and dispatch), but a command's
+    module, and therefore its dependencies, is only imported when the command
+    is invoked or its help is rendered.
+    """
+
+    def __init__(
+        self, *args, lazy_subcommands: Optional[Dict[str, str]] = None, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context):
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name not in self.commands and cmd_name in self.lazy_subcommands:
+            self.add_command(self._load_command(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load_command(self, cmd_name: str) -> click.Command:
+        import_path = self.lazy_subcommands[cmd_name]
+        module_name, attr_name = import_path.split(":", 1)
+        command = getattr(importlib.import_module(module_name), attr_name)
+        if not isinstance(command, click.Command):
+            raise ValueError(
+                f"Lazy loading of {import_path} failed: not a click command"
+            )
+        return command
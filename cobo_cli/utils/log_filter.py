@@ -0,0 +1,384 @@
+"""Filter expressions for API log streams.
+
+An expression combines comparisons with ``and``, ``or``, ``not`` and
+parentheses::
+
+    status >= 500 and path ~ "/v2/wallets/*"
+    latency > 200 or status in 400..499
+    method == "POST" and request_body.wallet_type == "MPC"
+    path =~ "^/v2/transactions/[^/]+$" and not ip in ("10.0.0.1", "10.0.0.2")
+
+Operators are ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``in`` (a
+``low..high`` range or a parenthesized list), ``~`` / ``!~`` (glob) and
+``=~`` (regular expression). Fields are log fields or one of the aliases in
+:data:`FIELD_ALIASES`; ``query``, ``request_body`` and ``response_body``
+paths such as ``response_body.result.status`` look inside the JSON encoded
+bodies.
+
+Expressions are compiled once. Conjunctions and disjunctions evaluate their
+cheapest operands first, and bodies are only decoded (once, and only the
+body that is needed) when a comparison on them is actually reached.
+"""
+
+import fnmatch
+import json
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import click
+
+# Short names for the fields of an API log. ``latency`` maps to whichever
+# duration field the log carries.
+FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "id": ("api_request_uuid",),
+    "method": ("api_method",),
+    "path": ("api_endpoint",),
+    "ip": ("ip_address",),
+    "key": ("api_key",),
+    "latency": ("latency", "duration", "elapsed"),
+}
+BODY_FIELDS = {
+    "query": "query_params",
+    "query_params": "query_params",
+    "request_body": "request_body",
+    "response_body": "response_body",
+}
+# Log fields the stream subscription can filter on (exact match), keyed by
+# the field name in the log.
+SERVER_FILTER_FIELDS = {
+    "api_method": "method",
+    "api_endpoint": "api_endpoint",
+    "status": "status",
+    "api_key": "api_key",
+    "ip_address": "ip_address",
+}
+# Of those, the ones holding numbers; an integer compared with any other
+# field also matches values like "1.0" locally, which the server won't.
+SERVER_NUMERIC_FIELDS = {"status"}
+
+_MISSING = object()
+_TOKEN_RE = re.compile(
+    r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>-?\d+(?:\.\d+)?)(?!\.\d)
+      | (?P<range>\.\.)
+      | (?P<op>==|!=|<=|>=|=~|!~|<|>|~|\(|\)|,)
+      | (?P<name>[A-Za-z_][\w.]*)
+    )
+    """,
+    re.VERBOSE,
+)
+_KEYWORDS = {"and", "or", "not", "in", "true", "false", "null"}
+_INTEGER_RE = re.compile(r"-?(?:0|[1-9]\d*)")
+
+
+class FilterSyntaxError(ValueError):
+    pass
+
+
+class LogRecord(dict):
+    """An API log whose JSON encoded bodies are decoded on first access."""
+
+    __slots__ = ("_decoded",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._decoded = {}
+
+    def body(self, name: str):
+        if name not in self._decoded:
+            raw = self.get(name)
+            try:
+                self._decoded[name] = json.loads(raw) if raw else {}
+            except (TypeError, ValueError):
+                self._decoded[name] = raw
+        return self._decoded[name]
+
+    def field(self, name: str):
+        """Resolve a filter field name; returns ``_MISSING`` if absent."""
+        for key in FIELD_ALIASES.get(name, (name,)):
+            if key in self:
+                return self[key]
+        head, _, rest = name.partition(".")
+        if head in BODY_FIELDS and rest:
+            value = self.body(BODY_FIELDS[head])
+            for part in rest.split("."):
+                if isinstance(value, dict) and part in value:
+                    value = value[part]
+                elif isinstance(value, list) and part.isdigit():
+                    index = int(part)
+                    value = value[index] if index < len(value) else _MISSING
+                else:
+                    return _MISSING
+                if value is _MISSING:
+                    break
+            return value
+        return _MISSING
+
+
+class _Node:
+    cost = 1
+
+    def __call__(self, record: LogRecord) -> bool:
+        raise NotImplementedError
+
+
+class _Compare(_Node):
+    def __init__(self, field: str, test: Callable[[object], bool]):
+        self.field = field
+        self.test = test
+        # Comparisons on bodies need a JSON decode, so they go last.
+        self.cost = 10 if field.partition(".")[0] in BODY_FIELDS else 1
+
+    def __call__(self, record):
+        value = record.field(self.field)
+        return value is not _MISSING and self.test(value)
+
+
+class _All(_Node):
+    def __init__(self, nodes: List[_Node]):
+        self.nodes = sorted(nodes, key=lambda node: node.cost)
+        self.cost = sum(node.cost for node in nodes)
+
+    def __call__(self, record):
+        return all(node(record) for node in self.nodes)
+
+
+class _Any(_All):
+    def __call__(self, record):
+        return any(node(record) for node in self.nodes)
+
+
+class _Not(_Node):
+    def __init__(self, node: _Node):
+        self.node = node
+        self.cost = node.cost
+
+    def __call__(self, record):
+        return not self.node(record)
+
+
+def _as_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _equals(value, literal):
+    if isinstance(literal, (int, float)) and not isinstance(literal, bool):
+        return _as_number(value) == literal
+    if isinstance(literal, str) and not isinstance(value, str):
+        return str(value) == literal
+    return value == literal
+
+
+_ORDERINGS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens, self.sources = self._tokenize(text)
+        self.pos = 0
+        # field -> (kind, text) of the literal in top-level equalities, where
+        # text is a string's value or a number as written.
+        self.equalities: Dict[str, Tuple[str, str]] = {}
+
+    @staticmethod
+    def _tokenize(text):
+        tokens, sources, pos = [], [], 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = _TOKEN_RE.match(text, pos)
+            if not match or match.end() == pos:
+                raise FilterSyntaxError(f"Unexpected input at {pos}: {text[pos:]!r}")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "string":
+                value = re.sub(r"\\(.)", r"\1", value[1:-1])
+            elif kind == "number":
+                value = float(value) if "." in value else int(value)
+            elif kind == "name" and value in _KEYWORDS:
+                kind = value
+            tokens.append((kind, value))
+            sources.append(match.group(match.lastgroup))
+            pos = match.end()
+        return tokens, sources
+
+    def _peek(self, *kinds):
+        if self.pos < len(self.tokens):
+            kind, value = self.tokens[self.pos]
+            if kind in kinds or (kind == "op" and value in kinds):
+                return self.tokens[self.pos]
+        return None
+
+    def _take(self, *kinds):
+        token = self._peek(*kinds)
+        if token is None:
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end"
+            raise FilterSyntaxError(
+                f"Expected {' or '.join(kinds)} but found {found!r} in {self.text!r}"
+            )
+        self.pos += 1
+        return token
+
+    def parse(self) -> _Node:
+        node = self._or(top_level=True)
+        if self.pos != len(self.tokens):
+            self._take("end")
+        return node
+
+    def _or(self, top_level=False):
+        before = dict(self.equalities)
+        nodes = [self._and(top_level)]
+        while self._peek("or"):
+            self.pos += 1
+            nodes.append(self._and())
+        if len(nodes) > 1:
+            self.equalities = before  # Nothing is implied by a disjunction.
+            return _Any(nodes)
+        return nodes[0]
+
+    def _and(self, top_level=False):
+        nodes = [self._not(top_level)]
+        while self._peek("and"):
+            self.pos += 1
+            nodes.append(self._not(top_level))
+        return _All(nodes) if len(nodes) > 1 else nodes[0]
+
+    def _not(self, top_level=False):
+        if self._peek("not"):
+            self.pos += 1
+            return _Not(self._not())
+        if self._peek("("):
+            self.pos += 1
+            node = self._or(top_level)
+            self._take(")")
+            return node
+        return self._comparison(top_level)
+
+    def _literal(self):
+        kind, value = self._take("string", "number", "true", "false", "null")
+        return {"true": True, "false": False, "null": None}.get(kind, value)
+
+    def _comparison(self, top_level):
+        _, field = self._take("name")
+        _, op = self._take("==", "!=", "<", "<=", ">", ">=", "~", "!~", "=~", "in")
+        if op == "in":
+            return _Compare(field, self._membership())
+        start = self.pos
+        literal = self._literal()
+        if op in ("==", "!="):
+            if op == "==" and top_level:
+                kind = self.tokens[start][0]
+                text = literal if kind == "string" else self.sources[start]
+                self.equalities[field] = (kind, text)
+            test = lambda value, lit=literal: _equals(value, lit)  # noqa: E731
+            return _Compare(field, test if op == "==" else lambda v: not test(v))
+        if op in _ORDERINGS:
+            number = _as_number(literal)
+            if number is None:
+                raise FilterSyntaxError(f"{op} needs a number, got {literal!r}")
+            compare = _ORDERINGS[op]
+
+            def ordered(value):
+                value = _as_number(value)
+                return value is not None and compare(value, number)
+
+            return _Compare(field, ordered)
+        if not isinstance(literal, str):
+            raise FilterSyntaxError(f"{op} needs a string pattern, got {literal!r}")
+        try:
+            pattern = re.compile(literal if op == "=~" else fnmatch.translate(literal))
+        except re.error as e:
+            raise FilterSyntaxError(f"Invalid regular expression {literal!r}: {e}")
+        if op == "=~":
+            return _Compare(field, lambda value: bool(pattern.search(str(value))))
+        matches = lambda value: bool(pattern.match(str(value)))  # noqa: E731
+        return _Compare(field, matches if op == "~" else lambda v: not matches(v))
+
+    def _membership(self):
+        if self._peek("("):
+            self.pos += 1
+            values = [self._literal()]
+            while self._peek(","):
+                self.pos += 1
+                values.append(self._literal())
+            self._take(")")
+            return lambda value: any(_equals(value, lit) for lit in values)
+        low = _as_number(self._literal())
+        self._take("range")
+        high = _as_number(self._literal())
+        if low is None or high is None:
+            raise FilterSyntaxError("A range needs numeric bounds, e.g. 500..599")
+
+        def in_range(value):
+            value = _as_number(value)
+            return value is not None and low <= value <= high
+
+        return in_range
+
+
+class LogFilter:
+    """A compiled filter expression; call it with a :class:`LogRecord`."""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        parser = _Parser(expression)
+        self._match = parser.parse()
+        self._equalities = parser.equalities
+
+    def __call__(self, record: LogRecord) -> bool:
+        return self._match(record)
+
+    def server_params(self) -> Dict[str, str]:
+        """Stream subscription params implied by the expression.
+
+        Exact matches that must hold for every record (top-level ``==``
+        conjuncts on fields the server can filter) are pushed to the server
+        so that fewer messages are sent at all. Only strings, and integers
+        on numeric fields, are pushed, as written: the server compares
+        text, so ``status == 500.0`` is left to the local filter.
+        """
+        params = {}
+        for field, (kind, text) in self._equalities.items():
+            for key in FIELD_ALIASES.get(field, (field,)):
+                if key not in SERVER_FILTER_FIELDS:
+                    continue
+                if kind == "string" or (
+                    kind == "number"
+                    and key in SERVER_NUMERIC_FIELDS
+                    and _INTEGER_RE.fullmatch(text)
+                ):
+                    params[SERVER_FILTER_FIELDS[key]] = text
+        return params
+
+
+def compile_filters(expressions) -> Optional[LogFilter]:
+    """Compile ``--filter`` values, which must all match, into one filter."""
+    expressions = [e for e in expressions or () if e.strip()]
+    if not expressions:
+        return None
+    if len(expressions) == 1:
+        return LogFilter(expressions[0])
+    for expression in expressions:
+        LogFilter(expression)  # Report syntax errors against the user's input.
+    return LogFilter(" and ".join(f"({e})" for e in expressions))
+
+
+def filter_option_callback(ctx, param, value):
+    try:
+        return compile_filters(value)
+    except FilterSyntaxError as e:
+        raise click.BadParameter(str(e), ctx=ctx, param=param)
@@ -0,0 +1,231 @@
+import functools
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cobo_cli.utils.log_filter import LogRecord
+
+GROUP_BY_FIELDS = {
+    "method": "api_method",
+    "endpoint": "api_endpoint",
+    "status": "status",
+    "api_key": "api_key",
+}
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class DDSketch:
+    """Streaming quantile sketch with relative-error guarantees (DDSketch).
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within ``relative_accuracy`` of the true value using memory bounded by
+    ``max_bins``. When that bound is hit the lowest buckets are merged,
+    which only costs accuracy at the low end.
+    """
+
+    __slots__ = (
+        "relative_accuracy",
+        "max_bins",
+        "_gamma_log",
+        "bins",
+        "zeros",
+        "count",
+    )
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._gamma_log = math.log(gamma)
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._gamma_log)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: "DDSketch"):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        lowest, second = sorted(self.bins)[:2]
+        self.bins[second] += self.bins.pop(lowest)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # The bucket midpoint (in relative terms) of
+                # (gamma^(i-1), gamma^i].
+                return (
+                    2
+                    * math.exp(index * self._gamma_log)
+                    / (1 + math.exp(self._gamma_log))
+                )
+        return math.exp(max(self.bins) * self._gamma_log)
+
+
+class _Aggregate:
+    __slots__ = ("count", "errors", "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency = DDSketch()
+
+    def merge(self, other: "_Aggregate"):
+        self.count += other.count
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+
+
+def _is_error(status) -> bool:
+    try:
+        return int(status) >= 400
+    except (TypeError, ValueError):
+        return False
+
+
+class LogStats:
+    """Sliding-window aggregates of an API log stream.
+
+    The window is split into ``slices`` equal time slices; each log is added
+    to the current slice and slices older than the window are dropped, so
+    memory is bounded by the number of groups rather than the log volume.
+    """
+
+    def __init__(
+        self,
+        group_by: Tuple[str, ...] = ("method", "endpoint"),
+        window: float = 60.0,
+        slices: int = 12,
+        normalize_path: Optional[Callable[[str], str]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.group_by = group_by
+        self.window = window
+        self.slices = slices
+        self.slice_length = window / slices
+        self.normalize_path = normalize_path
+        self.clock = clock
+        self._slices = deque()  # (slice number, {group: _Aggregate})
+        self._lock = threading.Lock()
+        self.started = clock()
+
+    def _group(self, record: LogRecord) -> Tuple:
+        group = []
+        for name in self.group_by:
+            value = record.get(GROUP_BY_FIELDS[name], "-")
+            if name == "endpoint" and self.normalize_path:
+                value = self.normalize_path(value)
+            group.append(str(value))
+        return tuple(group)
+
+    def _slice_number(self, now: float) -> int:
+        return int((now - self.started) // self.slice_length)
+
+    def _expire(self, current: int):
+        while self._slices and self._slices[0][0] <= current - self.slices:
+            self._slices.popleft()
+
+    def add(self, record: LogRecord):
+        now = self.clock()
+        group = self._group(record)
+        latency = record.field("latency")
+        current = self._slice_number(now)
+        with self._lock:
+            if not self._slices or self._slices[-1][0] != current:
+                self._slices.append((current, {}))
+                self._expire(current)
+            groups = self._slices[-1][1]
+            aggregate = groups.get(group)
+            if aggregate is None:
+                aggregate = groups[group] = _Aggregate()
+            aggregate.count += 1
+            aggregate.errors += _is_error(record.get("status"))
+            try:
+                aggregate.latency.add(float(latency))
+            except (TypeError, ValueError):
+                pass  # No (numeric) latency in this log.
+
+    def snapshot(self) -> List[dict]:
+        """Aggregates over the current window, busiest groups first."""
+        now = self.clock()
+        with self._lock:
+            self._expire(self._slice_number(now))
+            merged: Dict[Tuple, _Aggregate] = {}
+            for _, groups in self._slices:
+                for group, aggregate in groups.items():
+                    merged.setdefault(group, _Aggregate()).merge(aggregate)
+        # Until a full window has passed, rates are over the time observed.
+        elapsed = max(min(now - self.started, self.window), 1e-9)
+        rows = []
+        for group, aggregate in merged.items():
+            row = dict(zip(self.group_by, group))
+            row.update(
+                count=aggregate.count,
+                rate=round(aggregate.count / elapsed, 3),
+                error_rate=round(aggregate.errors / aggregate.count, 4),
+            )
+            for q in QUANTILES:
+                value = aggregate.latency.quantile(q)
+                row[f"p{int(q * 100)}"] = None if value is None else round(value, 1)
+            rows.append(row)
+        rows.sort(key=lambda row: row["count"], reverse=True)
+        return rows
+
+
+def format_stats_table(rows: List[dict], group_by: Tuple[str, ...]) -> str:
+    columns = [*group_by, "count", "rate", "error_rate", "p50", "p95", "p99"]
+    headers = [column.upper() for column in columns]
+    cells = [
+        ["-" if row[column] is None else str(row[column]) for column in columns]
+        for row in rows
+    ]
+    widths = [
+        max([len(header), *(len(line[i]) for line in cells)])
+        for i, header in enumerate(headers)
+    ]
+    lines = ["  ".join(h.ljust(w) for h, w in zip(headers, widths))]
+    for line in cells:
+        lines.append("  ".join(cell.ljust(w) for cell, w in zip(line, widths)))
+    return "\n".join(lines)
+
+
+def route_template_normalizer(route_index, prefix: str = "/v2"):
+    """Map concrete endpoints to their spec templates to bound cardinality.
+
+    ``/v2/wallets/5f1c.../addresses`` becomes ``/v2/wallets/{wallet_id}/addresses``;
+    endpoints that match no template are kept as they are.
+    """
+
+    @functools.lru_cache(maxsize=4096)
+    def normalize(endpoint: str) -> str:
+        path = endpoint.split("?", 1)[0]
+        if prefix and path.startswith(prefix + "/"):
+            path = path[len(prefix) :]
+        for template, _, _ in route_index.iter_matches(path):
+            return prefix + template
+        return endpoint
+
+    return normalize
@@ -1,4 +1,11 @@
+import hashlib
+import json
+import logging
+import marshal
 import os
+import subprocess
+import sys
+import tempfile
 import time
 
 import click
@@ -7,27 +14,153 @@ import yaml
 
 from cobo_cli.utils.config import get_config_path
 
+logger = logging.getLogger(__name__)
 
-def update_spec():
-    url = "https://raw.githubusercontent.com/CoboGlobal/developer-site/master/v2/cobo_waas2_openapi_spec/dev_openapi.yaml"  # noqa: E501
-    config_dir = get_config_path()
-    spec_file = os.path.join(config_dir, "openapi.yaml")
+# Bump whenever the layout of the compiled spec cache changes.
+SPEC_CACHE_VERSION = 1
+
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+SPEC_URL = "https://raw.githubusercontent.com/CoboGlobal/developer-site/master/v2/cobo_waas2_openapi_spec/dev_openapi.yaml"  # noqa: E501
+
+# How long a downloaded spec is considered fresh before it is revalidated.
+SPEC_MAX_AGE = 7 * 24 * 60 * 60
+
+# How long a background refresh may hold the refresh lock before it is
+# considered abandoned.
+SPEC_REFRESH_LOCK_TIMEOUT = 10 * 60
+
+
+def get_spec_file_path():
+    return os.path.join(get_config_path(), "openapi.yaml")
+
+
+def _spec_meta_path(spec_file):
+    return f"{spec_file}.meta.json"
+
+
+def _read_spec_meta(spec_file):
+    try:
+        with open(_spec_meta_path(spec_file)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_spec_meta(spec_file, meta):
+    meta_file = _spec_meta_path(spec_file)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(meta_file), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(meta, f)
+    os.replace(temp_path, meta_file)
+
+
+def update_spec(url=SPEC_URL, spec_file=None, quiet=False):
+    """Download the OpenAPI spec, revalidating and resuming where possible.
+
+    The ETag/Last-Modified validators are stored next to the spec file so
+    that an unchanged spec costs a single ``304 Not Modified`` round trip.
+    The body is streamed into ``<spec_file>.part`` and atomically renamed
+    into place; an interrupted download is resumed with a ``Range`` request
+    on the next call. Returns ``True`` if the spec is up to date afterwards.
+    """
+    spec_file = spec_file or get_spec_file_path()
+    part_file = f"{spec_file}.part"
+    os.makedirs(os.path.dirname(spec_file), exist_ok=True)
+
+    def echo(message):
+        if not quiet:
+            click.echo(message)
+
+    meta = _read_spec_meta(spec_file)
+    headers = {"Accept-Encoding": "gzip"}
+    resume_from = 0
+    if os.path.exists(part_file) and meta.get("partial_etag"):
+        # Resume against the identity encoding so byte offsets line up.
+        resume_from = os.path.getsize(part_file)
+        headers.update(
+            {
+                "Accept-Encoding": "identity",
+                "Range": f"bytes={resume_from}-",
+                "If-Range": meta["partial_etag"],
+            }
+        )
+    elif os.path.exists(spec_file):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        with open(spec_file, "wb") as f:
-            f.write(response.content)
-        click.echo("OpenAPI specification file downloaded successfully.")
-    except requests.RequestException as e:
-        click.echo(f"Failed to download OpenAPI specification file: {e}")
+        with requests.get(url, headers=headers, stream=True, timeout=(5, 60)) as r:
+            if r.status_code == 304:
+                os.utime(spec_file)
+                echo("OpenAPI specification file is up to date.")
+                return True
+            if r.status_code == 416 and resume_from:
+                # The partial download cannot be resumed; start over.
+                os.unlink(part_file)
+                _write_spec_meta(spec_file, {**meta, "partial_etag": None})
+                return update_spec(url, spec_file, quiet)
+            r.raise_for_status()
+
+            etag = r.headers.get("ETag")
+            mode = "ab" if r.status_code == 206 and resume_from else "wb"
+            _write_spec_meta(spec_file, {**meta, "partial_etag": etag})
+            with open(part_file, mode) as f:
+                for chunk in r.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+
+        os.replace(part_file, spec_file)
+        _write_spec_meta(
+            spec_file,
+            {"etag": etag, "last_modified": r.headers.get("Last-Modified")},
+        )
+        echo("OpenAPI specification file downloaded successfully.")
+        return True
+    except (requests.RequestException, OSError) as e:
+        echo(f"Failed to download OpenAPI specification file: {e}")
+        return False
+
+
+def refresh_spec_in_background(spec_file=None):
+    """Revalidate the spec in a detached process (stale-while-revalidate)."""
+    spec_file = spec_file or get_spec_file_path()
+    lock_file = f"{spec_file}.refresh"
+    try:
+        if time.time() - os.path.getmtime(lock_file) < SPEC_REFRESH_LOCK_TIMEOUT:
+            return  # Another process is already refreshing the spec.
+        os.unlink(lock_file)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.close(os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+    except FileExistsError:
+        return
+
+    subprocess.Popen(
+        [sys.executable, "-m", "cobo_cli.utils.openapi", "--refresh", spec_file],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
 
+def load_api_spec(custom_spec_path=None, refresh_mode=None):
+    """Load the OpenAPI spec.
+
+    ``refresh_mode`` (default: ``$COBO_SPEC_REFRESH`` or ``background``)
+    controls what happens when the downloaded spec is stale: ``background``
+    keeps using it while a detached process revalidates it, ``blocking``
+    revalidates before returning and ``off`` never refreshes a present spec.
+    """
 
-def load_api_spec(custom_spec_path=None):
     def is_spec_outdated(file_path):
         # Check if the file is older than one week
-        one_week_ago = time.time() - 7 * 24 * 60 * 60
-        return os.path.getmtime(file_path) < one_week_ago
+        return os.path.getmtime(file_path) < time.time() - SPEC_MAX_AGE
 
     if custom_spec_path:
         if not os.path.exists(custom_spec_path):
@@ -36,58 +169,438 @@ def load_api_spec(custom_spec_path=None):
             )
         spec_file = custom_spec_path
     else:
-        config_dir = get_config_path()
-        spec_file = os.path.join(config_dir, "openapi.yaml")
-        if not os.path.exists(spec_file) or is_spec_outdated(spec_file):
-            click.echo(
-                "OpenAPI specification file not found or outdated. Downloading..."
-            )
-            update_spec()
+        refresh_mode = refresh_mode or os.environ.get("COBO_SPEC_REFRESH", "background")
+        spec_file = get_spec_file_path()
+        if not os.path.exists(spec_file):
+            click.echo("OpenAPI specification file not found. Downloading...")
+            update_spec(spec_file=spec_file)
+        elif is_spec_outdated(spec_file):
+            if refresh_mode == "blocking":
+                click.echo("OpenAPI specification file outdated. Downloading...")
+                update_spec(spec_file=spec_file)
+            elif refresh_mode == "background":
+                logger.debug("OpenAPI specification outdated, refreshing in background")
+                refresh_spec_in_background(spec_file)
 
     try:
-        with open(spec_file, "rb") as f:
-            return yaml.safe_load(f)
+        return _load_spec_file(spec_file)
     except Exception as e:
         raise click.ClickException(f"Failed to open OpenAPI specification file: {e}")
 
 
-def get_api_details(spec, path, method):
+# Specs loaded by this process (and, under ``cobo serve``, preloaded for the
+# commands it runs), keyed by absolute path and checked against the file's
+# mtime and size.
+_loaded_specs = {}
+
+
+def _load_spec_file(spec_file):
+    stat = os.stat(spec_file)
+    path = os.path.abspath(spec_file)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    loaded = _loaded_specs.get(path)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+    spec = ApiSpec(read_spec_file(spec_file))
+    _loaded_specs[path] = (stamp, spec)
+    return spec
+
+
+def get_spec_cache_path(spec_file):
+    """Return the compiled cache location for an OpenAPI YAML file.
+
+    Caches live under ``~/.cobo/cache`` (keyed by the absolute source path) so
+    that custom ``--spec`` files in read-only directories can be cached too.
+    """
+    key = hashlib.sha256(os.path.abspath(spec_file).encode()).hexdigest()[:16]
+    return os.path.join(get_config_path(), "cache", f"openapi-{key}.bin")
+
+
+def read_spec_file(spec_file):
+    """Load an OpenAPI YAML file, going through the compiled spec cache.
+
+    The cache is a marshal sidecar whose header records the source file's
+    mtime, size and SHA-256. It is rebuilt whenever the source changes.
+    """
+    stat = os.stat(spec_file)
+    cache_file = get_spec_cache_path(spec_file)
+
+    spec = _read_spec_cache(cache_file, spec_file, stat)
+    if spec is not None:
+        logger.debug(f"Loaded OpenAPI spec from cache {cache_file}")
+        return spec
+
+    with open(spec_file, "rb") as f:
+        content = f.read()
+    spec = yaml.load(content, Loader=_YamlLoader)
+    _write_spec_cache(cache_file, stat, hashlib.sha256(content).hexdigest(), spec)
+    return spec
+
+
+def _file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_spec_cache(cache_file, spec_file, stat):
+    try:
+        with open(cache_file, "rb") as f:
+            version, mtime_ns, size, sha256 = marshal.load(f)  # nosec B302
+            if version != SPEC_CACHE_VERSION or size != stat.st_size:
+                return None
+            touched = mtime_ns != stat.st_mtime_ns
+            if touched and sha256 != _file_digest(spec_file):
+                return None
+            spec = marshal.load(f)  # nosec B302
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.debug(f"Ignoring unreadable OpenAPI spec cache {cache_file}: {e}")
+        return None
+    if touched:
+        # A touched but otherwise identical file is still a cache hit; record
+        # the new mtime so that later loads don't hash the file again.
+        _write_spec_cache(cache_file, stat, sha256, spec)
+    return spec
+
+
+def _write_spec_cache(cache_file, stat, sha256, spec):
+    header = (SPEC_CACHE_VERSION, stat.st_mtime_ns, stat.st_size, sha256)
+    try:
+        payload = marshal.dumps(header) + marshal.dumps(spec)
+    except ValueError as e:
+        # e.g. YAML timestamps that marshal cannot serialize; just skip caching.
+        logger.debug(f"OpenAPI spec is not cacheable: {e}")
+        return
+
+    cache_dir = os.path.dirname(cache_file)
+    temp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, cache_file)
+    except OSError as e:
+        logger.debug(f"Failed to write OpenAPI spec cache {cache_file}: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+class FrozenDict(dict):
+    """A read-only dict; mutating it raises ``TypeError``.
+
+    It stays a ``dict`` subclass so existing readers (``.get``, ``in``,
+    ``json.dumps``) keep working. Use ``.copy()`` to get a mutable dict.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("OpenAPI spec objects are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+def freeze(node):
+    """Deep-convert dicts to :class:`FrozenDict` and lists to tuples."""
+    if isinstance(node, FrozenDict):
+        return node
+    if isinstance(node, dict):
+        return FrozenDict((key, freeze(value)) for key, value in node.items())
+    if isinstance(node, (list, tuple)):
+        return tuple(freeze(value) for value in node)
+    return node
+
+
+class RouteIndex:
+    """Segment trie over the templates in ``spec["paths"]``.
+
+    Literal segments take priority over ``{param}`` segments, so
+    ``/wallets/tokens`` wins over ``/wallets/{wallet_id}`` for that input.
+    """
+
+    class _Node:
+        __slots__ = ("literals", "param", "routes")
+
+        def __init__(self):
+            self.literals = {}
+            self.param = None
+            # (template, operations, param_names) for templates ending here
+            self.routes = []
+
+    def __init__(self, paths):
+        self._root = self._Node()
+        for template, operations in paths.items():
+            node = self._root
+            param_names = []
+            for segment in template.split("/"):
+                if segment.startswith("{") and segment.endswith("}"):
+                    param_names.append(segment[1:-1])
+                    if node.param is None:
+                        node.param = self._Node()
+                    node = node.param
+                else:
+                    node = node.literals.setdefault(segment, self._Node())
+            node.routes.append((template, operations, param_names))
+
+    def iter_matches(self, path):
+        """Yield ``(template, operations, path_params)`` in priority order."""
+        segments = path.split("/")
+        for template, operations, param_names, values in self._walk(
+            self._root, segments, 0, []
+        ):
+            yield template, operations, dict(zip(param_names, values))
+
+    def _walk(self, node, segments, depth, values):
+        if depth == len(segments):
+            for template, operations, param_names in node.routes:
+                yield template, operations, param_names, values
+            return
+        segment = segments[depth]
+        literal = node.literals.get(segment)
+        if literal is not None:
+            yield from self._walk(literal, segments, depth + 1, values)
+        if node.param is not None:
+            yield from self._walk(node.param, segments, depth + 1, values + [segment])
+
+    def match(self, path, method):
+        """Return ``(template, operation, path_params)`` for a request.
+
+        Raises ``LookupError`` with ``args[0]`` set to whether any template
+        matched the path at all when no operation for ``method`` exists.
+        """
+        method = method.lower()
+        path_matched = False
+        for template, operations, path_params in self.iter_matches(path):
+            path_matched = True
+            if method in operations:
+                return template, operations[method], path_params
+        raise LookupError(path_matched)
+
+
+class RefResolver:
+    """Memoized, cycle-safe resolver for local ``$ref`` JSON pointers.
+
+    Everything it hands out is frozen (see :func:`freeze`), so resolved
+    objects can be cached and shared between callers and threads. Freezing
+    happens lazily, only for the parts of the spec that are actually read.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._pointers = {}
+        self._dereferenced = {}
+        self._operations = {}
+        self._details = {}
+
+    def resolve(self, ref):
+        """Resolve ``ref`` (following chained refs) to the referenced object."""
+        if not isinstance(ref, str):
+            return ref
+
+        resolved = self._pointers.get(ref)
+        if resolved is not None:
+            return resolved
+
+        chain = []
+        current_ref = ref
+        while True:
+            if current_ref in chain:
+                raise ValueError(
+                    f"Circular reference: {' -> '.join(chain + [current_ref])}"
+                )
+            chain.append(current_ref)
+            current = self._pointers.get(current_ref)
+            if current is not None:
+                break
+            current = self._lookup(current_ref)
+            if not (isinstance(current, dict) and "$ref" in current):
+                current = freeze(current)
+                break
+            current_ref = current["$ref"]
+
+        for chained_ref in chain:
+            self._pointers[chained_ref] = current
+        return current
+
+    def _lookup(self, ref):
+        current = self.spec
+        for part in ref.split("/")[1:]:  # Skip the first '#' part
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(current, dict) or part not in current:
+                raise ValueError(f"Unable to resolve reference: {ref}")
+            current = current[part]
+        return current
+
+    def dereference(self, node):
+        """Return a frozen copy of ``node`` with every ``$ref`` replaced.
+
+        Results are shared per pointer. A ``$ref`` that would close a cycle
+        (e.g. a recursive schema) is left in place as ``{"$ref": ...}``.
+        """
+        return self._dereference(node, ())
+
+    def _dereference(self, node, stack):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str):
+                if ref in stack:
+                    return freeze(node)
+                dereferenced = self._dereferenced.get(ref)
+                if dereferenced is None:
+                    dereferenced = self._dereference(self.resolve(ref), stack + (ref,))
+                    self._dereferenced[ref] = dereferenced
+                return dereferenced
+            return FrozenDict(
+                (key, self._dereference(value, stack)) for key, value in node.items()
+            )
+        if isinstance(node, (list, tuple)):
+            return tuple(self._dereference(value, stack) for value in node)
+        return node
+
+    def operation(self, path, method):
+        """Lazily build the fully dereferenced view of one operation."""
+        key = (path, method.lower())
+        operation = self._operations.get(key)
+        if operation is None:
+            operation = self.dereference(self.spec["paths"][path][method.lower()])
+            self._operations[key] = operation
+        return operation
+
+    def details(self, path, method):
+        """Frozen operation details with ``requestBody``/``parameters`` resolved.
+
+        Unlike :meth:`operation`, nested schema refs are kept so that help
+        output can still name the referenced schemas.
+        """
+        key = (path, method.lower())
+        details = self._details.get(key)
+        if details is None:
+            details = dict(freeze(self.spec["paths"][path][method.lower()]))
+            if "requestBody" in details and "$ref" in details["requestBody"]:
+                details["requestBody"] = self.resolve(details["requestBody"]["$ref"])
+            if "parameters" in details:
+                details["parameters"] = tuple(
+                    self.resolve(param["$ref"]) if "$ref" in param else param
+                    for param in details["parameters"]
+                )
+            details = FrozenDict(details)
+            self._details[key] = details
+        return details
+
+
+class ApiSpec(FrozenDict):
+    """A loaded OpenAPI spec that carries its precomputed lookup structures.
+
+    The spec must not be modified once loaded; read operations and schemas
+    through :func:`match_route` and :func:`resolve_reference`, which return
+    frozen objects.
+    """
+
+    __slots__ = ("_route_index", "_resolver")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._route_index = None
+        self._resolver = None
+
+    @property
+    def route_index(self):
+        if self._route_index is None:
+            self._route_index = RouteIndex(self.get("paths", {}))
+        return self._route_index
+
+    @property
+    def resolver(self):
+        if self._resolver is None:
+            self._resolver = RefResolver(self)
+        return self._resolver
+
+
+def get_route_index(spec):
+    if isinstance(spec, ApiSpec):
+        return spec.route_index
+    return RouteIndex(spec["paths"])
+
+
+def get_resolver(spec):
+    if isinstance(spec, ApiSpec):
+        return spec.resolver
+    return RefResolver(spec)
+
+
+def match_route(spec, path, method):
+    """Find the operation for ``method`` and ``path`` in a single trie lookup.
+
+    Returns ``(details, matched_path, path_params)``.
+    """
     if not isinstance(spec, dict) or "paths" not in spec:
         raise click.ClickException(
             "Invalid API specification format. Please ensure the OpenAPI spec is correctly loaded."
         )
 
-    matched_path = None
-    for spec_path, operations in spec["paths"].items():
-        if match_path(spec_path, path):
-            matched_path = spec_path
-            if method.lower() in operations:
-                details = operations[method.lower()]
-                # Resolve any $ref in the operation details
-                if "requestBody" in details and "$ref" in details["requestBody"]:
-                    details["requestBody"] = resolve_reference(
-                        spec, details["requestBody"]["$ref"]
-                    )
-                if "parameters" in details:
-                    details["parameters"] = [
-                        (
-                            resolve_reference(spec, param["$ref"])
-                            if "$ref" in param
-                            else param
-                        )
-                        for param in details["parameters"]
-                    ]
-                return details, spec_path
-
-    if matched_path is None:
-        raise click.ClickException(
-            f"The path '{path}' is not defined in the OpenAPI specification."
-        )
-    else:
+    try:
+        matched_path, _, path_params = get_route_index(spec).match(path, method)
+    except LookupError as e:
+        if not e.args[0]:
+            raise click.ClickException(
+                f"The path '{path}' is not defined in the OpenAPI specification."
+            )
         raise click.ClickException(
             f"No {method.upper()} operation found for path: {path}"
         )
 
+    details = get_resolver(spec).details(matched_path, method)
+    return details, matched_path, path_params
+
+
+def get_api_details(spec, path, method):
+    details, matched_path, _ = match_route(spec, path, method)
+    return details, matched_path
+
+
+def schema_properties(schema):
+    """The properties of a dereferenced schema, including ``allOf`` parts."""
+    properties = dict(schema.get("properties", {}))
+    for sub_schema in schema.get("allOf", ()):
+        properties.update(schema_properties(sub_schema))
+    return properties
+
+
+def is_cursor_paginated(spec, path, method="GET"):
+    """Whether an operation pages with ``after`` cursors.
+
+    That is the case when it accepts an ``after`` parameter and its success
+    response carries a ``data`` array next to a ``pagination`` object with an
+    ``after`` cursor.
+    """
+    operation = get_resolver(spec).operation(path, method)
+    if not any(p.get("name") == "after" for p in operation.get("parameters", ())):
+        return False
+    for status, response in operation.get("responses", {}).items():
+        if not str(status).startswith("2"):
+            continue
+        schema = (
+            response.get("content", {}).get("application/json", {}).get("schema", {})
+        )
+        properties = schema_properties(schema)
+        data = properties.get("data", {})
+        pagination = properties.get("pagination", {})
+        if data.get("type") == "array" and "after" in schema_properties(pagination):
+            return True
+    return False
+
 
 def match_path(spec_path, input_path):
     spec_parts = spec_path.split("/")
@@ -106,21 +619,7 @@ def match_path(spec_path, input_path):
 
 
 def resolve_reference(spec, ref):
-    if not isinstance(ref, str):
-        return ref
-
-    parts = ref.split("/")
-    current = spec
-    for part in parts[1:]:  # Skip the first '#' part
-        if part not in current:
-            raise ValueError(f"Unable to resolve reference: {ref}")
-        current = current[part]
-
-    # Handle nested references
-    while isinstance(current, dict) and "$ref" in current:
-        current = resolve_reference(spec, current["$ref"])
-
-    return current
+    return get_resolver(spec).resolve(ref)
 
 
 def merge_all_of(schema, spec):
@@ -238,7 +737,7 @@ def format_oneOf_schema(discriminator, schema, spec, param_name=None):
             for prop, prop_details in properties.items():
                 if "$ref" in prop_details:
                     prop_details = resolve_reference(spec, prop_details["$ref"])
-                prop_details["required"] = prop in required_props
+                prop_details = {**prop_details, "required": prop in required_props}
                 help_text += format_parameter_help(prop, prop_details, spec)
                 help_text += "\n"  # Add an empty line after each parameter
         elif param_name in properties:
@@ -304,7 +803,7 @@ def format_help(name, details, spec, is_operation=False):
                 for prop, prop_details in properties.items():
                     if "$ref" in prop_details:
                         prop_details = resolve_reference(spec, prop_details["$ref"])
-                    prop_details["required"] = prop in required_props
+                    prop_details = {**prop_details, "required": prop in required_props}
                     help_text += format_parameter_help(prop, prop_details, spec)
                     help_text += "\n"  # Add an empty line after each parameter
 
@@ -336,9 +835,10 @@ def format_help(name, details, spec, is_operation=False):
                                 prop_details = resolve_reference(
                                     spec, prop_details["$ref"]
                                 )
-                            prop_details["required"] = prop in schema.get(
-                                "required", []
-                            )
+                            prop_details = {
+                                **prop_details,
+                                "required": prop in schema.get("required", []),
+                            }
                             help_text += "    " + format_parameter_help(
                                 prop, prop_details, spec
                             )
@@ -411,3 +911,16 @@ def get_parameter_help(spec, path, method, param_name):
     return click.style(
         f"Parameter '{param_name}' not found for {method.upper()} {path}", fg="red"
     )
+
+
+if __name__ == "__main__":
+    # Entry point of the detached stale-while-revalidate refresh.
+    if len(sys.argv) == 3 and sys.argv[1] == "--refresh":
+        try:
+            if update_spec(spec_file=sys.argv[2], quiet=True):
+                read_spec_file(sys.argv[2])  # Warm the compiled cache as well.
+        finally:
+            try:
+                os.unlink(f"{sys.argv[2]}.refresh")
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,328 @@
+"""Client-side rate limiting shared by concurrent ``cobo`` processes.
+
+Requests are paced by token buckets, one per environment, credential and
+endpoint group (the first segment of the API path, e.g. ``wallets``). The
+state of each bucket is a small file under ``~/.cobo/ratelimit`` that is
+read and updated under an exclusive ``flock``, so every process on the
+machine draws from the same budget. A request that finds its bucket empty
+reserves the next token and sleeps until it is due: waiting callers are
+spaced evenly at the sustainable rate instead of bursting and backing off.
+
+Limits are configured per environment, e.g. ``cobo config set rate_limit 10``
+(requests per second), ``rate_limit_wallets 2`` for one endpoint group,
+``rate_limit_burst`` and ``rate_limit_concurrency`` (requests in flight at
+once). They are adapted from responses:
+
+* ``Retry-After`` pauses the bucket for every process;
+* rate-limit headers (``X-RateLimit-*`` or ``RateLimit-*``) cap the tokens
+  to the server's remaining quota and pace the rest of the window so that
+  the quota lasts until it resets;
+* a 429 without either halves the rate, which then recovers additively.
+"""
+
+import contextlib
+import hashlib
+import logging
+import math
+import os
+import random
+import re
+import struct
+import threading
+import time
+from dataclasses import astuple, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import click
+import requests
+
+from cobo_cli.utils.http import get_retry_after
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only shared between threads.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# tokens, updated, rate, ceiling, burst, blocked_until
+_STATE = struct.Struct("<6d")
+# Lowest rate a 429 can push a bucket down to, in requests per second.
+MIN_RATE = 0.1
+# Fraction of the configured rate regained after each successful request.
+RECOVERY_STEP = 0.05
+# Longest pause between polls for a free concurrency slot, in seconds.
+SLOT_POLL_MAX = 0.1
+
+
+def get_rate_limit_path() -> str:
+    return str(Path.home() / ".cobo" / "ratelimit")
+
+
+def endpoint_group(path: str) -> str:
+    """The group of an API path (without prefix): its first segment."""
+    segment = path.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+    return re.sub(r"[^a-z0-9_]+", "_", segment.lower()) or "root"
+
+
+def credential_id(secret: Optional[str]) -> str:
+    """Buckets are per credential, named after a hash rather than the key."""
+    if not secret:
+        return "anonymous"
+    return hashlib.sha256(secret.encode()).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class RateLimitOptions:
+    """Configured limits; 0 means unlimited (until the server says otherwise)."""
+
+    rate: float = 0.0
+    burst: float = 0.0
+    concurrency: int = 0
+    group_rates: Dict[str, float] = field(default_factory=dict)
+
+    def rate_for(self, group: str) -> float:
+        return self.group_rates.get(group, self.rate)
+
+    @classmethod
+    def from_config(cls, config_manager) -> "RateLimitOptions":
+        values = {
+            key: value
+            for key, value in config_manager.list_configs().items()
+            if key.startswith("rate_limit_")
+        }
+        return cls(
+            rate=_config_number("rate_limit", config_manager.get_config("rate_limit")),
+            burst=_config_number("rate_limit_burst", values.pop("rate_limit_burst", 0)),
+            concurrency=_config_number(
+                "rate_limit_concurrency", values.pop("rate_limit_concurrency", 0), int
+            ),
+            group_rates={
+                key[len("rate_limit_") :]: _config_number(key, value)
+                for key, value in values.items()
+            },
+        )
+
+
+def _config_number(key: str, value, kind: type = float):
+    """Parse a non-negative limit from the config; unset means 0 (unlimited)."""
+    if value is None or value == "":
+        return kind(0)
+    try:
+        number = kind(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not 0 <= number < math.inf:
+        raise click.ClickException(
+            f"Invalid {key} in config: {value!r} (expected a non-negative number)"
+        )
+    return number
+
+
+@dataclass
+class BucketState:
+    tokens: float
+    updated: float
+    rate: float
+    ceiling: float
+    burst: float
+    blocked_until: float = 0.0
+
+    def refill(self, now: float):
+        # ``updated`` may lie in the future while the bucket is paused.
+        if now > self.updated:
+            if self.rate > 0:
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated) * self.rate
+                )
+            self.updated = now
+
+    def set_rate(self, rate: float, burst: float = 0.0):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = min(self.tokens, self.burst)
+
+
+def parse_rate_limit_headers(
+    response: requests.Response,
+) -> Tuple[Optional[float], Optional[float]]:
+    """Return ``(remaining, seconds until reset)`` from rate-limit headers."""
+    headers = response.headers
+    remaining = reset = None
+    for prefix in ("RateLimit-", "X-RateLimit-", "X-Rate-Limit-"):
+        with contextlib.suppress(TypeError, ValueError):
+            remaining = float(headers.get(f"{prefix}Remaining"))
+        with contextlib.suppress(TypeError, ValueError):
+            reset = float(headers.get(f"{prefix}Reset"))
+        if remaining is not None:
+            break
+    if reset is not None and reset > 1e9:
+        reset = reset - time.time()  # An epoch timestamp, not delta seconds.
+    if reset is not None:
+        reset = max(0.0, reset)
+    return remaining, reset
+
+
+class Bucket:
+    """A token bucket whose state is shared through a file."""
+
+    def __init__(self, path: str, rate: float, burst: float):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+
+    def _update(self, update: Callable[[Optional[BucketState], float], tuple]):
+        """Run ``update(state, now)`` under the lock.
+
+        ``state`` is None for a new bucket. ``update`` returns the state to
+        save (None to leave the file alone) and a result to pass on.
+        """
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                data = os.read(fd, _STATE.size)
+                state = None
+                if len(data) == _STATE.size:
+                    state = BucketState(*_STATE.unpack(data))
+                state, result = update(state, time.time())
+                if state is not None:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.write(fd, _STATE.pack(*astuple(state)))
+                return result
+            finally:
+                os.close(fd)  # Releases the lock.
+
+    def _new_state(self, now: float) -> BucketState:
+        state = BucketState(0.0, now, 0.0, self.rate, 0.0)
+        state.set_rate(self.rate, self.burst)
+        state.tokens = state.burst
+        return state
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is due; returns the time slept."""
+        if not self.rate and not os.path.exists(self.path):
+            return 0.0  # Unlimited and nothing learned from the server yet.
+        delay = self._update(self._take)
+        if delay > 0:
+            logger.debug(f"Rate limited, waiting {delay:.2f}s ({self.path})")
+            time.sleep(delay)
+        return delay
+
+    def _take(self, state: Optional[BucketState], now: float):
+        state = state or self._new_state(now)
+        if state.ceiling != self.rate:
+            # The configured limit changed.
+            state.ceiling = self.rate
+            if not self.rate or not state.rate or state.rate > self.rate:
+                state.set_rate(self.rate, self.burst)
+        state.refill(now)
+        delay = max(0.0, state.blocked_until - now)
+        if state.rate > 0:
+            # Reserve the token even if it is not there yet, so callers
+            # queue up in order rather than racing for the next one.
+            state.tokens -= 1
+            if state.tokens < 0:
+                delay = max(delay, -state.tokens / state.rate)
+        return state, delay
+
+    def observe(self, response: Optional[requests.Response]):
+        """Adapt the bucket to a response's status and rate-limit headers."""
+        if response is None:
+            return
+        throttled = response.status_code == 429
+        remaining, reset = parse_rate_limit_headers(response)
+        if not throttled and remaining is None and not self.rate:
+            return
+        retry_after = get_retry_after(response)
+
+        def adapt(state: Optional[BucketState], now: float):
+            state = state or self._new_state(now)
+            state.refill(now)
+            if throttled or remaining == 0:
+                pause = retry_after if retry_after is not None else reset
+                if pause is None and throttled and state.rate > 0:
+                    state.set_rate(max(MIN_RATE, state.rate / 2), self.burst)
+                if pause:
+                    state.blocked_until = max(state.blocked_until, now + pause)
+                    state.updated = max(state.updated, state.blocked_until)
+                state.tokens = min(state.tokens, 0.0)
+            elif remaining is not None and reset:
+                # Spend what is left of the quota evenly until it resets.
+                sustainable = max(MIN_RATE, remaining / reset)
+                if state.ceiling:
+                    sustainable = min(sustainable, state.ceiling)
+                state.set_rate(sustainable, self.burst)
+                state.tokens = min(state.tokens, remaining)
+            elif state.ceiling and state.rate < state.ceiling:
+                state.set_rate(
+                    min(state.ceiling, state.rate + state.ceiling * RECOVERY_STEP),
+                    self.burst,
+                )
+            else:
+                return None, None
+            return state, None
+
+        self._update(adapt)
+
+
+class RateLimiter:
+    """The buckets and concurrency slots of one environment."""
+
+    def __init__(
+        self,
+        env: str,
+        options: RateLimitOptions,
+        directory: Optional[str] = None,
+    ):
+        self.env = env
+        self.options = options
+        self.directory = directory or get_rate_limit_path()
+        self._buckets: Dict[Tuple[str, str], Bucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, credential: str, group: str) -> Bucket:
+        with self._lock:
+            bucket = self._buckets.get((credential, group))
+            if bucket is None:
+                path = os.path.join(
+                    self.directory, f"{self.env}-{credential}-{group}.bucket"
+                )
+                bucket = Bucket(path, self.options.rate_for(group), self.options.burst)
+                self._buckets[(credential, group)] = bucket
+            return bucket
+
+    @contextlib.contextmanager
+    def slot(self, credential: str):
+        """Hold one of ``concurrency`` in-flight slots shared by all processes."""
+        slots = self.options.concurrency
+        if not slots or fcntl is None:
+            yield
+            return
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        prefix = os.path.join(self.directory, f"{self.env}-{credential}.slot")
+        fd = None
+        delay = SLOT_POLL_MAX / 16
+        try:
+            while fd is None:
+                for i in random.sample(range(slots), slots):  # nosec B311
+                    candidate = os.open(f"{prefix}{i}", os.O_RDWR | os.O_CREAT, 0o600)
+                    try:
+                        fcntl.flock(candidate, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        os.close(candidate)
+                    else:
+                        fd = candidate
+                        break
+                else:
+                    # All busy: poll every slot again, whichever frees first.
+                    time.sleep(delay)
+                    delay = min(delay * 2, SLOT_POLL_MAX)
+            yield
+        finally:
+            if fd is not None:
+                os.close(fd)
@@ -1,8 +1,49 @@
 import hashlib
+import threading
+from typing import Dict, Iterable, List
 
 from nacl.signing import SigningKey
 
 
+class CachedSigningKey(object):
+    """An ed25519 key, expanded once and reused for every signature."""
+
+    __slots__ = ("_signing_key", "verify_key")
+
+    def __init__(self, seed: bytes):
+        self._signing_key = SigningKey(seed)
+        self.verify_key = bytes(self._signing_key.verify_key)
+
+    def sign(self, message: bytes) -> bytes:
+        return self._signing_key.sign(message).signature
+
+
+_signing_keys: Dict[str, CachedSigningKey] = {}
+_signing_keys_lock = threading.Lock()
+
+
+def key_fingerprint(private_key: str) -> str:
+    """Registry key for a hex secret, so the secret itself is not a dict key."""
+    return hashlib.sha256(private_key.lower().encode()).hexdigest()
+
+
+def get_signing_key(private_key: str) -> CachedSigningKey:
+    """Return the process-wide expanded key for a hex-encoded ed25519 seed."""
+    fingerprint = key_fingerprint(private_key)
+    with _signing_keys_lock:
+        signing_key = _signing_keys.get(fingerprint)
+        if signing_key is None:
+            signing_key = CachedSigningKey(bytes.fromhex(private_key))
+            _signing_keys[fingerprint] = signing_key
+        return signing_key
+
+
+def clear_signing_keys():
+    """Forget every cached key, e.g. after the configured secret changed."""
+    with _signing_keys_lock:
+        _signing_keys.clear()
+
+
 class Signer(object):
     def __init__(self, private_key=None, public_key=None, algorithm="ed25519"):
         self.private_key = private_key
@@ -10,10 +51,13 @@ class Signer(object):
         self.algorithm = algorithm
 
     def sign(self, content: str):
+        return self.sign_many([content])[0]
+
+    def sign_many(self, contents: Iterable[str]) -> List[bytes]:
         assert self.private_key
         if self.algorithm == "ed25519":
-            sk = SigningKey(bytes.fromhex(self.private_key))
-            return sk.sign(self.content_hash(content)).signature
+            signing_key = get_signing_key(self.private_key)
+            return [signing_key.sign(self.content_hash(c)) for c in contents]
         else:
             raise NotImplementedError("Only ed25519 is supported")
 
@@ -0,0 +1,317 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Set, Tuple, Union
+
+import click
+import requests
+import urllib3
+
+from cobo_cli.utils.http import HttpOptions, get_session
+
+logger = logging.getLogger(__name__)
+
+GITHUB_REPO_BASE_URL = "https://github.com/CoboGlobal"
+# Lets tests (or a mirror) stand in for GitHub.
+TEMPLATE_BASE_URL_ENV = "COBO_TEMPLATE_BASE_URL"
+
+
+# Python versions with extraction filters also get the "data" filter's
+# checks (no device files, no setuid bits) on top of ours.
+_EXTRACT_KWARGS = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+
+
+def get_template_base_url() -> str:
+    return os.environ.get(TEMPLATE_BASE_URL_ENV) or GITHUB_REPO_BASE_URL
+
+
+def get_template_cache_dir() -> Path:
+    return Path.home() / ".cobo" / "templates"
+
+
+def get_archive_url(repo_name: str, ref: str = "main") -> str:
+    return f"{get_template_base_url()}/{repo_name}/archive/{ref}.tar.gz"
+
+
+class TemplateCache:
+    """Content-addressed store of template archives.
+
+    ``objects/<sha256>.tar.gz`` holds each distinct archive once, and
+    ``refs/<repo>/<ref>.json`` points a repo ref at an object together with
+    the ETag/Last-Modified it was served with, so later fetches are
+    conditional requests and ``offline`` fetches need no network at all.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else get_template_cache_dir()
+        self.objects_dir = self.root / "objects"
+        self.refs_dir = self.root / "refs"
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / f"{digest}.tar.gz"
+
+    def _ref_path(self, repo_name: str, ref: str) -> Path:
+        return self.refs_dir / repo_name / f"{ref}.json"
+
+    def read_ref(self, repo_name: str, ref: str) -> Optional[dict]:
+        try:
+            info = json.loads(self._ref_path(repo_name, ref).read_text())
+        except (OSError, ValueError):
+            return None
+        if not self.object_path(info.get("sha256", "")).is_file():
+            return None
+        return info
+
+    def write_ref(self, repo_name: str, ref: str, info: dict):
+        path = self._ref_path(repo_name, ref)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(info))
+        os.replace(tmp_path, path)
+
+    def open_object_writer(self) -> "ObjectWriter":
+        return ObjectWriter(self)
+
+
+class ObjectWriter:
+    """Write an archive into the cache, hashing it on the way."""
+
+    def __init__(self, cache: TemplateCache):
+        cache.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = cache
+        self._hash = hashlib.sha256()
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.objects_dir, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self.path: Optional[Path] = None
+        self.digest: Optional[str] = None
+
+    def write(self, data: bytes):
+        self._hash.update(data)
+        self._file.write(data)
+
+    def commit(self) -> Path:
+        self._file.close()
+        self.digest = self._hash.hexdigest()
+        self.path = self.cache.object_path(self.digest)
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_within(root: str, path: str) -> bool:
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+def _is_safe_member(member: tarfile.TarInfo, root: str) -> bool:
+    if not (member.isfile() or member.isdir() or member.issym() or member.islnk()):
+        return False
+    target = os.path.join(root, member.name)
+    if not member.name or os.path.isabs(member.name) or not _is_within(root, target):
+        return False
+    if member.issym():
+        link = os.path.join(os.path.dirname(target), member.linkname)
+        return not os.path.isabs(member.linkname) and _is_within(root, link)
+    if member.islnk():
+        return _is_within(root, os.path.join(root, member.linkname))
+    return True
+
+
+def _iter_members(tar: tarfile.TarFile) -> Iterator[tarfile.TarInfo]:
+    """Yield the members of a tar stream with a leading root directory stripped."""
+    prefix = None
+    for index, member in enumerate(tar):
+        name = member.name.rstrip("/")
+        if index == 0 and member.isdir() and "/" not in name:
+            prefix = name + "/"
+            continue
+        if prefix:
+            if name.startswith(prefix):
+                member.name = name[len(prefix) :]
+            if member.islnk() and member.linkname.startswith(prefix):
+                member.linkname = member.linkname[len(prefix) :]
+        yield member
+
+
+def extract_archive(fileobj, directory: str):
+    """Extract a gzipped tar stream into ``directory`` in a single pass.
+
+    A leading top-level directory, as in GitHub archives, is stripped as the
+    members go by. Members that would be written outside ``directory``
+    (absolute paths, ``..`` components, links pointing out of it) and special
+    files are skipped.
+    """
+    root = os.path.realpath(directory)
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+        for member in _iter_members(tar):
+            if not _is_safe_member(member, root):
+                logger.warning(f"Skipping unsafe archive member: {member.name}")
+                continue
+            tar.extract(member, root, **_EXTRACT_KWARGS)
+
+
+def iter_archive_files(
+    path: Union[str, Path], names: Optional[Set[str]] = None
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(name, content)`` for the regular files of a cached archive.
+
+    Names are relative to the stripped root directory; with ``names`` only
+    those files are read.
+    """
+    with tarfile.open(path, mode="r|gz") as tar:
+        for member in _iter_members(tar):
+            if not member.isfile() or (names is not None and member.name not in names):
+                continue
+            yield member.name, tar.extractfile(member).read()
+
+
+class _TeeReader:
+    """File-like reader that copies everything read into an ObjectWriter."""
+
+    def __init__(self, raw, writer: ObjectWriter):
+        self.raw = raw
+        self.writer = writer
+
+    def read(self, size: int = -1) -> bytes:
+        try:
+            data = self.raw.read(size)
+        except urllib3.exceptions.HTTPError as e:
+            raise requests.ConnectionError(e)
+        if data:
+            self.writer.write(data)
+        return data
+
+    def drain(self):
+        while self.read(65536):
+            pass
+
+
+def _move_into_place(staging: str, directory: str):
+    try:
+        os.rmdir(directory)  # Absent, or an empty placeholder.
+    except FileNotFoundError:
+        pass
+    except OSError:
+        # Not empty: the new entries replace existing ones of the same name.
+        for name in os.listdir(staging):
+            target = os.path.join(directory, name)
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target)
+            os.replace(os.path.join(staging, name), target)
+        return
+    os.replace(staging, directory)
+
+
+def _extract_staged(extract: Callable[[str], None], directory: str):
+    """Run ``extract(staging)`` and move the result into ``directory``.
+
+    Extraction happens in a scratch directory next to ``directory``, so an
+    archive that fails halfway (e.g. a dropped download) leaves nothing
+    behind in ``directory``.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(directory)}.")
+    try:
+        extract(staging)
+        _move_into_place(staging, directory)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _extract_object(path: Path, directory: str):
+    with open(path, "rb") as f:
+        extract_archive(f, directory)
+
+
+def _use_cached(cache: TemplateCache, cached: dict, extract_to: Optional[str]) -> Path:
+    path = cache.object_path(cached["sha256"])
+    if extract_to is not None:
+        _extract_staged(lambda staging: _extract_object(path, staging), extract_to)
+    return path
+
+
+def fetch_template(
+    repo_name: str,
+    ref: str = "main",
+    offline: bool = False,
+    cache: Optional[TemplateCache] = None,
+    extract_to: Optional[str] = None,
+) -> Path:
+    """Return the cached archive for ``repo_name@ref``, refreshing it if needed.
+
+    With ``extract_to`` the archive is also extracted there; a fresh download
+    is extracted straight from the response as it is written to the cache.
+    """
+    cache = cache or TemplateCache()
+    cached = cache.read_ref(repo_name, ref)
+    if offline:
+        if cached is None:
+            raise click.ClickException(
+                f"Template {repo_name}@{ref} is not cached; run once without --offline."
+            )
+        return _use_cached(cache, cached, extract_to)
+
+    url = get_archive_url(repo_name, ref)
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    options = HttpOptions()
+    writer = None
+    try:
+        with get_session().get(
+            url, headers=headers, stream=True, timeout=options.timeout
+        ) as response:
+            if response.status_code == 304 and cached:
+                logger.debug(f"Template {repo_name}@{ref} is up to date")
+                return _use_cached(cache, cached, extract_to)
+            response.raise_for_status()
+            writer = cache.open_object_writer()
+            response.raw.decode_content = True
+            reader = _TeeReader(response.raw, writer)
+            if extract_to is not None:
+                _extract_staged(
+                    lambda staging: extract_archive(reader, staging), extract_to
+                )
+            # Whatever the tar reader left unread (end-of-archive padding)
+            # still belongs in the cached object.
+            reader.drain()
+            path = writer.commit()
+            cache.write_ref(
+                repo_name,
+                ref,
+                {
+                    "url": url,
+                    "sha256": writer.digest,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                },
+            )
+            return path
+    except requests.RequestException as e:
+        if cached is not None:
+            click.echo(
+                f"Could not refresh template {repo_name}@{ref} ({e}); "
+                "using the cached copy.",
+                err=True,
+            )
+            return _use_cached(cache, cached, extract_to)
+        raise
+    finally:
+        if writer is not None and writer.path is None:
+            writer.abort()
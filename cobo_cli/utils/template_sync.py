@@ -0,0 +1,365 @@
+"""Incremental updates of projects generated from app templates.
+
+``app init`` leaves a lockfile in every sub-project recording the template
+(repo, ref and the cached archive it was generated from), the processing
+context and the hash of every generated file. ``app sync-template`` uses it
+to bring a sub-project up to date with a newer template:
+
+* the archive is revalidated with a conditional request, so an unchanged
+  template costs a single ``304``;
+* only files whose template source changed (or all files, if the
+  ``.code_gen.yaml`` rules changed) are rendered again;
+* files the user has not touched are replaced, and files the user changed
+  get a three-way merge of the previous render, the local copy and the new
+  render, with conflict markers where both sides changed the same lines.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import click
+
+from cobo_cli.utils.code_gen import ProcessContext, TemplateCodeGen
+from cobo_cli.utils.template_cache import (
+    TemplateCache,
+    fetch_template,
+    iter_archive_files,
+)
+
+LOCK_FILE = ".cobo-template.lock"
+RULES_FILE = ".code_gen.yaml"
+LOCK_VERSION = 1
+
+
+def hash_content(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def archive_digest(archive_path: Path) -> str:
+    # Cached archives are named after their sha256.
+    return archive_path.name.split(".", 1)[0]
+
+
+def hash_tree(directory: str) -> Dict[str, str]:
+    """Hash every file below ``directory``, keyed by its POSIX relative path."""
+    hashes = {}
+    root = Path(directory)
+    for path in root.rglob("*"):
+        if path.is_file() and path.name != LOCK_FILE:
+            hashes[path.relative_to(root).as_posix()] = hash_content(path.read_bytes())
+    return hashes
+
+
+def write_lock(
+    directory: str,
+    repo_name: str,
+    ref: str,
+    archive_path: Path,
+    context: ProcessContext,
+    files: Dict[str, str],
+):
+    lock = {
+        "version": LOCK_VERSION,
+        "repo": repo_name,
+        "ref": ref,
+        "sha256": archive_digest(archive_path),
+        "context": context.model_dump(),
+        "files": dict(sorted(files.items())),
+    }
+    path = os.path.join(directory, LOCK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(lock, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def read_lock(directory: str) -> dict:
+    path = os.path.join(directory, LOCK_FILE)
+    try:
+        with open(path) as f:
+            lock = json.load(f)
+    except FileNotFoundError:
+        raise click.ClickException(f"No {LOCK_FILE} found in {directory}")
+    except ValueError as e:
+        raise click.ClickException(f"Invalid {path}: {e}")
+    if lock.get("version") != LOCK_VERSION:
+        raise click.ClickException(f"Unsupported {path} version: {lock.get('version')}")
+    return lock
+
+
+def find_locked_projects(directory: str) -> List[str]:
+    """The sub-projects under ``directory`` (or ``directory`` itself) with a lockfile."""
+    if os.path.isfile(os.path.join(directory, LOCK_FILE)):
+        return [directory]
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if os.path.isfile(os.path.join(directory, name, LOCK_FILE))
+    )
+
+
+def merge3(
+    base: List[str],
+    local: List[str],
+    other: List[str],
+    labels: Tuple[str, str] = ("local", "template"),
+) -> Tuple[List[str], int]:
+    """Three-way merge of lists of lines (with line endings).
+
+    Returns the merged lines and the number of conflicting regions, which
+    are wrapped in ``<<<<<<<``/``=======``/``>>>>>>>`` markers.
+    """
+    local_blocks = SequenceMatcher(None, base, local, autojunk=False)
+    other_blocks = SequenceMatcher(None, base, other, autojunk=False)
+    local_matches = local_blocks.get_matching_blocks()
+    other_matches = other_blocks.get_matching_blocks()
+
+    # Regions of base that are unchanged on both sides.
+    regions = []
+    i = j = 0
+    while i < len(local_matches) and j < len(other_matches):
+        base_l, local_start, length_l = local_matches[i]
+        base_o, other_start, length_o = other_matches[j]
+        start = max(base_l, base_o)
+        end = min(base_l + length_l, base_o + length_o)
+        if start < end:
+            regions.append(
+                (start, end, local_start + start - base_l, other_start + start - base_o)
+            )
+        if base_l + length_l < base_o + length_o:
+            i += 1
+        else:
+            j += 1
+    regions.append((len(base), len(base), len(local), len(other)))
+
+    merged: List[str] = []
+    conflicts = 0
+    base_pos = local_pos = other_pos = 0
+    for start, end, local_start, other_start in regions:
+        base_chunk = base[base_pos:start]
+        local_chunk = local[local_pos:local_start]
+        other_chunk = other[other_pos:other_start]
+        if local_chunk == other_chunk or other_chunk == base_chunk:
+            merged.extend(local_chunk)
+        elif local_chunk == base_chunk:
+            merged.extend(other_chunk)
+        else:
+            conflicts += 1
+            merged.append(f"<<<<<<< {labels[0]}\n")
+            merged.extend(_terminated(local_chunk))
+            merged.append("=======\n")
+            merged.extend(_terminated(other_chunk))
+            merged.append(f">>>>>>> {labels[1]}\n")
+        merged.extend(base[start:end])
+        base_pos = end
+        local_pos = local_start + end - start
+        other_pos = other_start + end - start
+    return merged, conflicts
+
+
+def _terminated(lines: List[str]) -> List[str]:
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
+
+
+@dataclass
+class SyncResult:
+    directory: str
+    up_to_date: bool = False
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    merged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)
+    # Files the template changed or removed but that were deleted or
+    # modified locally and so were left alone.
+    kept: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        if self.up_to_date:
+            return "up to date"
+        counts = [
+            f"{len(files)} {name}"
+            for name, files in (
+                ("added", self.added),
+                ("updated", self.updated),
+                ("merged", self.merged),
+                ("removed", self.removed),
+                ("kept", self.kept),
+                ("conflicts", self.conflicts),
+            )
+            if files
+        ]
+        return ", ".join(counts) or "no file changes"
+
+
+def _is_generated(code_gen: TemplateCodeGen, name: str, context) -> bool:
+    """Whether post-processing keeps ``name``, including all its directories."""
+    parts = name.split("/")
+    for i in range(1, len(parts)):
+        if not code_gen.should_process_file("/".join(parts[:i]) + "/", context):
+            return False
+    return code_gen.should_process_file(name, context)
+
+
+def _is_safe_name(name: str) -> bool:
+    return not os.path.isabs(name) and ".." not in name.split("/")
+
+
+class TemplateSync:
+    """Bring one sub-project up to date with its template."""
+
+    def __init__(
+        self,
+        directory: str,
+        offline: bool = False,
+        dry_run: bool = False,
+        cache: Optional[TemplateCache] = None,
+    ):
+        self.directory = directory
+        self.offline = offline
+        self.dry_run = dry_run
+        self.cache = cache or TemplateCache()
+        self.lock = read_lock(directory)
+        self.context = ProcessContext(**self.lock["context"])
+
+    def run(self) -> SyncResult:
+        lock = self.lock
+        result = SyncResult(self.directory)
+        new_archive = fetch_template(
+            lock["repo"], lock["ref"], offline=self.offline, cache=self.cache
+        )
+        if archive_digest(new_archive) == lock["sha256"]:
+            result.up_to_date = True
+            return result
+
+        old_archive = self.cache.object_path(lock["sha256"])
+        old_hashes = {}
+        if old_archive.is_file():
+            old_hashes = {
+                name: hash_content(data)
+                for name, data in iter_archive_files(old_archive)
+            }
+
+        # Only files whose source changed need rendering, unless the rules
+        # changed, in which case any file may now be kept or dropped.
+        new_sources: Dict[str, bytes] = {}
+        new_hashes: Dict[str, str] = {}
+        for name, data in iter_archive_files(new_archive):
+            new_hashes[name] = hash_content(data)
+            if new_hashes[name] != old_hashes.get(name) or name == RULES_FILE:
+                new_sources[name] = data
+        rules_changed = new_hashes.get(RULES_FILE) != old_hashes.get(RULES_FILE)
+        missing = set(new_hashes) - set(new_sources)
+        if rules_changed and missing:
+            new_sources.update(iter_archive_files(new_archive, missing))
+        candidates: Set[str] = set(new_sources) | (set(old_hashes) - set(new_hashes))
+        if rules_changed or not old_hashes:
+            candidates |= set(lock["files"])
+
+        old_sources = {}
+        if old_hashes:
+            old_sources = dict(
+                iter_archive_files(old_archive, candidates | {RULES_FILE})
+            )
+        new_code_gen = self._code_gen(new_sources.get(RULES_FILE))
+        old_code_gen = self._code_gen(old_sources.get(RULES_FILE))
+
+        files = {
+            name: file_hash
+            for name, file_hash in lock["files"].items()
+            if name not in candidates
+        }
+        for name in sorted(candidates):
+            if not _is_safe_name(name):
+                continue
+            generated = None
+            if name in new_sources and _is_generated(new_code_gen, name, self.context):
+                generated = new_code_gen.render_file_content(
+                    new_sources[name], self.context
+                )
+                files[name] = hash_content(generated)
+            base = None
+            if name in old_sources and name in lock["files"]:
+                base = old_code_gen.render_file_content(old_sources[name], self.context)
+            self._sync_file(name, generated, base, result)
+
+        if not self.dry_run:
+            write_lock(
+                self.directory,
+                lock["repo"],
+                lock["ref"],
+                new_archive,
+                self.context,
+                files,
+            )
+        return result
+
+    def _code_gen(self, rules: Optional[bytes]) -> TemplateCodeGen:
+        code_gen = TemplateCodeGen()
+        if rules:
+            code_gen.load_rules(rules.decode("utf-8"))
+        return code_gen
+
+    def _sync_file(
+        self,
+        name: str,
+        generated: Optional[bytes],
+        base: Optional[bytes],
+        result: SyncResult,
+    ):
+        path = Path(self.directory, *name.split("/"))
+        current = path.read_bytes() if path.is_file() else None
+        locked_hash = self.lock["files"].get(name)
+        unmodified = current is not None and hash_content(current) == locked_hash
+
+        if generated is None:
+            if current is None or locked_hash is None:
+                return  # Already gone, or never generated by the template.
+            if unmodified:
+                result.removed.append(name)
+                if not self.dry_run:
+                    path.unlink()
+            else:
+                result.kept.append(name)
+            return
+
+        if current is None:
+            if locked_hash is None:
+                result.added.append(name)
+                self._write(path, generated)
+            elif generated != base:
+                result.kept.append(name)  # Deleted locally.
+            return
+        if current == generated:
+            return
+        if unmodified:
+            result.updated.append(name)
+            self._write(path, generated)
+            return
+
+        try:
+            merged, conflicts = merge3(
+                (base or b"").decode("utf-8").splitlines(keepends=True),
+                current.decode("utf-8").splitlines(keepends=True),
+                generated.decode("utf-8").splitlines(keepends=True),
+            )
+        except UnicodeDecodeError:
+            # A binary file changed on both sides: keep the local copy.
+            result.conflicts.append(name)
+            return
+        (result.conflicts if conflicts else result.merged).append(name)
+        self._write(path, "".join(merged).encode("utf-8"))
+
+    def _write(self, path: Path, data: bytes):
+        if self.dry_run:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
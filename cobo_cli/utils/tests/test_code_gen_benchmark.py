@@ -0,0 +1,85 @@
+import os
+import time
+import unittest
+from pathlib import Path
+
+from cobo_cli.utils.code_gen import CodeGen, ProcessContext, Rule
+
+FILE_COUNT = 50000
+# The per-pattern matcher is too slow to run over every file, so it is
+# timed on every SAMPLE_STEP-th file and scaled up.
+SAMPLE_STEP = 20
+CONTEXT = ProcessContext(app_type="portal", wallet_type="custodial-web3", auth="org")
+
+
+def _synthetic_tree():
+    """Relative paths of a 50k-file template tree and its rules."""
+    paths = [
+        f"packages/pkg{i % 50}/src/module{i % 200}/file{i}.py"
+        for i in range(FILE_COUNT)
+    ]
+    rules = {}
+    for i in range(100):
+        rules[f"packages/pkg{i % 50}/src/module{i}/*"] = Rule(
+            [{"app_type": ["portal", "web"] if i % 2 else ["mobile"]}]
+        )
+        rules[f"packages/pkg{i % 50}/src/module{i + 100}/file{i + 100}.py"] = Rule(
+            [{"wallet_type": "!custodial-web3"}]
+        )
+    for i in range(0, 50, 5):
+        # Overlaps the module patterns above, which come first.
+        rules[f"packages/pkg{i}/*"] = Rule([{"auth": "!org"}])
+    return paths, rules
+
+
+class _NamedRule:
+    """Evaluates to its own pattern, so a decision shows which rule won."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def evaluate(self, context):
+        return self.pattern
+
+
+def _should_process_uncompiled(code_gen, file_path, context):
+    # What every file used to do: try each pattern, evaluating rules as it goes.
+    normalized_path = str(Path(file_path))
+    for pattern, rule in code_gen.rules.items():
+        if code_gen._match_path_pattern(normalized_path, pattern):
+            return rule.evaluate(context)
+    return True
+
+
+class TestCodeGenBenchmark(unittest.TestCase):
+    def test_compiled_rules_pick_the_first_matching_pattern(self):
+        paths, rules = _synthetic_tree()
+        code_gen = CodeGen()
+        code_gen.rules = {pattern: _NamedRule(pattern) for pattern in rules}
+
+        # A step coprime with the 50 packages and 200 modules hits them all.
+        sample = paths[::23]
+        expected = [_should_process_uncompiled(code_gen, p, CONTEXT) for p in sample]
+        decisions = [code_gen.should_process_file(p, CONTEXT) for p in sample]
+        self.assertEqual(decisions, expected)
+        self.assertIn(True, decisions)  # No pattern matched.
+        self.assertIn("packages/pkg0/*", decisions)
+        self.assertIn("packages/pkg0/src/module0/*", decisions)
+
+    @unittest.skipUnless(os.environ.get("COBO_BENCHMARK"), "set COBO_BENCHMARK=1")
+    def test_compiled_rules_match_faster(self):
+        paths, rules = _synthetic_tree()
+        code_gen = CodeGen()
+        code_gen.rules = rules
+
+        sample = paths[::SAMPLE_STEP]
+        started = time.perf_counter()
+        expected = [_should_process_uncompiled(code_gen, p, CONTEXT) for p in sample]
+        baseline = (time.perf_counter() - started) * SAMPLE_STEP
+
+        started = time.perf_counter()
+        decisions = [code_gen.should_process_file(p, CONTEXT) for p in paths]
+        compiled = time.perf_counter() - started
+
+        self.assertEqual(decisions[::SAMPLE_STEP], expected)
+        self.assertLess(compiled, baseline)
@@ -1,6 +1,6 @@
 import unittest
 
-from cobo_cli.utils.signer import Signer
+from cobo_cli.utils.signer import Signer, clear_signing_keys, get_signing_key
 
 
 class TestSigner(unittest.TestCase):
@@ -17,3 +17,19 @@ class TestSigner(unittest.TestCase):
             signature,
             "3f6b900e0b3d6d73baea6fb37ce564d47a51ffc3660facf1f421a5c05e3a9c15e281e197130647d5ad6a3192adf20ca9729ecd167181c07a74ae6ef958e0be09",  # noqa: E501
         )
+
+    def test_sign_many(self):
+        signatures = self.signer.sign_many(["000000", "000001"])
+        self.assertEqual(signatures[0], self.signer.sign("000000"))
+        self.assertEqual(len(set(signatures)), 2)
+
+    def test_signing_key_is_cached_by_fingerprint(self):
+        key = get_signing_key(self.signer.private_key)
+        self.assertIs(get_signing_key(self.signer.private_key.upper()), key)
+        self.assertEqual(key.verify_key.hex(), self.signer.public_key)
+
+    def test_clear_signing_keys(self):
+        key = get_signing_key(self.signer.private_key)
+        clear_signing_keys()
+        # A fresh key is derived on the next use.
+        self.assertIsNot(get_signing_key(self.signer.private_key), key)
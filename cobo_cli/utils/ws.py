@@ -1,7 +1,18 @@
 import hashlib
+import json
+import logging
+import threading
 import time
+from collections import OrderedDict
+from typing import Callable, Optional
 
-from nacl.signing import SigningKey
+import click
+import websocket
+
+from cobo_cli.utils.http import HttpOptions, backoff_delay
+from cobo_cli.utils.signer import get_signing_key
+
+logger = logging.getLogger(__name__)
 
 
 def generate_ws_apikey_auth_headers(
@@ -12,12 +23,130 @@ def generate_ws_apikey_auth_headers(
     digest = hashlib.sha256(
         hashlib.sha256(f"{path}|{timestamp}".encode()).digest()
     ).digest()
-    sk = SigningKey(bytes.fromhex(api_secret))
-    signature = sk.sign(digest).signature
-    vk = bytes(sk.verify_key)
+    sk = get_signing_key(api_secret)
+    signature = sk.sign(digest)
+    vk = sk.verify_key
     headers = {
         "Biz-Api-Key": vk.hex(),
         "Biz-Api-Nonce": timestamp,
         "Biz-Api-Signature": signature.hex(),
     }
     return headers
+
+
+def extract_stream_message(message: dict) -> dict:
+    """The payload of a stream frame, which nests it as ``message.message``."""
+    return message.get("message", {}).get("message", {})
+
+
+class RecentIds:
+    """A bounded, insertion-ordered set used to drop redelivered events."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._ids = OrderedDict()
+
+    def add(self, event_id) -> bool:
+        """Remember ``event_id``; returns ``False`` if it was already seen."""
+        if event_id in self._ids:
+            self._ids.move_to_end(event_id)
+            return False
+        self._ids[event_id] = None
+        if len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+        return True
+
+
+class WebSocketSession:
+    """A websocket stream subscription that survives disconnects.
+
+    Every connection is opened with freshly signed headers from
+    ``headers_factory`` and re-sends ``subscription``. Dropped connections
+    are retried with jittered exponential backoff, ping/pong keeps idle
+    connections alive, and events already seen on an earlier connection
+    (by ``event_id(event)``) are skipped.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers_factory: Callable[[], dict],
+        subscription: dict,
+        on_event: Callable[[dict], None],
+        extract_event: Callable[[dict], dict] = extract_stream_message,
+        event_id: Optional[Callable[[dict], object]] = None,
+        ping_interval: float = 20.0,
+        ping_timeout: float = 10.0,
+        reconnect_base: float = 1.0,
+        reconnect_max: float = 30.0,
+        max_reconnects: Optional[int] = None,
+        dedupe_size: int = 10000,
+    ):
+        self.url = url
+        self.headers_factory = headers_factory
+        self.subscription = subscription
+        self.on_event = on_event
+        self.extract_event = extract_event
+        self.event_id = event_id
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.max_reconnects = max_reconnects
+        self.backoff = HttpOptions(
+            backoff_base=reconnect_base, backoff_max=reconnect_max
+        )
+        self.recent_ids = RecentIds(dedupe_size)
+        self.connections = 0
+        self._app: Optional[websocket.WebSocketApp] = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        """Connect and dispatch events until :meth:`close` is called."""
+        failures = 0
+        while not self._stopped.is_set():
+            connected = threading.Event()
+            self._app = websocket.WebSocketApp(
+                self.url,
+                header=self.headers_factory(),
+                on_open=lambda ws: self._on_open(ws, connected),
+                on_message=self._on_message,
+                on_error=self._on_error,
+            )
+            self._app.run_forever(
+                ping_interval=self.ping_interval,
+                ping_timeout=self.ping_timeout if self.ping_interval else None,
+                reconnect=0,
+            )
+            if self._stopped.is_set():
+                break
+            failures = 0 if connected.is_set() else failures + 1
+            if self.max_reconnects is not None and failures > self.max_reconnects:
+                click.echo("WebSocket connection closed, giving up")
+                break
+            delay = backoff_delay(failures, self.backoff)
+            click.echo(f"WebSocket connection closed, reconnecting in {delay:.1f}s")
+            self._stopped.wait(delay)
+
+    def close(self):
+        self._stopped.set()
+        if self._app is not None:
+            self._app.close()
+
+    def _on_open(self, ws, connected: threading.Event):
+        connected.set()
+        self.connections += 1
+        click.echo("WebSocket connection established")
+        ws.send(json.dumps(self.subscription))
+
+    def _on_message(self, ws, message):
+        event = self.extract_event(json.loads(message))
+        if not event:
+            return
+        if self.event_id is not None:
+            event_id = self.event_id(event)
+            if event_id is not None and not self.recent_ids.add(event_id):
+                logger.debug(f"Skipping duplicate event {event_id}")
+                return
+        self.on_event(event)
+
+    def _on_error(self, ws, error):
+        click.echo(f"WebSocket error: {str(error)}")